@@ -0,0 +1,324 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Protocol, Tuple
+from urllib.parse import urlsplit
+import structlog
+from app.config import settings
+from app.db import Database
+from app.metrics import DB_WRITE_QUEUE_DEPTH
+from app.models import NewsItem
+
+logger = structlog.get_logger()
+
+# Методи Database, що змінюють дані, виконуються в потоці-записувачі
+WRITE_METHODS = frozenset({
+    "add_news_item",
+    "add_news_items",
+    "mark_as_sent",
+    "mark_many_as_sent",
+    "toggle_source",
+    "update_source_headers",
+    "replace_digest_candidate",
+    "delete_digest_candidates",
+    "enqueue_deliveries",
+    "claim_deliveries",
+    "ack_deliveries",
+    "fail_deliveries",
+})
+
+# Методи тільки для читання обслуговує пул читачів
+READ_METHODS = frozenset({
+    "get_unsent_news",
+    "get_news_by_ids",
+    "get_known_urls",
+    "get_last_news",
+    "get_recent_news",
+    "get_news_after",
+    "get_recent_titles",
+    "search_news",
+    "get_content",
+    "load_content",
+    "get_stats_since",
+    "get_source_headers",
+    "get_digest_candidates",
+    "get_delivery_stats",
+})
+
+_STOP = object()
+
+# (fn, args, kwargs, future, exclusive); exclusive-операції виконуються поза
+# пакетною транзакцією — для ATTACH, VACUUM та інших обслуговуючих дій
+_WriteOp = Tuple[Callable[..., Any], tuple, dict, Future, bool]
+
+
+class _DatabaseWriter(threading.Thread):
+    """Єдиний потік-записувач: забирає операції з черги пачками і виконує
+    кожну пачку в одній транзакції (savepoint на операцію)"""
+
+    def __init__(self, db_url: str, max_batch: int):
+        super().__init__(name="db-writer", daemon=True)
+        self.db_url = db_url
+        self.max_batch = max_batch
+        self.queue: "queue.Queue[Any]" = queue.Queue()
+        self.ready = threading.Event()
+        self.stats = {"batches": 0, "writes": 0}
+        self._init_error: Optional[BaseException] = None
+
+    def run(self):
+        try:
+            # Зʼєднання створюється в цьому ж потоці — check_same_thread лишається увімкненим
+            database = Database(self.db_url)
+        except BaseException as e:
+            self._init_error = e
+            self.ready.set()
+            return
+        self.ready.set()
+        try:
+            while True:
+                op = self.queue.get()
+                if op is _STOP:
+                    break
+                ops = [op]
+                stop = False
+                while len(ops) < self.max_batch and not ops[-1][4]:
+                    try:
+                        op = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if op is _STOP:
+                        stop = True
+                        break
+                    ops.append(op)
+                exclusive = ops.pop() if ops[-1][4] else None
+                if ops:
+                    self._run_batch(database, ops)
+                if exclusive is not None:
+                    self._run_exclusive(database, exclusive)
+                if stop:
+                    break
+        finally:
+            database.close()
+
+    def _run_batch(self, database: Database, ops: List[_WriteOp]):
+        # Операцію, чий Future скасували до початку виконання (скасована задача
+        # з asyncio.wrap_future), пропускаємо: set_result на ньому кинув би InvalidStateError
+        ops = [op for op in ops if op[3].set_running_or_notify_cancel()]
+        if not ops:
+            return
+        results: List[tuple] = []
+        try:
+            with database.batch():
+                for fn, args, kwargs, future, _ in ops:
+                    try:
+                        with database.transaction():
+                            results.append((future, fn(database, *args, **kwargs), None))
+                    except Exception as e:
+                        results.append((future, None, e))
+        except Exception as e:
+            logger.error("db_write_batch_failed", error=str(e), size=len(ops))
+            for _, _, _, future, _ in ops:
+                future.set_exception(e)
+            return
+        self.stats["batches"] += 1
+        self.stats["writes"] += len(ops)
+        # Результати віддаємо лише після commit, щоб читачі вже бачили зміни
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _run_exclusive(self, database: Database, op: _WriteOp):
+        fn, args, kwargs, future, _ = op
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = fn(database, *args, **kwargs)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+
+class _DeferredWriter:
+    """Запис без очікування: виклик ставить операцію в чергу і повертає Future"""
+
+    def __init__(self, owner: "AsyncDatabase"):
+        self._owner = owner
+
+    def __getattr__(self, name: str):
+        if name not in WRITE_METHODS:
+            raise AttributeError(name)
+        method = getattr(Database, name)
+        return lambda *args, **kwargs: self._owner.submit(method, *args, **kwargs)
+
+
+class AsyncDatabase:
+    """Асинхронний фасад над SQLite.
+
+    Записи серіалізуються в одному потоці з пакетуванням, читання йдуть у
+    невеликий пул потоків, кожен з власним read-only зʼєднанням. Методи
+    мають ті самі назви й аргументи, що й у Database, але їх треба await-ити.
+    Застосунок викликає start() у окремому потоці (міграції можуть іти
+    довго); якщо ні, потоки стартують ліниво при першому зверненні, і перше
+    звернення чекає на міграції прямо в event loop.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, db_url: Optional[str] = None, readers: Optional[int] = None, max_batch: Optional[int] = None):
+        self.db_url = db_url or settings.DB_URL
+        self.reader_count = readers or settings.DB_READ_POOL_SIZE
+        self.max_batch = max_batch or settings.DB_WRITE_BATCH_SIZE
+        self.deferred = _DeferredWriter(self)
+        self._writer: Optional[_DatabaseWriter] = None
+        self._readers: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._reader_conns: List[Database] = []
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        if name in WRITE_METHODS:
+            method = getattr(Database, name)
+            return lambda *args, **kwargs: self.write(method, *args, **kwargs)
+        if name in READ_METHODS:
+            method = getattr(Database, name)
+            return lambda *args, **kwargs: self.read(method, *args, **kwargs)
+        raise AttributeError(name)
+
+    @property
+    def write_stats(self) -> dict:
+        return dict(self._writer.stats) if self._writer else {"batches": 0, "writes": 0}
+
+    def start(self) -> _DatabaseWriter:
+        """Запустити записувача (він же створює схему) і пул читачів; повертає записувача"""
+        with self._lock:
+            if self._writer is not None:
+                return self._writer
+            writer = _DatabaseWriter(self.db_url, self.max_batch)
+            writer.start()
+            writer.ready.wait()
+            if writer._init_error is not None:
+                raise writer._init_error
+            self._writer = writer
+            self._readers = ThreadPoolExecutor(self.reader_count, thread_name_prefix="db-reader")
+            DB_WRITE_QUEUE_DEPTH.set_function(writer.queue.qsize)
+            return writer
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Поставити fn(database, *args) у чергу записувача"""
+        return self._enqueue(fn, args, kwargs, exclusive=False)
+
+    def _enqueue(self, fn: Callable[..., Any], args: tuple, kwargs: dict, exclusive: bool) -> Future:
+        writer = self.start()
+        future: Future = Future()
+        writer.queue.put((fn, args, kwargs, future, exclusive))
+        return future
+
+    async def write(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    async def maintenance(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Виконати fn(database, *args) у потоці-записувачі поза транзакцією.
+
+        fn сам керує транзакціями; звичайні записи чекають, поки він завершиться,
+        тож обслуговуючі задачі варто ділити на короткі кроки.
+        """
+        return await asyncio.wrap_future(self._enqueue(fn, args, kwargs, exclusive=True))
+
+    async def read(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, lambda: fn(self._reader_db(), *args, **kwargs))
+
+    async def ping(self):
+        await self.read(lambda database: database.conn.execute("SELECT 1"))
+
+    def _reader_db(self) -> Database:
+        database = getattr(self._local, "database", None)
+        if database is None:
+            # Зʼєднання належить одному потоку пулу; check_same_thread=False
+            # лише для того, щоб close() міг закрити його з іншого потоку
+            database = Database(self.db_url, readonly=True, check_same_thread=False)
+            self._local.database = database
+            with self._lock:
+                self._reader_conns.append(database)
+        return database
+
+    def close(self):
+        """Дочекатися черги записів і закрити всі зʼєднання"""
+        with self._lock:
+            writer, readers = self._writer, self._readers
+            self._writer = self._readers = None
+        if readers is not None:
+            readers.shutdown(wait=True)
+        if writer is not None:
+            writer.queue.put(_STOP)
+            writer.join()
+        for database in self._reader_conns:
+            database.close()
+        self._reader_conns.clear()
+        self._local = threading.local()
+
+    async def aclose(self):
+        """close() поза event loop: очікування черги записів не блокує інші задачі"""
+        await asyncio.to_thread(self.close)
+
+
+class Storage(Protocol):
+    """Спільний інтерфейс сховищ (AsyncDatabase, PostgresDatabase)"""
+
+    backend: str
+    deferred: Any  # ті самі методи запису, але без очікування результату
+
+    async def add_news_item(self, item: NewsItem) -> bool: ...
+    async def add_news_items(self, items: List[NewsItem], breaking_impact: Optional[int] = None,
+                             channels: Optional[List[List[str]]] = None) -> List[bool]: ...
+    async def get_known_urls(self, urls: List[str]) -> set: ...
+    async def mark_as_sent(self, url: str): ...
+    async def mark_many_as_sent(self, ids: List[int]) -> int: ...
+    async def get_unsent_news(self, limit: int = 10, now: Optional[datetime] = None) -> List[NewsItem]: ...
+    async def get_news_by_ids(self, ids: List[int]) -> List[NewsItem]: ...
+    async def get_last_news(self) -> Optional[NewsItem]: ...
+    async def get_recent_news(self, minutes: int = 60) -> List[NewsItem]: ...
+    async def get_news_after(self, after_id: int, limit: int = 1000) -> List[NewsItem]: ...
+    async def get_recent_titles(self, minutes: int = 60) -> List[str]: ...
+    async def search_news(self, query: str, limit: int = 10, offset: int = 0) -> List[NewsItem]: ...
+    async def get_content(self, ids: List[int]) -> dict: ...
+    async def load_content(self, items: List[NewsItem]) -> List[NewsItem]: ...
+    async def get_stats_since(self, since: datetime) -> dict: ...
+    async def get_digest_candidates(self) -> List[dict]: ...
+    async def replace_digest_candidate(self, candidate: dict, evicted_id: Optional[int] = None): ...
+    async def delete_digest_candidates(self, ids: List[int]): ...
+    async def enqueue_deliveries(self, news_ids: List[int], kind: str, now: Optional[datetime] = None,
+                                 delay: float = 0, channel: str = "main") -> int: ...
+    async def claim_deliveries(self, limit: int, lease_until: datetime, now: Optional[datetime] = None,
+                               kind: Optional[str] = None) -> List[dict]: ...
+    async def ack_deliveries(self, ids: List[int], sent_at: Optional[datetime] = None) -> int: ...
+    async def fail_deliveries(self, failures: List[tuple]): ...
+    async def get_delivery_stats(self, since: datetime, now: Optional[datetime] = None) -> dict: ...
+    async def toggle_source(self, source_id: str) -> bool: ...
+    async def update_source_headers(self, source_id: str, etag: Optional[str] = None,
+                                    last_modified: Optional[str] = None): ...
+    async def get_source_headers(self, source_id: str): ...
+    async def ping(self): ...
+    async def aclose(self): ...
+    def close(self): ...
+
+
+POSTGRES_SCHEMES = frozenset({"postgres", "postgresql", "postgresql+asyncpg"})
+
+
+def create_storage(db_url: Optional[str] = None) -> Storage:
+    """Сховище за схемою DB_URL: sqlite:///... або postgresql://..."""
+    db_url = db_url or settings.DB_URL
+    scheme = urlsplit(db_url).scheme
+    if scheme in POSTGRES_SCHEMES:
+        from app.pg_db import PostgresDatabase
+        return PostgresDatabase(db_url)
+    if scheme not in ("sqlite", ""):
+        raise ValueError(f"Unsupported DB_URL scheme: {scheme!r}")
+    return AsyncDatabase(db_url)
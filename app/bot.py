@@ -1,27 +1,55 @@
+import asyncio
+import hmac
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.types import Message, Update
 import structlog
+from app.async_db import Storage
 from app.config import Settings, settings
-from app.db import db
 from app.models import NewsItem
+from app.digest import DigestAccumulator
+from app.render import render_breaking, render_breaking_batch
+from app.routing import DEFAULT_CHANNEL, ChannelRouter
 from app.scheduler import NewsScheduler
+from app.send_queue import PRIORITY_BREAKING, PRIORITY_DIGEST, SendQueue
 
 logger = structlog.get_logger()
 
+# Скільки відрендерених breaking-постів тримати для повторного використання в інших каналах
+_RENDER_CACHE_SIZE = 256
+
 class NewsBot:
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, scheduler: Optional[NewsScheduler] = None, storage=None,
+                 send_queue: Optional[SendQueue] = None, router: Optional[ChannelRouter] = None):
         self.settings = settings
+        self.router = router or ChannelRouter.single(settings.TELEGRAM_CHANNEL_ID)
+        self.scheduler = scheduler
+        self.storage: Optional[Storage] = storage if storage is not None else getattr(scheduler, "storage", None)
         self.bot = Bot(token=settings.TELEGRAM_TOKEN)
         self.dp = Dispatcher()
+        # Усі відправки в канал ідуть через чергу з лімітами Telegram
+        self.send_queue = send_queue or SendQueue()
+        # Текст поста не залежить від каналу — рендеримо один раз на новину
+        self._rendered: "OrderedDict[int, str]" = OrderedDict()
+        # Оновлення з webhook обробляються фоновими задачами, не блокуючи відповідь Telegram
+        self._updates: Set[asyncio.Task] = set()
+        self._update_slots = asyncio.Semaphore(settings.WEBHOOK_MAX_CONCURRENCY)
         self.setup_handlers()
 
+    def _storage(self) -> Storage:
+        if self.storage is None:
+            raise RuntimeError("NewsBot has no storage for admin commands")
+        return self.storage
+
     def setup_handlers(self):
         """Setup message handlers"""
         self.dp.message.register(self.handle_admin_command, Command("stats"))
         self.dp.message.register(self.handle_admin_command, Command("digest"))
         self.dp.message.register(self.handle_admin_command, Command("toggle"))
+        self.dp.message.register(self.handle_admin_command, Command("search"))
 
     async def handle_admin_command(self, message: Message) -> None:
         """Handle admin commands."""
@@ -37,17 +65,23 @@ class NewsBot:
         if command == "/stats":
             await self.show_stats(message)
         elif command == "/digest":
-            await self.create_digest(message)
+            args = message.text.split()[1:]
+            if args and args[0] == "preview":
+                await self.preview_digest(message)
+            else:
+                await self.create_digest(message)
         elif command.startswith("/toggle"):
             await self.toggle_feature(message)
+        elif command == "/search":
+            await self.search_news(message)
 
     async def show_stats(self, message: Message) -> None:
         """Show statistics for 24 hours / week"""
         day_ago = datetime.now() - timedelta(days=1)
-        day_stats = db.get_stats_since(day_ago)
+        day_stats = await self._storage().get_stats_since(day_ago)
         
         week_ago = datetime.now() - timedelta(days=7)
-        week_stats = db.get_stats_since(week_ago)
+        week_stats = await self._storage().get_stats_since(week_ago)
         
         text = "📊 Статистика бота:\n\n"
         text += "За 24 години:\n"
@@ -55,28 +89,69 @@ class NewsBot:
         text += f"• Breaking news: {day_stats['breaking']}\n"
         text += f"• Середній impact: {day_stats['avg_impact']:.1f}\n\n"
         
+        delivery = await self._storage().get_delivery_stats(day_ago)
+        text += "Доставка за 24 години:\n"
+        text += f"• Відправлено: {delivery['delivered']} (у черзі {delivery['pending']}, з помилкою {delivery['failed']})\n"
+        text += f"• Затримка: середня {delivery['avg_lag_seconds']:.0f} с, максимальна {delivery['max_lag_seconds']:.0f} с\n"
+        if self.scheduler:
+            coalesced = self.scheduler.delivery.stats
+            text += f"• Постів: {coalesced['posts']} на {coalesced['items']} новин (з моменту запуску)\n"
+        text += f"• Черга Telegram: {self.send_queue.depth} (429 RetryAfter: {self.send_queue.stats['retry_after']})\n\n"
+        
         text += "За тиждень:\n"
         text += f"• Оброблено новин: {week_stats['total']}\n"
         text += f"• Breaking news: {week_stats['breaking']}\n"
         text += f"• Середній impact: {week_stats['avg_impact']:.1f}\n"
+        text += f"• Вартість LLM: ${week_stats['cost_usd']:.4f}\n"
+        
+        if week_stats['by_source']:
+            text += "\nДжерела за тиждень:\n"
+            ranked = sorted(week_stats['by_source'].items(), key=lambda kv: kv[1]['total'], reverse=True)
+            for source_id, stats in ranked:
+                text += f"• {source_id}: {stats['total']} (breaking {stats['breaking']})\n"
         
         await message.reply(text)
 
     async def create_digest(self, message: Message) -> None:
         """Send digest now"""
         try:
-            scheduler = NewsScheduler()
-            await scheduler.send_daily_digest()
+            if self.scheduler is None:
+                raise RuntimeError("scheduler is not running")
+            await self.scheduler.send_daily_digest()
             await message.reply("✅ Дайджест відправлено")
         except Exception as e:
             logger.error("error_sending_digest", error=str(e))
             await message.reply("❌ Помилка при відправці дайджесту")
 
+    async def preview_digest(self, message: Message) -> None:
+        """Show current digest candidates without sending"""
+        if self.scheduler:
+            digest = self.scheduler.digest
+        else:
+            digest = DigestAccumulator(writer=self._storage().deferred)
+            await digest.load_async(self._storage())
+        await message.reply(digest.preview())
+
+    async def search_news(self, message: Message) -> None:
+        """Full-text search over stored news"""
+        query = message.text.partition(" ")[2].strip() if message.text else ""
+        if not query:
+            await message.reply("❌ Вкажіть запит: /search <текст>")
+            return
+        items = await self._storage().search_news(query, limit=10)
+        if not items:
+            await message.reply(f"🔎 Нічого не знайдено за запитом «{query}»")
+            return
+        text = f"🔎 Результати за запитом «{query}»:\n\n"
+        for i, item in enumerate(items, 1):
+            text += f"{i}. {item.title} ({item.source_id}, {item.published:%Y-%m-%d})\n{item.url}\n\n"
+        await message.reply(text, disable_web_page_preview=True)
+
     async def toggle_feature(self, message: Message) -> None:
         """Toggle source on/off"""
         try:
-            source_id = message.text.split()[1]
-            success = db.toggle_source(source_id)
+            source_id = (message.text or "").split()[1]
+            success = await self._storage().toggle_source(source_id)
             if success:
                 await message.reply(f"✅ Джерело {source_id} {'увімкнено' if success else 'вимкнено'}")
             else:
@@ -84,17 +159,127 @@ class NewsBot:
         except IndexError:
             await message.reply("❌ Вкажіть ID джерела: /toggle <source_id>")
 
+    def _render_breaking(self, item) -> str:
+        text = self._rendered.get(item.id) if item.id is not None else None
+        if text is None:
+            text = render_breaking(item)
+            if item.id is not None:
+                self._rendered[item.id] = text
+                if len(self._rendered) > _RENDER_CACHE_SIZE:
+                    self._rendered.popitem(last=False)
+        else:
+            self._rendered.move_to_end(item.id)
+        return text
+
+    async def send_breaking_news(self, item, channel: str = DEFAULT_CHANNEL, priority: int = PRIORITY_BREAKING):
+        """Відправити breaking news у канал (через чергу з урахуванням лімітів)"""
+        try:
+            await self._send_to_channel(self._render_breaking(item), "HTML", priority, channel)
+            logger.info("breaking_news_sent", title=item.title, impact=item.impact, channel=channel)
+        except Exception as e:
+            logger.error("error_sending_breaking_news", error=str(e), title=item.title, channel=channel)
+            # Помилку бачить DeliveryWorker і повторює відправку пізніше
+            raise
+
+    async def send_breaking_batch(self, items, channel: str = DEFAULT_CHANNEL, priority: int = PRIORITY_BREAKING):
+        """Відправити кілька breaking news одним постом (склейка сплеску новин)"""
+        if len(items) == 1:
+            return await self.send_breaking_news(items[0], channel, priority=priority)
+        try:
+            for text in render_breaking_batch(items):
+                await self._send_to_channel(text, "HTML", priority, channel)
+            logger.info("breaking_news_batch_sent", count=len(items), channel=channel)
+        except Exception as e:
+            logger.error("error_sending_breaking_news", error=str(e), count=len(items), channel=channel)
+            raise
+
+    async def send_digest_messages(self, messages, channels: Optional[List[str]] = None,
+                                   priority: int = PRIORITY_DIGEST) -> List[str]:
+        """Відправити дайджест, уже розкладений по повідомленнях (HTML), у канали дайджесту.
+
+        Канали обслуговуються паралельно, порядок повідомлень усередині каналу зберігається.
+        Повертає канали, що отримали дайджест повністю; помилки окремих каналів
+        логуються, а піднімається помилка лише тоді, коли не вдалося жодному.
+        """
+        async def to_channel(channel: str):
+            for text in messages:
+                await self._send_to_channel(text, "HTML", priority, channel)
+
+        channels = self.router.digest_channels() if channels is None else channels
+        results = await asyncio.gather(*(to_channel(channel) for channel in channels), return_exceptions=True)
+        errors: Dict[str, BaseException] = {
+            channel: result for channel, result in zip(channels, results) if isinstance(result, BaseException)
+        }
+        for channel, error in errors.items():
+            logger.error("digest_channel_failed", channel=channel, error=str(error))
+        delivered = [channel for channel in channels if channel not in errors]
+        if errors and not delivered:
+            raise next(iter(errors.values()))
+        return delivered
+
+    async def _send_to_channel(self, text: str, parse_mode: str, priority: int, channel: str = DEFAULT_CHANNEL):
+        chat_id = self.router.chat_id(channel)
+        await self.send_queue.send(
+            chat_id,
+            lambda: self.bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode,
+                disable_web_page_preview=True
+            ),
+            priority=priority,
+        )
+
     async def start(self):
         """Start the bot"""
         try:
-            await self.dp.start_polling(self.bot)
+            # Сигнали обробляє власник процесу (uvicorn), а не aiogram
+            await self.dp.start_polling(self.bot, handle_signals=False)
         except Exception as e:
             logger.error("error_starting_bot", error=str(e))
             raise
 
-# For backward compatibility
-bot = Bot(token=settings.TELEGRAM_TOKEN)
-dp = Dispatcher()
+    @property
+    def webhook_url(self) -> str:
+        return self.settings.WEBHOOK_URL.rstrip("/") + self.settings.WEBHOOK_PATH
+
+    async def start_webhook(self):
+        """Зареєструвати webhook; усі репліки ставлять ту саму адресу, тож виклик ідемпотентний"""
+        await self.bot.set_webhook(
+            self.webhook_url,
+            secret_token=self.settings.WEBHOOK_SECRET or None,
+            allowed_updates=self.dp.resolve_used_update_types(),
+        )
+        logger.info("webhook_set", url=self.webhook_url)
+
+    def check_webhook_secret(self, token: Optional[str]) -> bool:
+        """Порівняти X-Telegram-Bot-Api-Secret-Token із налаштованим секретом"""
+        expected = self.settings.WEBHOOK_SECRET
+        if not expected:
+            return True
+        return token is not None and hmac.compare_digest(token.encode(), expected.encode())
+
+    def feed_update(self, data: dict) -> asyncio.Task:
+        """Розібрати оновлення з webhook і обробити його у фоновій задачі"""
+        update = Update.model_validate(data, context={"bot": self.bot})
+        task = asyncio.get_running_loop().create_task(self._process_update(update))
+        self._updates.add(task)
+        task.add_done_callback(self._updates.discard)
+        return task
+
+    async def _process_update(self, update: Update):
+        async with self._update_slots:
+            try:
+                await self.dp.feed_update(self.bot, update)
+            except Exception as e:
+                logger.error("webhook_update_failed", update_id=update.update_id, error=str(e))
+
+    async def close(self):
+        """Дочекатися оброблюваних оновлень, зупинити чергу відправки і закрити HTTP-сесію бота"""
+        if self._updates:
+            await asyncio.gather(*self._updates, return_exceptions=True)
+        await self.send_queue.stop()
+        await self.bot.session.close()
 
 TG_ADMIN_ID = int(getattr(settings, 'TG_ADMIN_ID', 0))
 
@@ -103,47 +288,3 @@ ADMIN_IDS = [int(id) for id in settings.get_admin_ids()]
 
 def is_admin(user_id: int) -> bool:
     return user_id in ADMIN_IDS
-
-async def send_breaking_news(item):
-    """Відправити breaking news в канал"""
-    try:
-        text = f"Breaking News\n\n"
-        text += f"{item.title}\n\n"
-        text += f"{item.summary}\n\n"
-        text += f"{item.url}"
-        
-        await bot.send_message(
-            chat_id=settings.TELEGRAM_CHANNEL_ID,
-            text=text,
-            parse_mode="Markdown",
-            disable_web_page_preview=True
-        )
-        logger.info("breaking_news_sent", title=item.title, impact=item.impact)
-    except Exception as e:
-        logger.error("error_sending_breaking_news", error=str(e), title=item.title)
-
-async def start_bot():
-    """Запустить бота"""
-    try:
-        await dp.start_polling(bot)
-    except Exception as e:
-        logger.error("error_starting_bot", error=str(e))
-        raise 
-
-async def handle_admin_command(self, message: Message) -> None:
-    """Handle admin commands."""
-    if not message.from_user:
-        return
-        
-    user_id = str(message.from_user.id)
-    if user_id not in self.settings.get_admin_ids():
-        await message.reply("⛔️ У вас немає доступу до цієї команди.")
-        return
-
-    command = message.text.split()[0] if message.text else ""
-    if command == "/stats":
-        await self.show_stats(message)
-    elif command == "/digest":
-        await self.create_digest(message)
-    elif command.startswith("/toggle"):
-        await self.toggle_feature(message) 
\ No newline at end of file
@@ -16,10 +16,50 @@ class Settings(BaseSettings):
     
     # Database
     DB_URL: str = Field(default="sqlite:///data.db")
+    DB_READ_POOL_SIZE: int = 4
+    DB_WRITE_BATCH_SIZE: int = 100
+    DB_JOURNAL_MODE: str = "WAL"
+    DB_SYNCHRONOUS: str = "NORMAL"
+    DB_MMAP_SIZE: int = 256 * 1024 * 1024
+    DB_CACHE_SIZE: int = -64000  # від'ємне значення — у KiB
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_POOL_SIZE: int = 10  # зʼєднань у пулі PostgreSQL
+    DB_CLOSE_TIMEOUT: float = 10.0  # скільки чекати запити, що виконуються, при зупинці
     
     # Paths
     BASE_DIR: Path = Path(__file__).parent.parent
     SOURCES_FILE: Path = BASE_DIR / "config" / "sources.yml"
+    CHANNELS_FILE: Path = BASE_DIR / "config" / "channels.yml"
+    ARCHIVE_DIR: Path = BASE_DIR / "archive"
+    EXPORT_DIR: Path = BASE_DIR / "export"
+    
+    # Retention: новини, старші за RETENTION_DAYS, переносяться в помісячні архіви
+    RETENTION_DAYS: int = 90
+    RETENTION_BATCH_SIZE: int = 1000
+    RETENTION_VACUUM_PAGES: int = 1000
+    
+    # Доставка в Telegram через outbox
+    BREAKING_MIN_IMPACT: int = 2
+    BREAKING_BYPASS_IMPACT: int = 5  # новини з такою оцінкою LLM йдуть окремим постом одразу
+    BREAKING_COALESCE_SECONDS: float = 60.0  # вікно склейки решти breaking news в один пост
+    BREAKING_MAX_PER_POST: int = 10
+    OUTBOX_BATCH_SIZE: int = 20
+    OUTBOX_POLL_SECONDS: float = 5.0
+    OUTBOX_LEASE_SECONDS: int = 120  # після цього незакритий запис видається повторно
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: float = 5.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 3600.0
+    
+    # Ліміти Telegram Bot API для черги відправки
+    TELEGRAM_GLOBAL_RATE: float = 30.0  # повідомлень за секунду на бота
+    TELEGRAM_CHAT_RATE_PER_MINUTE: float = 20.0  # на один чат/канал
+    TELEGRAM_CHAT_BURST: int = 3
+    TELEGRAM_MAX_RETRY_AFTER: int = 5  # скільки разів повторювати після 429
+    TELEGRAM_SEND_CONCURRENCY: int = 10  # одночасних запитів до Telegram (у різні чати)
+    
+    # Експорт у Parquet для аналітики
+    EXPORT_BATCH_SIZE: int = 5000
+    EXPORT_GAP_SECONDS: int = 3600  # скільки чекати рядки з пропущеними id (PostgreSQL)
     
     # LLM settings
     GEMINI_TEMPERATURE: float = 0.2
@@ -30,9 +70,37 @@ class Settings(BaseSettings):
     BATCH_SIZE: int = 10
     PROCESSING_TIMEOUT: int = 12
     
+    # Digest settings
+    DIGEST_SIZE: int = 10
+    DIGEST_MAX_PER_SOURCE: int = 3
+    
     # Monitoring
     SENTRY_DSN: str = ""
     VERSION: str = "1.0.0"
+    # /livez і /readyz віддають знімок, який фонові перевірки оновлюють раз на інтервал
+    HEALTH_CHECK_INTERVAL: float = 10.0
+    HEALTH_DB_TIMEOUT: float = 2.0
+    SOURCE_STALE_INTERVALS: int = 3  # джерело без успішного фетчу стільки інтервалів — застаріле
+    LLM_FAILURE_THRESHOLD: int = 5  # помилок провайдера LLM поспіль до статусу «не ok»
+    
+    # HTTP API (FastAPI) і спільний HTTP-пул фетчерів
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    BOT_POLLING: bool = True  # False — лише API і планувальник (тести, окремий інстанс бота)
+    RUN_SCHEDULER: bool = True  # у кількох репліках задачі мають виконуватися лише в одній
+    # Webhook: якщо задано WEBHOOK_URL, оновлення приходять POST-запитами замість polling
+    WEBHOOK_URL: str = ""  # публічна адреса, напр. https://bot.example.com
+    WEBHOOK_PATH: str = "/telegram/webhook"
+    WEBHOOK_SECRET: str = ""  # перевіряється в заголовку X-Telegram-Bot-Api-Secret-Token
+    WEBHOOK_MAX_CONCURRENCY: int = 32  # оновлень, що обробляються одночасно
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    # Приймання новин через POST /api/news: обмежена черга перед спільним конвеєром
+    INGEST_QUEUE_SIZE: int = 1000  # новин у черзі; коли заповнена — 429
+    INGEST_WORKERS: int = 2  # пачок, що обробляються одночасно
+    INGEST_BULK_MAX_ITEMS: int = 10000  # рядків NDJSON в одному запиті
+    INGEST_RETRY_AFTER: int = 5  # секунд у заголовку Retry-After відповіді 429
+    INGEST_API_KEY: str = ""  # якщо задано, перевіряється в заголовку X-API-Key
     
     # Metrics
     ENABLE_METRICS: bool = True
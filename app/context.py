@@ -0,0 +1,93 @@
+import asyncio
+from typing import Optional
+import httpx
+import structlog
+from app.async_db import AsyncDatabase, Storage, create_storage
+from app.bot import NewsBot
+from app.config import Settings, settings as default_settings
+from app.health import HealthMonitor
+from app.ingest import IngestQueue
+from app.metrics import WEBHOOK_UPDATES_IN_FLIGHT
+from app.routing import load_channels
+from app.scheduler import NewsScheduler
+from app.summarizer import Summarizer
+
+logger = structlog.get_logger()
+
+
+class AppContext:
+    """Усі довгоживучі обʼєкти застосунку в одному місці.
+
+    Створюється один раз при старті (FastAPI lifespan) і передається
+    обробникам: сховище, спільний HTTP-пул фетчерів, клієнти LLM, канали
+    з правилами маршрутизації, бот із чергою відправки, планувальник і черга
+    приймання новин через API. Конструктор нічого не відкриває —
+    зʼєднання і фонові задачі зʼявляються в start() і закриваються в stop().
+    """
+
+    def __init__(self, settings: Optional[Settings] = None, storage: Optional[Storage] = None):
+        self.settings = settings or default_settings
+        self.storage = storage or create_storage(self.settings.DB_URL)
+        self.http = httpx.AsyncClient(
+            timeout=self.settings.HTTP_TIMEOUT,
+            limits=httpx.Limits(max_connections=self.settings.HTTP_MAX_CONNECTIONS),
+        )
+        self.summarizer = Summarizer()
+        self.router = load_channels(self.settings.CHANNELS_FILE)
+        self.bot = NewsBot(self.settings, storage=self.storage, router=self.router)
+        self.scheduler = NewsScheduler(self.storage, publisher=self.bot, summarizer=self.summarizer,
+                                       http=self.http, router=self.router)
+        self.bot.scheduler = self.scheduler
+        # Новини з POST /api/news проходять той самий конвеєр, що й новини фетчерів
+        self.ingest = IngestQueue(self.storage, process=lambda source_id, items: self.scheduler.process_items(
+            self.scheduler.source_for(source_id), items))
+        self.health = HealthMonitor(self.storage, scheduler=self.scheduler, summarizer=self.summarizer)
+        WEBHOOK_UPDATES_IN_FLIGHT.set_function(lambda: len(self.bot._updates))
+        self._polling: Optional[asyncio.Task] = None
+
+    @property
+    def webhook_mode(self) -> bool:
+        return bool(self.settings.WEBHOOK_URL)
+
+    async def start(self, polling: Optional[bool] = None):
+        """Перевірити сховище, запустити планувальник і отримання оновлень бота.
+
+        У режимі webhook оновлення приходять у FastAPI-обробник, тож реплік
+        може бути кілька; polling можливий лише в одному процесі.
+        """
+        if isinstance(self.storage, AsyncDatabase):
+            # Записувач при старті проганяє міграції (зокрема перебудову таблиць і
+            # VACUUM) — чекаємо на нього в окремому потоці, а не в event loop
+            await asyncio.to_thread(self.storage.start)
+        await self.storage.ping()
+        if self.settings.RUN_SCHEDULER:
+            self.scheduler.start()
+        if self.webhook_mode:
+            await self.bot.start_webhook()
+        elif self.settings.BOT_POLLING if polling is None else polling:
+            self._polling = asyncio.get_running_loop().create_task(self.bot.start())
+        self.ingest.start()
+        # Перший знімок стану — до того, як застосунок почне приймати запити
+        await self.health.check()
+        self.health.start()
+        logger.info("app_started", storage=self.storage.backend, webhook=self.webhook_mode,
+                    polling=self._polling is not None, scheduler=self.settings.RUN_SCHEDULER)
+
+    async def stop(self):
+        """Зупинити фонові задачі у зворотному порядку і закрити всі ресурси"""
+        await self.health.stop()
+        await self.ingest.stop()
+        if self._polling is not None:
+            self._polling.cancel()
+            try:
+                await self._polling
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.warning("polling_stop_failed", error=str(e))
+            self._polling = None
+        await self.scheduler.stop()
+        await self.bot.close()
+        await self.http.aclose()
+        await self.storage.aclose()
+        logger.info("app_stopped")
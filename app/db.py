@@ -1,132 +1,617 @@
+import math
 import sqlite3
+from contextlib import contextmanager
+from functools import lru_cache
 from typing import List, Optional
 import structlog
 from app.models import NewsItem
 from app.config import settings
+from app.delivery import BREAKING_KIND, URGENT_KIND
+from app.migrations import migrate
+from app.ranker import Ranker
+from app.routing import DEFAULT_CHANNEL
+from app.search import BM25_WEIGHTS, build_match_query
+from app.utils import compress_text, decompress_text, url_key
 from datetime import datetime, timedelta
 
 logger = structlog.get_logger()
 
+# Колонки news_items, з яких будується NewsItem. score рахується окремо,
+# а текст лежить у news_content і підвантажується через load_content()
+NEWS_COLUMNS = (
+    "id", "url", "title", "source_id", "published", "lang", "impact",
+    "summary", "why_matters", "processed_at", "sent", "llm_model", "cost_usd",
+    "base_score", "rank_key",
+)
+
+_INSERT_NEWS_SQL = """
+    INSERT OR IGNORE INTO news_items (
+        url, title, source_id, published, content, lang,
+        score, impact, summary, why_matters, processed_at,
+        sent, llm_model, cost_usd, base_score, rank_key, url_key
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Не більше стількох параметрів у одному IN (...)
+_CHUNK_SIZE = 500
+
+
+def _chunks(values: list, size: int = _CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+_INSERT_CONTENT_SQL = "INSERT OR REPLACE INTO news_content (news_id, body) VALUES (?, ?)"
+
+_UPSERT_ROLLUP_SQL = """
+    INSERT INTO news_rollup_hourly (bucket, source_id, llm_model, total, breaking, impact_sum, cost_usd)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (bucket, source_id, llm_model) DO UPDATE SET
+        total = total + excluded.total,
+        breaking = breaking + excluded.breaking,
+        impact_sum = impact_sum + excluded.impact_sum,
+        cost_usd = cost_usd + excluded.cost_usd
+"""
+
+_SELECT_NEWS = f"SELECT {', '.join(NEWS_COLUMNS)} FROM news_items"
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+# Перетворювачі значень SQLite у типи полів NewsItem; решта колонок уже
+# має потрібний тип (INTEGER/REAL/TEXT)
+_DECODERS = {
+    "published": _parse_datetime,
+    "processed_at": _parse_datetime,
+    "sent": bool,
+}
+
+
+@lru_cache(maxsize=32)
+def _row_decoder(columns: tuple):
+    """Функція row -> NewsItem для фіксованого набору колонок.
+
+    Дані в БД записані нами ж і пройшли валідацію при вставці, тому модель
+    збирається напряму, як це робить NewsItem.model_construct, але з
+    підготовленими заздалегідь значеннями за замовчуванням і перетворювачами.
+    content лишається порожнім до load_content().
+    """
+    # Кортеж, а не set: set(tuple) займає помітно менше памʼяті, ніж set.copy()
+    fields_set = tuple(dict.fromkeys(columns + ("content",)))
+    defaults = {
+        name: field.get_default(call_default_factory=True)
+        for name, field in NewsItem.model_fields.items()
+        if name not in fields_set
+    }
+    defaults["content"] = ""
+    converters = [(name, _DECODERS[name]) for name in columns if name in _DECODERS]
+
+    def decode(row) -> NewsItem:
+        values = defaults.copy()
+        values.update(zip(columns, row))
+        for name, convert in converters:
+            value = values[name]
+            if value is not None:
+                values[name] = convert(value)
+        item = NewsItem.__new__(NewsItem)
+        object.__setattr__(item, "__dict__", values)
+        object.__setattr__(item, "__pydantic_fields_set__", set(fields_set))
+        object.__setattr__(item, "__pydantic_extra__", None)
+        object.__setattr__(item, "__pydantic_private__", None)
+        return item
+
+    return decode
+
+
+def _to_item(row: sqlite3.Row) -> NewsItem:
+    """NewsItem з рядка БД без повторної валідації"""
+    return _row_decoder(tuple(row.keys()))(row)
+
+
+def _to_items(cursor: sqlite3.Cursor) -> List[NewsItem]:
+    """_to_item для всіх рядків курсора; колонки визначаються один раз,
+    а рядки читаються кортежами, без sqlite3.Row"""
+    decode = _row_decoder(tuple(column[0] for column in cursor.description))
+    cursor.row_factory = None
+    return [decode(row) for row in cursor.fetchall()]
+
+
+def _hour_bucket(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d %H:00:00")
+
+
+def _rollup_rows(items: List[NewsItem], bucket=_hour_bucket) -> List[tuple]:
+    """Згрупувати новини в дельти для _UPSERT_ROLLUP_SQL"""
+    buckets: dict = {}
+    for item in items:
+        key = (bucket(item.published), item.source_id or "", item.llm_model or "")
+        total, breaking, impact_sum, cost = buckets.get(key, (0, 0, 0, 0.0))
+        buckets[key] = (
+            total + 1,
+            breaking + (item.impact >= 4),
+            impact_sum + item.impact,
+            cost + (item.cost_usd or 0.0)
+        )
+    return [key + value for key, value in buckets.items()]
+
+
+def _breaking_groups(items: List[NewsItem], statuses: List[bool], breaking_impact: int,
+                     channels: Optional[List[List[str]]] = None) -> dict:
+    """Записи outbox для вставлених breaking news: {(канал, вид, затримка): [id новин]}.
+
+    channels[i] — канали для items[i] (за замовчуванням DEFAULT_CHANNEL).
+    Термінові новини (оцінка LLM >= BREAKING_BYPASS_IMPACT) ставляться видом
+    URGENT_KIND без вікна склейки. Ранжований impact для цього не годиться:
+    свіжа новина отримує 5 лише за час публікації.
+    """
+    groups: dict = {}
+    for i, (item, inserted) in enumerate(zip(items, statuses)):
+        if not inserted or item.impact < breaking_impact:
+            continue
+        llm_impact = item.impact if item.llm_impact is None else item.llm_impact
+        if llm_impact >= settings.BREAKING_BYPASS_IMPACT:
+            kind, delay = URGENT_KIND, 0.0
+        else:
+            kind, delay = BREAKING_KIND, settings.BREAKING_COALESCE_SECONDS
+        for channel in (channels[i] if channels is not None else [DEFAULT_CHANNEL]):
+            groups.setdefault((channel, kind, delay), []).append(item.id)
+    return groups
+
+
+def _news_row(item: NewsItem) -> tuple:
+    """Рядок для _INSERT_NEWS_SQL; заодно заповнює rank_key, якщо його немає"""
+    if item.rank_key is None:
+        item.rank_key = Ranker.calculate_rank_key(item.base_score, item.published)
+    return (
+        item.url, item.title, item.source_id, item.published,
+        None, item.lang, item.score, item.impact,
+        item.summary, item.why_matters, item.processed_at,
+        item.sent, item.llm_model, item.cost_usd,
+        item.base_score, item.rank_key, url_key(item.url)
+    )
+
+
+def _register_math_functions(conn: sqlite3.Connection):
+    """Зареєструвати pow(), якщо SQLite зібрано без math-функцій"""
+    try:
+        conn.execute("SELECT pow(2, 1)")
+    except sqlite3.OperationalError:
+        conn.create_function("pow", 2, math.pow, deterministic=True)
+
+
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect(settings.DB_URL.replace('sqlite:///', ''))
+    def __init__(self, db_url: Optional[str] = None, readonly: bool = False, check_same_thread: bool = True):
+        self.conn: sqlite3.Connection = sqlite3.connect(
+            (db_url or settings.DB_URL).replace('sqlite:///', ''),
+            check_same_thread=check_same_thread
+        )
         self.conn.row_factory = sqlite3.Row
-        self._create_tables()
+        self._batch_depth = 0
+        _register_math_functions(self.conn)
+        self._apply_pragmas(readonly)
+        if readonly:
+            self.conn.execute("PRAGMA query_only = 1")
+        else:
+            migrate(self.conn)
     
-    def _create_tables(self):
-        """Создать необходимые таблицы"""
-        with self.conn:
-            self.conn.execute("""
-                CREATE TABLE IF NOT EXISTS sources (
-                    id TEXT PRIMARY KEY,
-                    name TEXT,
-                    weight INTEGER DEFAULT 1,
-                    active BOOLEAN DEFAULT 1,
-                    etag TEXT,
-                    last_modified TEXT
-                )
-            """)
-            
-            self.conn.execute("""
-                CREATE TABLE IF NOT EXISTS news_items (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT UNIQUE,
-                    title TEXT,
-                    source_id TEXT REFERENCES sources(id),
-                    published TIMESTAMP,
-                    content TEXT,
-                    lang TEXT,
-                    score REAL,
-                    impact INTEGER,
-                    summary TEXT,
-                    why_matters TEXT,
-                    processed_at TIMESTAMP,
-                    sent BOOLEAN DEFAULT 0,
-                    llm_model TEXT,
-                    cost_usd REAL
-                )
-            """)
+    @contextmanager
+    def transaction(self):
+        """Транзакція для одного виклику; всередині batch() чи іншої транзакції — savepoint"""
+        if not self._batch_depth and not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self.conn.rollback()
+                raise
+            else:
+                self.conn.commit()
+            return
+        self.conn.execute("SAVEPOINT op")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK TO op")
+            raise
+        finally:
+            self.conn.execute("RELEASE op")
+    
+    @contextmanager
+    def batch(self):
+        """Обʼєднати кілька викликів в одну транзакцію (один commit)"""
+        if self._batch_depth:
+            self._batch_depth += 1
+            try:
+                yield
+            finally:
+                self._batch_depth -= 1
+            return
+        self.conn.execute("BEGIN")
+        self._batch_depth = 1
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            raise
+        else:
+            self.conn.commit()
+        finally:
+            self._batch_depth = 0
+    
+    def _apply_pragmas(self, readonly: bool):
+        """Профіль налаштувань SQLite з settings"""
+        self.conn.execute(f"PRAGMA busy_timeout = {int(settings.DB_BUSY_TIMEOUT_MS)}")
+        self.conn.execute(f"PRAGMA cache_size = {int(settings.DB_CACHE_SIZE)}")
+        self.conn.execute(f"PRAGMA mmap_size = {int(settings.DB_MMAP_SIZE)}")
+        self.conn.execute("PRAGMA temp_store = MEMORY")
+        if not readonly:
+            # Діє лише для нової бази; існуючі переводить RetentionJob
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            # journal_mode зберігається у файлі БД, тож його вмикає записувач
+            self.conn.execute(f"PRAGMA journal_mode = {settings.DB_JOURNAL_MODE}")
+        self.conn.execute(f"PRAGMA synchronous = {settings.DB_SYNCHRONOUS}")
     
     def add_news_item(self, item: NewsItem) -> bool:
         """Добавить новую новость в БД"""
         try:
-            with self.conn:
-                self.conn.execute("""
-                    INSERT OR IGNORE INTO news_items (
-                        url, title, source_id, published, content, lang,
-                        score, impact, summary, why_matters, processed_at,
-                        sent, llm_model, cost_usd
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    item.url, item.title, item.source_id, item.published,
-                    item.content, item.lang, item.score, item.impact,
-                    item.summary, item.why_matters, item.processed_at,
-                    item.sent, item.llm_model, item.cost_usd
-                ))
+            with self.transaction():
+                cursor = self.conn.execute(_INSERT_NEWS_SQL, _news_row(item))
+                if cursor.rowcount != 1:
+                    return False
+                item.id = cursor.lastrowid
+                self.conn.execute(_INSERT_CONTENT_SQL, (item.id, compress_text(item.content)))
+                self.conn.executemany(_UPSERT_ROLLUP_SQL, _rollup_rows([item]))
             return True
         except Exception as e:
             logger.error("error_adding_news", error=str(e), url=item.url)
             return False
     
-    def get_unsent_news(self, limit: int = 10) -> List[NewsItem]:
-        """Получить неотправленные новости"""
-        cursor = self.conn.execute("""
-            SELECT * FROM news_items 
-            WHERE sent = 0 
-            ORDER BY impact DESC, published DESC 
-            LIMIT ?
-        """, (limit,))
+    def add_news_items(self, items: List[NewsItem], breaking_impact: Optional[int] = None,
+                       channels: Optional[List[List[str]]] = None) -> List[bool]:
+        """Добавить пачку новостей одной транзакцией.
+
+        Возвращает статус для каждой новости: True — вставлена, False —
+        проигнорирована (канонический URL уже есть в БД или повторяется в пачке).
+        Вставленным новостям проставляется id. Если задан breaking_impact,
+        вставленные новости с impact >= breaking_impact в той же транзакции
+        ставятся в outbox на доставку — по записи на каждый канал из channels[i];
+        все, кроме срочных (см. _breaking_groups), — с задержкой окна склейки
+        BREAKING_COALESCE_SECONDS.
+        """
+        if not items:
+            return []
+        keys = [url_key(item.url) for item in items]
+        with self.transaction():
+            existing = self._existing_keys(keys)
+            statuses = []
+            by_key = {}
+            for item, key in zip(items, keys):
+                inserted = key not in existing
+                statuses.append(inserted)
+                if inserted:
+                    existing.add(key)
+                    by_key[key] = item
+            to_insert = list(by_key.values())
+            self.conn.executemany(_INSERT_NEWS_SQL, [_news_row(item) for item in to_insert])
+            ids = self._ids_by_key(list(by_key))
+            for key, item in by_key.items():
+                item.id = ids.get(key)
+            self.conn.executemany(
+                _INSERT_CONTENT_SQL,
+                [(item.id, compress_text(item.content)) for item in to_insert]
+            )
+            self.conn.executemany(_UPSERT_ROLLUP_SQL, _rollup_rows(to_insert))
+            if breaking_impact is not None:
+                groups = _breaking_groups(items, statuses, breaking_impact, channels)
+                for (channel, kind, delay), news_ids in groups.items():
+                    self.enqueue_deliveries(news_ids, kind, delay=delay, channel=channel)
+        return statuses
+    
+    def _existing_keys(self, keys: List[int]) -> set:
+        found: set = set()
+        for chunk in _chunks(keys):
+            placeholders = ", ".join("?" * len(chunk))
+            cursor = self.conn.execute(
+                f"SELECT url_key FROM news_items WHERE url_key IN ({placeholders})", chunk
+            )
+            found.update(row['url_key'] for row in cursor)
+        return found
+    
+    def _ids_by_key(self, keys: List[int]) -> dict:
+        ids: dict = {}
+        for chunk in _chunks(keys):
+            placeholders = ", ".join("?" * len(chunk))
+            cursor = self.conn.execute(
+                f"SELECT id, url_key FROM news_items WHERE url_key IN ({placeholders})", chunk
+            )
+            ids.update((row['url_key'], row['id']) for row in cursor)
+        return ids
+    
+    def get_known_urls(self, urls: List[str]) -> set:
+        """URL з пачки, чия канонічна форма вже є в БД (до суммаризації)"""
+        keys = {url: url_key(url) for url in urls}
+        existing = self._existing_keys(list(set(keys.values())))
+        return {url for url, key in keys.items() if key in existing}
+    
+    def get_unsent_news(self, limit: int = 10, now: Optional[datetime] = None) -> List[NewsItem]:
+        """Получить неотправленные новости, упорядоченные по score на момент запроса.
+
+        score = base_score * 2^(-age / half-life) = 2^(rank_key - now / half-life),
+        поэтому сортировка идёт по индексу rank_key, а затухание считает SQLite.
+        """
+        now_key = Ranker.calculate_rank_key(1.0, now or datetime.now())
+        columns = ", ".join(f"n.{name}" for name in NEWS_COLUMNS)
+        cursor = self.conn.execute(f"""
+            SELECT {columns}, pow(2.0, n.rank_key - ?) AS score
+            FROM (
+                SELECT id FROM news_items
+                WHERE sent = 0
+                ORDER BY rank_key DESC
+                LIMIT ?
+            ) AS top
+            JOIN news_items AS n ON n.id = top.id
+            ORDER BY n.rank_key DESC
+        """, (now_key, limit))
         
-        return [NewsItem(**dict(row)) for row in cursor.fetchall()]
+        return _to_items(cursor)
+    
+    def get_content(self, ids: List[int]) -> dict:
+        """Отримати розпаковані тексти новин: {id: content}"""
+        contents: dict = {}
+        for chunk in _chunks(list(ids)):
+            placeholders = ", ".join("?" * len(chunk))
+            cursor = self.conn.execute(
+                f"SELECT news_id, body FROM news_content WHERE news_id IN ({placeholders})", chunk
+            )
+            contents.update((row['news_id'], decompress_text(row['body'])) for row in cursor)
+        return contents
+    
+    def load_content(self, items: List[NewsItem]) -> List[NewsItem]:
+        """Підвантажити content для новин, прочитаних без тексту"""
+        contents = self.get_content([item.id for item in items if item.id is not None])
+        for item in items:
+            item.content = contents.get(item.id, item.content)
+        return items
+    
+    def get_news_by_ids(self, ids: List[int]) -> List[NewsItem]:
+        """Получить новости по id, сохраняя порядок ids"""
+        if not ids:
+            return []
+        placeholders = ", ".join("?" * len(ids))
+        cursor = self.conn.execute(
+            f"{_SELECT_NEWS} WHERE id IN ({placeholders})", list(ids)
+        )
+        by_id = {item.id: item for item in _to_items(cursor)}
+        return [by_id[news_id] for news_id in ids if news_id in by_id]
+    
+    def get_digest_candidates(self) -> List[dict]:
+        """Отримати збережених кандидатів у дайджест"""
+        cursor = self.conn.execute(
+            "SELECT news_id, source_id, title, rank_key, fragment FROM digest_candidates"
+        )
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def replace_digest_candidate(self, candidate: dict, evicted_id: Optional[int] = None):
+        """Додати кандидата у дайджест і, за потреби, витіснити іншого"""
+        with self.transaction():
+            if evicted_id is not None:
+                self.conn.execute("DELETE FROM digest_candidates WHERE news_id = ?", (evicted_id,))
+            self.conn.execute("""
+                INSERT OR REPLACE INTO digest_candidates (news_id, source_id, title, rank_key, fragment)
+                VALUES (:news_id, :source_id, :title, :rank_key, :fragment)
+            """, {"fragment": None, **candidate})
+    
+    def delete_digest_candidates(self, ids: List[int]):
+        """Прибрати кандидатів з дайджесту"""
+        with self.transaction():
+            self.conn.executemany(
+                "DELETE FROM digest_candidates WHERE news_id = ?", [(news_id,) for news_id in ids]
+            )
     
     def mark_as_sent(self, url: str):
         """Отметить новость как отправленную"""
-        with self.conn:
+        with self.transaction():
             self.conn.execute(
-                "UPDATE news_items SET sent = 1 WHERE url = ?",
-                (url,)
+                "UPDATE news_items SET sent = 1 WHERE url_key = ?",
+                (url_key(url),)
+            )
+    
+    def mark_many_as_sent(self, ids: List[int]) -> int:
+        """Отметить новости как отправленные одним UPDATE на пачку id"""
+        updated = 0
+        with self.transaction():
+            for chunk in _chunks(list(ids)):
+                placeholders = ", ".join("?" * len(chunk))
+                cursor = self.conn.execute(
+                    f"UPDATE news_items SET sent = 1 WHERE id IN ({placeholders}) AND sent = 0",
+                    chunk
+                )
+                updated += cursor.rowcount
+        return updated
+    
+    def enqueue_deliveries(self, news_ids: List[int], kind: str, now: Optional[datetime] = None,
+                           delay: float = 0, channel: str = DEFAULT_CHANNEL) -> int:
+        """Поставити новини в outbox для каналу; повтор (news_id, kind, channel) ігнорується.
+
+        delay відкладає першу спробу — за цей час воркер може склеїти кілька записів в один пост.
+        """
+        now = now or datetime.now()
+        due = now + timedelta(seconds=delay)
+        with self.transaction():
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO outbox (news_id, kind, channel, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(news_id, kind, channel, now, due) for news_id in news_ids]
             )
+        return cursor.rowcount
+    
+    def claim_deliveries(self, limit: int, lease_until: datetime, now: Optional[datetime] = None,
+                         kind: Optional[str] = None) -> List[dict]:
+        """Забрати до limit записів outbox (лише kind, якщо задано), час яких настав.
+
+        Записи не видаляються, а відкладаються до lease_until: якщо воркер
+        впаде до ack_deliveries, вони будуть видані повторно (at-least-once).
+        """
+        now = now or datetime.now()
+        kind_filter = "AND kind = ?" if kind is not None else ""
+        params = (now, kind, limit) if kind is not None else (now, limit)
+        with self.transaction():
+            rows = self.conn.execute(f"""
+                SELECT id, news_id, kind, channel, attempts, created_at FROM outbox
+                WHERE sent_at IS NULL AND next_attempt_at <= ? {kind_filter}
+                ORDER BY next_attempt_at
+                LIMIT ?
+            """, params).fetchall()
+            self.conn.executemany(
+                "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                [(lease_until, row['id']) for row in rows]
+            )
+        return [{**row, "created_at": datetime.fromisoformat(row["created_at"])} for row in map(dict, rows)]
+    
+    def ack_deliveries(self, ids: List[int], sent_at: Optional[datetime] = None) -> int:
+        """Підтвердити доставку пачки записів.
+
+        Стан доставки лишається в outbox: news_items.sent означає «вже був у
+        дайджесті», і breaking news не повинні витісняти новини з дайджесту.
+        """
+        sent_at = sent_at or datetime.now()
+        acked = 0
+        with self.transaction():
+            for chunk in _chunks(list(ids)):
+                placeholders = ", ".join("?" * len(chunk))
+                cursor = self.conn.execute(
+                    f"UPDATE outbox SET sent_at = ? WHERE id IN ({placeholders}) AND sent_at IS NULL",
+                    [sent_at, *chunk]
+                )
+                acked += cursor.rowcount
+        return acked
+    
+    def fail_deliveries(self, failures: List[tuple]):
+        """Записати невдалі спроби: (id, next_attempt_at або None — здатися, error)"""
+        with self.transaction():
+            self.conn.executemany("""
+                UPDATE outbox
+                SET attempts = attempts + 1, next_attempt_at = ?, last_error = ?
+                WHERE id = ?
+            """, [(next_attempt_at, error, outbox_id) for outbox_id, next_attempt_at, error in failures])
+    
+    def get_delivery_stats(self, since: datetime, now: Optional[datetime] = None) -> dict:
+        """Стан outbox: черга, вичерпані спроби і затримка доставки (секунди) з since"""
+        now = now or datetime.now()
+        pending = self.conn.execute("""
+            SELECT COUNT(*) AS pending, MIN(created_at) AS oldest
+            FROM outbox WHERE sent_at IS NULL AND next_attempt_at IS NOT NULL
+        """).fetchone()
+        failed = self.conn.execute(
+            "SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL AND next_attempt_at IS NULL"
+        ).fetchone()[0]
+        delivered = self.conn.execute("""
+            SELECT COUNT(*) AS delivered,
+                   AVG((julianday(sent_at) - julianday(created_at)) * 86400) AS avg_lag,
+                   MAX((julianday(sent_at) - julianday(created_at)) * 86400) AS max_lag
+            FROM outbox WHERE sent_at >= ?
+        """, (since,)).fetchone()
+        oldest = _parse_datetime(pending['oldest'])
+        return {
+            'pending': pending['pending'],
+            'failed': failed,
+            'oldest_pending_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+            'delivered': delivered['delivered'],
+            'avg_lag_seconds': delivered['avg_lag'] or 0.0,
+            'max_lag_seconds': delivered['max_lag'] or 0.0,
+        }
     
     def get_last_news(self) -> Optional[NewsItem]:
         """Получить последнюю новость (по дате публикации)"""
         cursor = self.conn.execute(
-            "SELECT * FROM news_items ORDER BY published DESC LIMIT 1"
+            f"{_SELECT_NEWS} ORDER BY published DESC LIMIT 1"
         )
         row = cursor.fetchone()
-        return NewsItem(**dict(row)) if row else None
+        return _to_item(row) if row else None
     
     def get_recent_news(self, minutes: int = 60) -> list[NewsItem]:
         """Получить новости за последние N минут"""
         cutoff_time = datetime.now() - timedelta(minutes=minutes)
-        cursor = self.conn.execute("""
-            SELECT * FROM news_items 
+        cursor = self.conn.execute(f"""
+            {_SELECT_NEWS}
             WHERE published >= ?
         """, (cutoff_time,))
         
-        return [NewsItem(**dict(row)) for row in cursor.fetchall()]
+        return _to_items(cursor)
+    
+    def get_news_after(self, after_id: int, limit: int = 1000) -> List[NewsItem]:
+        """Новини з id > after_id по зростанню id — для інкрементального експорту"""
+        cursor = self.conn.execute(
+            f"{_SELECT_NEWS} WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+        )
+        return _to_items(cursor)
+    
+    def search_news(self, query: str, limit: int = 10, offset: int = 0) -> List[NewsItem]:
+        """Повнотекстовий пошук (FTS5), від найрелевантніших за BM25"""
+        match = build_match_query(query)
+        if not match:
+            return []
+        columns = ", ".join(f"n.{name}" for name in NEWS_COLUMNS)
+        weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+        cursor = self.conn.execute(f"""
+            SELECT {columns}
+            FROM news_fts
+            JOIN news_items AS n ON n.id = news_fts.rowid
+            WHERE news_fts MATCH ?
+            ORDER BY bm25(news_fts, {weights})
+            LIMIT ? OFFSET ?
+        """, (match, limit, offset))
+        return _to_items(cursor)
+    
+    def get_recent_titles(self, minutes: int = 60) -> List[str]:
+        """Заголовки за последние N минут — всё, что нужно для дедупликации"""
+        cutoff_time = datetime.now() - timedelta(minutes=minutes)
+        cursor = self.conn.execute(
+            "SELECT title FROM news_items WHERE published >= ?", (cutoff_time,)
+        )
+        return [row['title'] for row in cursor.fetchall()]
     
     def get_stats_since(self, since: datetime) -> dict:
-        """Отримати статистику з певного моменту"""
+        """Отримати статистику з певного моменту з погодинних агрегатів.
+
+        Точність — година: бакет, у який потрапляє since, враховується цілком.
+        Агрегати переживають архівацію, тож довгі періоди коштують стільки ж.
+        """
         cursor = self.conn.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN impact >= 4 THEN 1 ELSE 0 END) as breaking,
-                AVG(impact) as avg_impact
-            FROM news_items 
-            WHERE published >= ?
-        """, (since,))
+            SELECT source_id,
+                   SUM(total) AS total,
+                   SUM(breaking) AS breaking,
+                   SUM(impact_sum) AS impact_sum,
+                   SUM(cost_usd) AS cost_usd
+            FROM news_rollup_hourly
+            WHERE bucket >= ?
+            GROUP BY source_id
+        """, (_hour_bucket(since),))
         
-        row = cursor.fetchone()
+        by_source = {}
+        for row in cursor.fetchall():
+            by_source[row['source_id']] = {
+                'total': row['total'],
+                'breaking': row['breaking'],
+                'avg_impact': row['impact_sum'] / row['total'] if row['total'] else 0,
+                'cost_usd': row['cost_usd']
+            }
+        total = sum(stats['total'] for stats in by_source.values())
+        impact_sum = sum(stats['avg_impact'] * stats['total'] for stats in by_source.values())
         return {
-            'total': row['total'] or 0,
-            'breaking': row['breaking'] or 0,
-            'avg_impact': row['avg_impact'] or 0
+            'total': total,
+            'breaking': sum(stats['breaking'] for stats in by_source.values()),
+            'avg_impact': impact_sum / total if total else 0,
+            'cost_usd': sum(stats['cost_usd'] for stats in by_source.values()),
+            'by_source': by_source
         }
     
     def toggle_source(self, source_id: str) -> bool:
         """Увімкнути/вимкнути джерело"""
         try:
-            with self.conn:
+            with self.transaction():
                 cursor = self.conn.execute(
                     "SELECT active FROM sources WHERE id = ?",
                     (source_id,)
@@ -145,9 +630,9 @@ class Database:
             logger.error("error_toggling_source", error=str(e), source_id=source_id)
             return False
     
-    def update_source_headers(self, source_id: str, etag: str = None, last_modified: str = None):
+    def update_source_headers(self, source_id: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
         """Оновити etag/last_modified для джерела"""
-        with self.conn:
+        with self.transaction():
             if etag is not None and last_modified is not None:
                 self.conn.execute(
                     "UPDATE sources SET etag = ?, last_modified = ? WHERE id = ?",
@@ -175,6 +660,4 @@ class Database:
     
     def close(self):
         """Закрыть соединение с БД"""
-        self.conn.close()
-
-db = Database() 
\ No newline at end of file
+        self.conn.close() 
\ No newline at end of file
@@ -0,0 +1,175 @@
+import asyncio
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Awaitable, Callable, Dict, List, Optional
+import structlog
+from app.config import settings
+from app.metrics import DELIVERY_ITEMS, DELIVERY_LAG, DELIVERY_POSTS, OTHER, PIPELINE_STAGE
+from app.models import NewsItem
+from app.routing import DEFAULT_CHANNEL
+
+logger = structlog.get_logger()
+
+# Відправник отримує новину (або склеєну групу) та id каналу з outbox
+Sender = Callable[[NewsItem, str], Awaitable[None]]
+GroupSender = Callable[[List[NewsItem], str], Awaitable[None]]
+
+# Види записів outbox: breaking news склеюються у вікні, термінові йдуть окремо одразу
+BREAKING_KIND = "breaking"
+URGENT_KIND = "urgent"
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Експоненційна затримка перед наступною спробою (attempts — уже зроблені)"""
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+class DeliveryWorker:
+    """Розбирає outbox і відправляє повідомлення з гарантією at-least-once.
+
+    Записи забираються пачкою з орендою (lease): поки воркер відправляє,
+    інші їх не бачать, а якщо процес впаде — після закінчення оренди вони
+    будуть видані знову. Успішні відправки підтверджуються одним записом
+    на пачку, невдалі відкладаються з експоненційною затримкою.
+
+    Для видів із group_senders записи склеюються: коли настає час першого
+    з них, воркер забирає й решту записів цього виду, що чекають у вікні
+    coalesce_seconds, і відправляє їх одним постом (не більше
+    BREAKING_MAX_PER_POST новин). Записи інших видів (зокрема URGENT_KIND)
+    йдуть окремим постом через senders.
+    """
+
+    def __init__(self, storage, senders: Dict[str, Sender], group_senders: Optional[Dict[str, GroupSender]] = None,
+                 batch_size: Optional[int] = None, poll_interval: Optional[float] = None,
+                 coalesce_seconds: Optional[float] = None):
+        self.storage = storage
+        self.senders = senders
+        self.group_senders = group_senders or {}
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.OUTBOX_POLL_SECONDS
+        self.coalesce_seconds = settings.BREAKING_COALESCE_SECONDS if coalesce_seconds is None else coalesce_seconds
+        self.max_per_post = settings.BREAKING_MAX_PER_POST
+        self.stats = {"items": 0, "posts": 0}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        """Розбудити воркер, не чекаючи наступного опитування"""
+        self._wakeup.set()
+
+    async def _load(self, entries: List[dict]) -> Dict[int, NewsItem]:
+        items = await self.storage.get_news_by_ids(list({entry["news_id"] for entry in entries}))
+        return {item.id: item for item in items}
+
+    def _groupable(self, entry: dict, news: Dict[int, NewsItem]) -> bool:
+        return entry["kind"] in self.group_senders and entry["news_id"] in news
+
+    async def run_once(self, now: Optional[datetime] = None) -> int:
+        """Обробити одну пачку; повертає кількість опрацьованих записів"""
+        now = now or datetime.now()
+        lease_until = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+        claimed = await self.storage.claim_deliveries(self.batch_size, lease_until=lease_until, now=now)
+        if not claimed:
+            return 0
+        news = await self._load(claimed)
+        # Записи, що ще чекають у вікні склейки, їдуть разом із тим, чий час настав
+        for kind in sorted({entry["kind"] for entry in claimed if self._groupable(entry, news)}):
+            waiting = await self.storage.claim_deliveries(
+                self.batch_size, lease_until=lease_until,
+                now=now + timedelta(seconds=self.coalesce_seconds), kind=kind
+            )
+            news.update(await self._load(waiting))
+            claimed.extend(waiting)
+
+        delivered: List[int] = []
+        failures: List[tuple] = []
+        sends = []
+        groups: Dict[tuple, List[dict]] = {}
+        for entry in claimed:
+            channel = entry.get("channel", DEFAULT_CHANNEL)
+            if self._groupable(entry, news):
+                groups.setdefault((entry["kind"], channel), []).append(entry)
+                continue
+            item = news.get(entry["news_id"])
+            sender = self.senders.get(entry["kind"])
+            send: Optional[Callable[[], Awaitable[None]]] = None
+            if item is not None and sender is not None:
+                send = partial(sender, item, channel)
+            source = item.source_id if item is not None else OTHER
+            sends.append(self._deliver([entry], send, now, delivered, failures, source))
+        for (kind, channel), entries in groups.items():
+            group_sender = self.group_senders[kind]
+            for start in range(0, len(entries), self.max_per_post):
+                chunk = entries[start:start + self.max_per_post]
+                items = [news[entry["news_id"]] for entry in chunk]
+                sources = {item.source_id for item in items}
+                sends.append(self._deliver(
+                    chunk, partial(group_sender, items, channel),
+                    now, delivered, failures, sources.pop() if len(sources) == 1 else OTHER
+                ))
+        # Відправки в різні канали йдуть паралельно; ліміти Telegram тримає черга відправки
+        await asyncio.gather(*sends)
+        if delivered:
+            await self.storage.ack_deliveries(delivered)
+        if failures:
+            await self.storage.fail_deliveries(failures)
+        logger.info("delivery_batch", delivered=len(delivered), failed=len(failures))
+        return len(claimed)
+
+    async def _deliver(self, entries: List[dict], send: Optional[Callable[[], Awaitable[None]]],
+                       now: datetime, delivered: List[int], failures: List[tuple], source: str = OTHER):
+        """Одна відправка (пост) для entries; результат дописується в delivered/failures"""
+        try:
+            if send is None:
+                raise LookupError(f"nothing to deliver for {entries[0]['kind']}:{entries[0]['news_id']}")
+            with PIPELINE_STAGE.time("deliver", source):
+                await send()
+        except Exception as e:
+            for entry in entries:
+                attempts = entry["attempts"] + 1
+                give_up = attempts >= settings.OUTBOX_MAX_ATTEMPTS or send is None
+                failures.append((entry["id"], None if give_up else now + retry_delay(attempts), str(e)))
+                logger.warning("delivery_failed", outbox_id=entry["id"], attempts=attempts,
+                               gave_up=give_up, error=str(e))
+        else:
+            delivered.extend(entry["id"] for entry in entries)
+            kind = entries[0]["kind"]
+            channel = entries[0].get("channel", DEFAULT_CHANNEL)
+            self.stats["posts"] += 1
+            self.stats["items"] += len(entries)
+            DELIVERY_POSTS.labels(kind=kind, channel=channel).inc()
+            DELIVERY_ITEMS.labels(kind=kind, channel=channel).inc(len(entries))
+            sent_at = datetime.now()
+            for entry in entries:
+                if entry.get("created_at") is not None:
+                    DELIVERY_LAG.labels(channel=channel).observe((sent_at - entry["created_at"]).total_seconds())
+
+    async def run(self):
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error("delivery_worker_error", error=str(e))
+                processed = 0
+            # Повна пачка — у черзі, мабуть, є ще; інакше чекаємо сигналу або таймауту
+            if processed < self.batch_size:
+                try:
+                    async with asyncio.timeout(self.poll_interval):
+                        await self._wakeup.wait()
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,155 @@
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+import structlog
+from app.config import settings
+from app.models import NewsItem
+from app.render import render_digest_fragment
+
+logger = structlog.get_logger()
+
+
+@dataclass(order=True)
+class DigestCandidate:
+    """Кандидат у дайджест: достатньо даних для ранжування та превʼю"""
+    rank_key: float
+    news_id: int = field(compare=False)
+    source_id: str = field(compare=False)
+    title: str = field(compare=False, default="")
+    # HTML-фрагмент для дайджесту, рендериться один раз при відборі
+    fragment: Optional[str] = field(compare=False, default=None)
+
+
+class DigestAccumulator:
+    """Інкрементально підтримуваний top-K кандидатів у дайджест.
+
+    Тримає не більше `capacity` найкращих за rank_key новин і не більше
+    `max_per_source` з одного джерела. rank_key не залежить від поточного часу,
+    тож відібраний набір лишається коректним протягом усього дня. Стан
+    дублюється в таблицю digest_candidates і відновлюється після рестарту.
+    """
+
+    def __init__(self, database=None, capacity: Optional[int] = None, max_per_source: Optional[int] = None, writer=None):
+        self.db = database
+        # Куди писати зміни; для deferred-записувача сховища запис не блокує event loop
+        self.writer = writer or database
+        self.capacity = capacity or settings.DIGEST_SIZE
+        self.max_per_source = max_per_source or settings.DIGEST_MAX_PER_SOURCE
+        self._live: Dict[int, DigestCandidate] = {}
+        self._heap: List[DigestCandidate] = []
+        self._by_source: Dict[str, List[DigestCandidate]] = {}
+        self._per_source: Dict[str, int] = {}
+        # Без синхронної БД стан відновлюють через load_async(storage)
+        if database is not None:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def load(self):
+        """Відновити стан з БД; якщо таблиця порожня — зібрати з неотправлених"""
+        rows = self.db.get_digest_candidates()
+        self.restore(rows, [] if rows else self.db.get_unsent_news(limit=self._restore_limit))
+
+    async def load_async(self, storage):
+        """load() для асинхронного сховища (AsyncDatabase, PostgresDatabase)"""
+        rows = await storage.get_digest_candidates()
+        self.restore(rows, [] if rows else await storage.get_unsent_news(limit=self._restore_limit))
+
+    @property
+    def _restore_limit(self) -> int:
+        return self.capacity * self.max_per_source
+
+    def restore(self, rows: List[dict], unsent: List[NewsItem]):
+        """Замінити стан збереженими кандидатами, а за їх відсутності — неотправленими новинами"""
+        self._live.clear()
+        self._heap.clear()
+        self._by_source.clear()
+        self._per_source.clear()
+        for row in rows:
+            self._insert(DigestCandidate(**row))
+        for item in unsent:
+            self.offer(item)
+
+    def offer(self, item: NewsItem) -> bool:
+        """Запропонувати збережену новину; True, якщо вона потрапила в top-K"""
+        if item.id is None or item.rank_key is None or item.id in self._live:
+            return False
+        candidate = DigestCandidate(item.rank_key, item.id, item.source_id, item.title)
+
+        evicted = None
+        group = self._group(candidate.source_id)
+        if self._per_source.get(candidate.source_id, 0) >= self.max_per_source:
+            if candidate <= group[0]:
+                return False
+            evicted = group[0]
+        elif len(self._live) >= self.capacity:
+            worst = self._peek_worst()
+            if candidate <= worst:
+                return False
+            evicted = worst
+
+        if evicted is not None:
+            self._remove(evicted.news_id)
+        candidate.fragment = render_digest_fragment(item)
+        self._insert(candidate)
+        self.writer.replace_digest_candidate(
+            candidate.__dict__, evicted.news_id if evicted is not None else None
+        )
+        return True
+
+    def top(self, limit: Optional[int] = None) -> List[DigestCandidate]:
+        """Кандидати від найкращого до найгіршого — O(K log K) без звернень до БД"""
+        return sorted(self._live.values(), reverse=True)[:limit or self.capacity]
+
+    def discard(self, news_ids: Iterable[int]):
+        """Прибрати кандидатів (наприклад, після відправки дайджесту)"""
+        removed = [news_id for news_id in news_ids if self._remove(news_id)]
+        if removed:
+            self.writer.delete_digest_candidates(removed)
+
+    def preview(self) -> str:
+        """Текстове превʼю майбутнього дайджесту"""
+        candidates = self.top()
+        if not candidates:
+            return "Кандидатів у дайджест поки немає"
+        lines = [f"{i}. {c.title} ({c.source_id})" for i, c in enumerate(candidates, 1)]
+        return "Дайджест зараз:\n\n" + "\n".join(lines)
+
+    def _is_live(self, candidate: DigestCandidate) -> bool:
+        return self._live.get(candidate.news_id) is candidate
+
+    def _group(self, source_id: str) -> List[DigestCandidate]:
+        group = self._by_source.setdefault(source_id, [])
+        while group and not self._is_live(group[0]):
+            heapq.heappop(group)
+        return group
+
+    def _peek_worst(self) -> DigestCandidate:
+        while not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def _insert(self, candidate: DigestCandidate):
+        self._live[candidate.news_id] = candidate
+        self._per_source[candidate.source_id] = self._per_source.get(candidate.source_id, 0) + 1
+        heapq.heappush(self._heap, candidate)
+        heapq.heappush(self._group(candidate.source_id), candidate)
+        if len(self._heap) > 4 * self.capacity:
+            self._compact()
+
+    def _remove(self, news_id: int) -> bool:
+        # Ліниве видалення: записи в купах відкидаються при наступному доступі
+        candidate = self._live.pop(news_id, None)
+        if candidate is None:
+            return False
+        self._per_source[candidate.source_id] -= 1
+        return True
+
+    def _compact(self):
+        """Прибрати з куп застарілі записи, щоб памʼять лишалась O(K)"""
+        self._heap = [c for c in self._heap if self._is_live(c)]
+        heapq.heapify(self._heap)
+        for source_id, group in self._by_source.items():
+            group[:] = [c for c in group if self._is_live(c)]
+            heapq.heapify(group)
@@ -0,0 +1,205 @@
+"""Експорт історії новин у Parquet для офлайн-аналітики.
+
+Новини вичитуються пачками за водяною позначкою (останній експортований id),
+тож у памʼяті ніколи не більше EXPORT_BATCH_SIZE рядків, а жива база не
+блокується довгими запитами. Файли розкладаються за місяцем публікації
+(Hive-розбиття), їх читають pyarrow, pandas, polars чи DuckDB:
+
+    python -m app.export              # дописати нові новини в EXPORT_DIR
+
+    from app.export import load_dataset
+    df = load_dataset().to_table().to_pandas()
+
+Рядок експортується один раз, тому колонка sent фіксує стан на момент
+експорту, а не поточний.
+
+Курсор за id надійний лише з одним записувачем (SQLite): id видаються й
+комітяться по порядку. У PostgreSQL паралельні транзакції комітять id із
+послідовності не по черзі, і рядок з меншим id може зʼявитися вже після
+того, як позначка пройшла повз нього. Тому для PostgreSQL пропущені id
+нижче позначки запамʼятовуються й перевіряються на наступних запусках
+протягом EXPORT_GAP_SECONDS (далі вважаються відкотами/дублікатами).
+"""
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+import structlog
+from app.config import settings
+from app.db import NEWS_COLUMNS
+from app.models import NewsItem
+from app.utils import naive_local
+
+try:
+    import pyarrow as pa  # type: ignore[import-untyped]
+    import pyarrow.dataset as ds  # type: ignore[import-untyped]
+    import pyarrow.parquet as pq  # type: ignore[import-untyped]
+except ImportError:  # потрібен лише для експорту
+    pa = ds = pq = None
+
+logger = structlog.get_logger()
+
+_WATERMARK_FILE = "_watermark.json"
+
+_TIMESTAMPS = ("published", "processed_at")
+
+# Скільки пропущених id тримати у водяній позначці (найновіші)
+_MAX_GAPS = 10000
+
+
+def export_schema() -> "pa.Schema":
+    """Схема файлів: колонки NEWS_COLUMNS, включно з ранжуванням і вартістю"""
+    types = {
+        "id": pa.int64(),
+        "published": pa.timestamp("us"),
+        "impact": pa.int8(),
+        "processed_at": pa.timestamp("us"),
+        "sent": pa.bool_(),
+        "cost_usd": pa.float64(),
+        "base_score": pa.float64(),
+        "rank_key": pa.float64(),
+    }
+    return pa.schema([pa.field(name, types.get(name, pa.string())) for name in NEWS_COLUMNS])
+
+
+def _read_state(export_dir: Path) -> dict:
+    path = export_dir / _WATERMARK_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def read_watermark(export_dir: Path) -> int:
+    return _read_state(export_dir).get("last_id", 0)
+
+
+def read_gaps(export_dir: Path) -> Dict[int, float]:
+    """Пропущені id нижче позначки: {id: коли помічено (unix time)}"""
+    return {int(id_): seen for id_, seen in _read_state(export_dir).get("gaps", {}).items()}
+
+
+def _write_watermark(export_dir: Path, last_id: int, gaps: Optional[Dict[int, float]] = None):
+    path = export_dir / _WATERMARK_FILE
+    tmp = path.with_suffix(".tmp")
+    state: dict = {"last_id": last_id}
+    if gaps:
+        state["gaps"] = {str(id_): seen for id_, seen in sorted(gaps.items())}
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+def _to_table(items: List[NewsItem], schema: "pa.Schema") -> "pa.Table":
+    columns = {}
+    for name in NEWS_COLUMNS:
+        values = [getattr(item, name) for item in items]
+        if name in _TIMESTAMPS:
+            values = [naive_local(value) for value in values]
+        columns[name] = values
+    return pa.Table.from_pydict(columns, schema=schema)
+
+
+def write_batch(items: List[NewsItem], export_dir: Path) -> List[Path]:
+    """Записати пачку (впорядковану за id) у файли month=YYYY-MM/part-<перший id>.parquet.
+
+    Файл спершу пишеться під тимчасовим імʼям, тож читачі не бачать
+    недописаних файлів. Якщо експорт впав до оновлення водяної позначки,
+    повторна пачка починається з того ж id і перезаписує ті самі файли.
+    """
+    schema = export_schema()
+    by_month: Dict[str, List[NewsItem]] = defaultdict(list)
+    for item in items:
+        by_month[item.published.strftime("%Y-%m")].append(item)
+    paths = []
+    for month, month_items in sorted(by_month.items()):
+        directory = export_dir / f"month={month}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{month_items[0].id:012d}.parquet"
+        tmp = path.with_name(f".{path.name}.tmp")
+        pq.write_table(_to_table(month_items, schema), tmp, compression="zstd")
+        os.replace(tmp, path)
+        paths.append(path)
+    return paths
+
+
+class NewsExporter:
+    """Інкрементальний експорт news_items у Parquet з будь-якого сховища (SQLite/PostgreSQL)"""
+
+    def __init__(self, storage, export_dir: Optional[Path] = None, batch_size: Optional[int] = None):
+        if pa is None:
+            raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+        self.storage = storage
+        self.export_dir = Path(export_dir or settings.EXPORT_DIR)
+        self.batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        # Пропуски в id відстежуються лише там, де записувачів кілька
+        self.track_gaps = getattr(storage, "backend", "sqlite") != "sqlite"
+
+    async def run(self) -> int:
+        """Дописати новини після водяної позначки; повертає кількість експортованих"""
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        last_id = read_watermark(self.export_dir)
+        gaps = read_gaps(self.export_dir) if self.track_gaps else {}
+        exported = 0
+        if gaps:
+            exported += await self._export_late(last_id, gaps)
+        while True:
+            items = await self.storage.get_news_after(last_id, self.batch_size)
+            if not items:
+                break
+            # Запис Parquet — CPU-робота, тримаємо її поза event loop
+            await asyncio.to_thread(write_batch, items, self.export_dir)
+            if self.track_gaps:
+                self._note_gaps(gaps, last_id, items)
+            last_id = items[-1].id
+            await asyncio.to_thread(_write_watermark, self.export_dir, last_id, gaps)
+            exported += len(items)
+            if len(items) < self.batch_size:
+                break
+        logger.info("export_done", exported=exported, last_id=last_id, pending_gaps=len(gaps))
+        return exported
+
+    async def _export_late(self, last_id: int, gaps: Dict[int, float]) -> int:
+        """Дописати рядки, що закомітились після того, як позначка їх пропустила"""
+        late = sorted(await self.storage.get_news_by_ids(sorted(gaps)), key=lambda item: item.id)
+        if late:
+            await asyncio.to_thread(write_batch, late, self.export_dir)
+        for item in late:
+            gaps.pop(item.id, None)
+        expired = time.time() - settings.EXPORT_GAP_SECONDS
+        for id_ in [id_ for id_, seen in gaps.items() if seen < expired]:
+            del gaps[id_]
+        await asyncio.to_thread(_write_watermark, self.export_dir, last_id, gaps)
+        return len(late)
+
+    @staticmethod
+    def _note_gaps(gaps: Dict[int, float], last_id: int, items: List[NewsItem]):
+        present = {item.id for item in items if item.id is not None}
+        newest = max(present)
+        now = time.time()
+        for id_ in range(max(last_id + 1, newest - _MAX_GAPS), newest):
+            if id_ not in present:
+                gaps[id_] = now
+        for id_ in sorted(gaps)[:-_MAX_GAPS]:
+            del gaps[id_]
+
+
+def load_dataset(export_dir: Optional[Path] = None) -> "ds.Dataset":
+    """Експортовані файли як один набір даних з колонкою-розбиттям month.
+
+    Службові файли (_watermark.json, .*.tmp) pyarrow пропускає за префіксом.
+    """
+    return ds.dataset(Path(export_dir or settings.EXPORT_DIR), format="parquet", partitioning="hive")
+
+
+if __name__ == "__main__":
+    from app.async_db import create_storage
+
+    async def _main():
+        storage = create_storage()
+        try:
+            count = await NewsExporter(storage).run()
+        finally:
+            await storage.aclose()
+        print(f"exported {count} news to {settings.EXPORT_DIR}")
+
+    asyncio.run(_main())
@@ -12,27 +12,30 @@ class APIFetcher(BaseFetcher):
     
     async def fetch(self) -> List[NewsItem]:
         try:
-            response = await self.client.get(self.source.url)
+            with self.timed("fetch"):
+                response = await self.client.get(self.source.url)
             response.raise_for_status()
-            data = response.json()
-            items = []
-            for entry in data.get('tools', []):
-                try:
-                    published = datetime.fromisoformat(entry.get('createdAt', datetime.now().isoformat()))
-                    content = clean_text(entry.get('description', ''))
-                    lang, prob = detect_language(content)
-                    news_item = self._create_news_item(
-                        url=entry.get('url', ''),
-                        title=entry.get('name', ''),
-                        content=content,
-                        published=published,
-                        lang=lang
-                    )
-                    items.append(news_item)
-                except Exception as e:
-                    self.logger.error("error_processing_api_entry", error=str(e), entry=entry)
-                    continue
+            with self.timed("parse"):
+                data = response.json()
+                items = []
+                for entry in data.get('tools', []):
+                    try:
+                        published = datetime.fromisoformat(entry.get('createdAt', datetime.now().isoformat()))
+                        content = clean_text(entry.get('description', ''))
+                        lang, prob = detect_language(content)
+                        news_item = self._create_news_item(
+                            url=entry.get('url', ''),
+                            title=entry.get('name', ''),
+                            content=content,
+                            published=published,
+                            lang=lang
+                        )
+                        items.append(news_item)
+                    except Exception as e:
+                        self.logger.error("error_processing_api_entry", error=str(e), entry=entry)
+                        continue
             return items
         except Exception as e:
             self.logger.error("error_fetching_api", error=str(e))
+            self.failed = True
             return [] 
\ No newline at end of file
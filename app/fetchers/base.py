@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 import httpx
 import structlog
+from app.metrics import PIPELINE_STAGE
 from app.models import NewsItem, Source
 
 logger = structlog.get_logger()
@@ -10,9 +11,14 @@ logger = structlog.get_logger()
 class BaseFetcher(ABC):
     """Базовый класс для всех фетчеров новостей"""
     
-    def __init__(self, source: Source):
+    def __init__(self, source: Source, client: Optional[httpx.AsyncClient] = None, storage=None):
         self.source = source
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # Спільний пул зʼєднань із контексту застосунку; власний клієнт — лише без нього
+        self._owns_client = client is None
+        self.client = client or httpx.AsyncClient(timeout=30.0)
+        self.storage = storage
+        # Помилки фетчу логуються й не піднімаються; прапорець відрізняє їх від порожньої стрічки
+        self.failed = False
         self.logger = logger.bind(source_id=source.id)
     
     @abstractmethod
@@ -20,9 +26,14 @@ class BaseFetcher(ABC):
         """Получить новости из источника"""
         pass
     
+    def timed(self, stage: str):
+        """Заміряти стадію (fetch, parse) цього джерела: with self.timed("fetch"): ..."""
+        return PIPELINE_STAGE.time(stage, self.source.id)
+    
     async def close(self):
-        """Закрыть HTTP клиент"""
-        await self.client.aclose()
+        """Закрыть HTTP клиент (общий пул закрывает владелец)"""
+        if self._owns_client:
+            await self.client.aclose()
     
     def _create_news_item(
         self,
@@ -13,31 +13,34 @@ class GitHubTrendingFetcher(BaseFetcher):
     
     async def fetch(self) -> List[NewsItem]:
         try:
-            response = await self.client.get(self.source.url)
+            with self.timed("fetch"):
+                response = await self.client.get(self.source.url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            items = []
-            for repo in soup.select('article.Box-row'):
-                try:
-                    title_tag = repo.select_one('h2 a')
-                    url = 'https://github.com' + title_tag['href'] if title_tag else ''
-                    title = title_tag.get_text(strip=True) if title_tag else ''
-                    desc_tag = repo.select_one('p')
-                    content = clean_text(desc_tag.get_text(strip=True) if desc_tag else '')
-                    lang, prob = detect_language(content)
-                    published = datetime.now()  # GitHub не дає точну дату, ставимо зараз
-                    news_item = self._create_news_item(
-                        url=url,
-                        title=title,
-                        content=content,
-                        published=published,
-                        lang=lang
-                    )
-                    items.append(news_item)
-                except Exception as e:
-                    self.logger.error("error_processing_github_entry", error=str(e))
-                    continue
+            with self.timed("parse"):
+                soup = BeautifulSoup(response.text, 'html.parser')
+                items = []
+                for repo in soup.select('article.Box-row'):
+                    try:
+                        title_tag = repo.select_one('h2 a')
+                        url = 'https://github.com' + title_tag['href'] if title_tag else ''
+                        title = title_tag.get_text(strip=True) if title_tag else ''
+                        desc_tag = repo.select_one('p')
+                        content = clean_text(desc_tag.get_text(strip=True) if desc_tag else '')
+                        lang, prob = detect_language(content)
+                        published = datetime.now()  # GitHub не дає точну дату, ставимо зараз
+                        news_item = self._create_news_item(
+                            url=url,
+                            title=title,
+                            content=content,
+                            published=published,
+                            lang=lang
+                        )
+                        items.append(news_item)
+                    except Exception as e:
+                        self.logger.error("error_processing_github_entry", error=str(e))
+                        continue
             return items
         except Exception as e:
             self.logger.error("error_fetching_github", error=str(e))
+            self.failed = True
             return [] 
\ No newline at end of file
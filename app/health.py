@@ -0,0 +1,129 @@
+"""Стан компонентів для /livez і /readyz.
+
+Перевірки (БД, задачі планувальника, останній успішний фетч кожного
+джерела, збої LLM) виконуються фоновою задачею раз на
+HEALTH_CHECK_INTERVAL секунд. Результат одразу серіалізується в JSON, тож
+обробник ендпоінта лише віддає готові байти і не торкається ні БД, ні
+планувальника.
+"""
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+import structlog
+from app.config import settings
+
+logger = structlog.get_logger()
+
+LIVE_BODY = b'{"status":"alive"}'
+
+
+class HealthMonitor:
+    """Знімок стану застосунку, який оновлюють фонові перевірки"""
+
+    def __init__(self, storage, scheduler=None, summarizer=None, interval: Optional[float] = None,
+                 clock=time.monotonic):
+        self.storage = storage
+        self.scheduler = scheduler
+        self.summarizer = summarizer
+        self.interval = interval or settings.HEALTH_CHECK_INTERVAL
+        self.clock = clock
+        self.ready = False
+        self.body = b'{"status":"starting"}'
+        self.components: dict = {}
+        self.checked_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        """Процес живий, поки фонові перевірки не зависли"""
+        return self.checked_at is None or self.clock() - self.checked_at < self.interval * 3
+
+    async def _check_db(self) -> dict:
+        started = self.clock()
+        try:
+            # asyncio.timeout, а не wait_for: у 3.11 wait_for може проковтнути cancel() з stop()
+            async with asyncio.timeout(settings.HEALTH_DB_TIMEOUT):
+                await self.storage.ping()
+        except Exception as e:
+            return {"ok": False, "backend": self.storage.backend, "error": str(e) or type(e).__name__}
+        return {"ok": True, "backend": self.storage.backend, "latency_ms": round((self.clock() - started) * 1000, 1)}
+
+    def _check_scheduler(self) -> dict:
+        if self.scheduler is None or not settings.RUN_SCHEDULER:
+            # Репліка без планувальника (webhook) готова й без нього
+            return {"ok": True, "enabled": False, "jobs": 0}
+        running = self.scheduler.scheduler.running
+        return {"ok": running, "enabled": True, "jobs": len(self.scheduler.scheduler.get_jobs()) if running else 0}
+
+    def _check_sources(self, now: datetime) -> dict:
+        if self.scheduler is None or self.scheduler.started_at is None:
+            return {}
+        status = {}
+        for source in self.scheduler.sources:
+            if not source.active:
+                continue
+            last = self.scheduler.last_fetch.get(source.id)
+            # Джерело «застаріло», якщо пропустило кілька інтервалів поспіль
+            deadline = (last or self.scheduler.started_at) + timedelta(
+                minutes=source.interval * settings.SOURCE_STALE_INTERVALS
+            )
+            status[source.id] = {
+                "ok": now <= deadline,
+                "last_success": last.isoformat(timespec="seconds") if last else None,
+            }
+        return status
+
+    def _check_llm(self) -> dict:
+        if self.summarizer is None:
+            return {}
+        return {
+            provider: {"ok": failures < settings.LLM_FAILURE_THRESHOLD, "consecutive_failures": failures}
+            for provider, failures in self.summarizer.failures.items()
+        }
+
+    async def check(self):
+        """Виконати всі перевірки й оновити знімок"""
+        now = datetime.now()
+        components = {
+            "db": await self._check_db(),
+            "scheduler": self._check_scheduler(),
+            "sources": self._check_sources(now),
+            "llm": self._check_llm(),
+        }
+        # Застарілі джерела й збої LLM — деградація, а не привід знімати репліку з балансувальника
+        ready = components["db"]["ok"] and components["scheduler"]["ok"]
+        degraded = not all(status["ok"] for group in ("sources", "llm") for status in components[group].values())
+        self.components = components
+        self.ready = ready
+        self.body = json.dumps({
+            "status": ("degraded" if degraded else "ready") if ready else "unavailable",
+            "version": settings.VERSION,
+            "checked_at": now.isoformat(timespec="seconds"),
+            "components": components,
+        }, separators=(",", ":")).encode()
+        self.checked_at = self.clock()
+        if not ready:
+            logger.warning("readiness_check_failed", db=components["db"], scheduler=components["scheduler"])
+
+    async def run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                logger.error("health_check_error", error=str(e))
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,202 @@
+"""Приймання новин від зовнішніх продюсерів (POST /api/news).
+
+Обробник лише валідує новину, відкидає вже відомі й ті, що вже в черзі, і
+кладе решту в обмежену asyncio.Queue — відповідь повертається одразу, з id
+(sha256 канонічного URL). Воркери забирають новини пачками й передають їх
+у той самий конвеєр, що й фетчери (NewsScheduler.process_items). Коли черга
+заповнена, запит відхиляється цілком (429), а не приймається частково.
+
+Черга живе в памʼяті процесу: новини, не оброблені до зупинки, втрачаються,
+і продюсер має надіслати їх знову.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import structlog
+from pydantic import ValidationError
+from app.config import settings
+from app.metrics import INGEST_ITEMS, INGEST_QUEUE_DEPTH
+from app.models import NewsIn, NewsItem
+from app.utils import canonicalize_url, naive_local, url_hash
+
+logger = structlog.get_logger()
+
+# source_id, пачка новин -> кількість записаних
+Process = Callable[[str, List[NewsItem]], Awaitable[int]]
+
+# Рядків NDJSON, що перевіряються в БД і ставляться в чергу за один раз
+BULK_CHUNK = 500
+
+
+class QueueFull(Exception):
+    """У черзі немає місця для всієї пачки"""
+
+
+def news_id(url: str) -> str:
+    """Стабільний id новини: той самий для різних форм одного URL"""
+    return url_hash(canonicalize_url(url))
+
+
+def to_item(news: NewsIn) -> NewsItem:
+    return NewsItem(**news.model_dump(exclude={"published"}), published=naive_local(news.published))
+
+
+class IngestQueue:
+    """Обмежена черга між API і конвеєром обробки"""
+
+    def __init__(self, storage, process: Process, maxsize: Optional[int] = None,
+                 workers: Optional[int] = None, batch_size: Optional[int] = None):
+        self.storage = storage
+        self.process = process
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize or settings.INGEST_QUEUE_SIZE)
+        self.workers = settings.INGEST_WORKERS if workers is None else workers
+        self.batch_size = batch_size or settings.BATCH_SIZE
+        # id новин у черзі й в обробці — повторна відправка до запису в БД теж дублікат
+        self.pending: set = set()
+        self._tasks: List[asyncio.Task] = []
+        INGEST_QUEUE_DEPTH.set_function(self.queue.qsize)
+
+    @property
+    def free(self) -> int:
+        return self.queue.maxsize - self.queue.qsize()
+
+    async def submit(self, items: List[NewsItem]) -> Tuple[List[str], List[str]]:
+        """Поставити новини в чергу; повертає (id прийнятих, id дублікатів).
+
+        Якщо всі нові не вміщаються, не ставить жодної і кидає QueueFull.
+        """
+        ids = [news_id(item.url) for item in items]
+        known = await self.storage.get_known_urls([item.url for item in items])
+        accepted, duplicates, batch = [], [], []
+        seen = set()
+        for item, id_ in zip(items, ids):
+            if item.url in known or id_ in self.pending or id_ in seen:
+                duplicates.append(id_)
+                continue
+            seen.add(id_)
+            accepted.append(id_)
+            batch.append((id_, item))
+        INGEST_ITEMS.labels(status="duplicate").inc(len(duplicates))
+        # Між перевіркою місця і put_nowait немає await, тож місце ніхто не займе
+        if len(batch) > self.free:
+            INGEST_ITEMS.labels(status="rejected").inc(len(batch))
+            raise QueueFull(f"ingest queue is full ({self.queue.qsize()}/{self.queue.maxsize})")
+        for entry in batch:
+            self.queue.put_nowait(entry)
+        self.pending.update(accepted)
+        INGEST_ITEMS.labels(status="accepted").inc(len(accepted))
+        return accepted, duplicates
+
+    async def _next_batch(self) -> List[Tuple[str, NewsItem]]:
+        batch = [await self.queue.get()]
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def run_once(self) -> int:
+        """Обробити одну пачку з черги (чекає, поки в черзі щось зʼявиться)"""
+        batch = await self._next_batch()
+        try:
+            # Конвеєр рахує метрики й ранжує по джерелу, тож пачка ділиться за source_id
+            groups: Dict[str, List[NewsItem]] = OrderedDict()
+            for _, item in batch:
+                groups.setdefault(item.source_id, []).append(item)
+            stored = 0
+            for source_id, items in groups.items():
+                try:
+                    stored += await self.process(source_id, items)
+                except Exception as e:
+                    logger.error("ingest_batch_failed", source_id=source_id, items=len(items), error=str(e))
+            return stored
+        finally:
+            for id_, _ in batch:
+                self.pending.discard(id_)
+                self.queue.task_done()
+
+    async def run(self):
+        while True:
+            await self.run_once()
+
+    def start(self):
+        self._tasks = [task for task in self._tasks if not task.done()]
+        loop = asyncio.get_running_loop()
+        while len(self._tasks) < self.workers:
+            self._tasks.append(loop.create_task(self.run()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if not self.queue.empty():
+            logger.warning("ingest_queue_dropped", items=self.queue.qsize())
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    yield buffer
+
+
+def _error(e: ValidationError) -> str:
+    error = e.errors(include_url=False)[0]
+    return f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" if error["loc"] else error["msg"]
+
+
+async def ingest_ndjson(queue: IngestQueue, chunks: AsyncIterator[bytes],
+                        max_items: Optional[int] = None) -> Tuple[int, dict]:
+    """Прийняти потік NDJSON (одна новина на рядок); повертає (HTTP-статус, тіло відповіді).
+
+    Рядки читаються й ставляться в чергу частинами по BULK_CHUNK, тож великий
+    запит не тримається в памʼяті цілком. Невалідні рядки пропускаються й
+    перелічуються у відповіді. Якщо черга заповнилася, обробка зупиняється
+    (429), а resume_from_line вказує, з якого рядка повторити запит.
+    """
+    max_items = max_items or settings.INGEST_BULK_MAX_ITEMS
+    body: Dict[str, Any] = {"accepted": 0, "duplicates": 0, "ids": [], "invalid": []}
+    chunk: List[Tuple[int, NewsItem]] = []
+    count = 0
+
+    async def flush() -> bool:
+        if not chunk:
+            return True
+        try:
+            accepted, duplicates = await queue.submit([item for _, item in chunk])
+        except QueueFull:
+            body["resume_from_line"] = chunk[0][0]
+            return False
+        body["accepted"] += len(accepted)
+        body["duplicates"] += len(duplicates)
+        body["ids"].extend(accepted)
+        chunk.clear()
+        return True
+
+    status = 202
+    line_no = 0
+    async for line in _lines(chunks):
+        line_no += 1
+        if not line.strip():
+            continue
+        count += 1
+        if count > max_items:
+            status = 413
+            body["error"] = f"more than {max_items} items in one request"
+            body["resume_from_line"] = chunk[0][0] if chunk else line_no
+            break
+        try:
+            chunk.append((line_no, to_item(NewsIn.model_validate_json(line))))
+        except ValidationError as e:
+            body["invalid"].append({"line": line_no, "error": _error(e)})
+            continue
+        if len(chunk) >= BULK_CHUNK and not await flush():
+            status = 429
+            break
+    else:
+        if not await flush():
+            status = 429
+    INGEST_ITEMS.labels(status="invalid").inc(len(body["invalid"]))
+    return status, body
@@ -1,16 +1,50 @@
-import asyncio
+import hmac
+from contextlib import asynccontextmanager
+from typing import Optional
 import structlog
 import sentry_sdk
-from fastapi import FastAPI, Response
+import uvicorn
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
-from app.bot import start_bot
-from app.scheduler import NewsScheduler
+from starlette.requests import ClientDisconnect
 from app.config import settings
+from app.context import AppContext
+from app.health import LIVE_BODY
+from app.ingest import QueueFull, ingest_ndjson, news_id, to_item
+from app.metrics import MetricsMiddleware
+from app.models import NewsIn
 
 logger = structlog.get_logger()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Єдиний контекст застосунку на весь час роботи процесу"""
+    context = AppContext()
+    await context.start()
+    app.state.context = context
+    try:
+        yield
+    finally:
+        await context.stop()
+
+
+def get_context(request: Request) -> AppContext:
+    return request.app.state.context
+
+
+def check_api_key(x_api_key: Optional[str] = Header(None)):
+    """Якщо задано INGEST_API_KEY, продюсер передає його в X-API-Key"""
+    expected = settings.INGEST_API_KEY
+    if expected and (x_api_key is None or not hmac.compare_digest(x_api_key.encode(), expected.encode())):
+        raise HTTPException(status_code=401)
+
+
 # Инициализация FastAPI
-app = FastAPI(title="AI News Bot API")
+app = FastAPI(title="AI News Bot API", lifespan=lifespan)
+if settings.ENABLE_METRICS:
+    app.add_middleware(MetricsMiddleware)
 
 # Инициализация Sentry
 sentry_sdk.init(
@@ -19,37 +53,111 @@ sentry_sdk.init(
     profiles_sample_rate=1.0,
 )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Експозиція метрик Prometheus (формат text 0.0.4)"""
+    if not settings.ENABLE_METRICS:
+        return Response(status_code=404)
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/livez")
+async def livez(context: AppContext = Depends(get_context)):
+    """Liveness: процес відповідає і фонові перевірки не зависли"""
+    if not context.health.alive:
+        return Response(status_code=503)
+    return Response(content=LIVE_BODY, media_type="application/json")
+
+@app.get("/readyz")
+async def readyz(context: AppContext = Depends(get_context)):
+    """Readiness: готовий знімок стану компонентів, без звернень до БД"""
+    health = context.health
+    return Response(content=health.body, status_code=200 if health.ready else 503, media_type="application/json")
+
 @app.get("/healthz")
-async def healthz():
-    """Health check endpoint"""
-    try:
-        # Проверяем подключение к БД
-        from app.db import db
-        db.conn.execute("SELECT 1")
-        
-        # Проверяем статус планировщика
-        scheduler = NewsScheduler()
-        jobs = scheduler.scheduler.get_jobs()
-        
-        return JSONResponse({
-            "status": "healthy",
-            "scheduler_jobs": len(jobs),
-            "version": settings.VERSION
-        })
-    except Exception as e:
-        logger.error("health_check_failed", error=str(e))
+async def healthz(context: AppContext = Depends(get_context)):
+    """Health check endpoint (сумісність; дані з того ж знімка, що й /readyz)"""
+    health = context.health
+    if not health.ready:
         return Response(status_code=500)
+    return JSONResponse({
+        "status": "healthy",
+        "scheduler_jobs": health.components["scheduler"]["jobs"],
+        "version": settings.VERSION
+    })
+
+@app.post(settings.WEBHOOK_PATH, include_in_schema=False)
+async def telegram_webhook(request: Request, context: AppContext = Depends(get_context)):
+    """Оновлення від Telegram у режимі webhook.
+
+    Відповідаємо одразу, а оновлення обробляється у фоні: повільна команда
+    не затримує наступні, і Telegram не повторює запит через таймаут.
+    """
+    if not context.webhook_mode:
+        return Response(status_code=404)
+    if not context.bot.check_webhook_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token")):
+        return Response(status_code=401)
+    try:
+        context.bot.feed_update(await request.json())
+    except ValueError as e:
+        # pydantic.ValidationError і JSONDecodeError — обидва ValueError
+        logger.warning("webhook_bad_update", error=str(e))
+        return Response(status_code=400)
+    return Response(status_code=200)
+
+@app.get("/api/search")
+async def search(
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    context: AppContext = Depends(get_context)
+):
+    """Повнотекстовий пошук по новинах (BM25) з пагінацією"""
+    items = await context.storage.search_news(q, limit=per_page + 1, offset=(page - 1) * per_page)
+    return {
+        "query": q,
+        "page": page,
+        "per_page": per_page,
+        "has_more": len(items) > per_page,
+        "items": [
+            item.model_dump(mode="json", include={
+                "id", "url", "title", "source_id", "published", "impact", "summary", "why_matters"
+            })
+            for item in items[:per_page]
+        ]
+    }
+
+@app.post("/api/news", status_code=202, dependencies=[Depends(check_api_key)])
+async def ingest_news(news: NewsIn, context: AppContext = Depends(get_context)):
+    """Прийняти новину в конвеєр обробки; відповідь — одразу після постановки в чергу"""
+    try:
+        accepted, _ = await context.ingest.submit([to_item(news)])
+    except QueueFull:
+        return JSONResponse({"id": news_id(news.url), "status": "rejected"}, status_code=429,
+                            headers={"Retry-After": str(settings.INGEST_RETRY_AFTER)})
+    if not accepted:
+        return JSONResponse({"id": news_id(news.url), "status": "duplicate"}, status_code=409)
+    return {"id": accepted[0], "status": "queued"}
+
+@app.post("/api/news/bulk", dependencies=[Depends(check_api_key)])
+async def ingest_news_bulk(request: Request, context: AppContext = Depends(get_context)):
+    """Пакетне приймання: тіло — NDJSON (application/x-ndjson), одна новина на рядок.
+
+    Тіло читається потоком; 202 — усі валідні рядки в черзі, 429 — черга
+    заповнилася і запит треба повторити з рядка resume_from_line.
+    """
+    try:
+        status, body = await ingest_ndjson(context.ingest, request.stream())
+    except ClientDisconnect:
+        # Уже поставлені в чергу частини лишаються в ній; продюсер повторить запит, дублікати відсіються
+        logger.warning("ingest_client_disconnected")
+        return Response(status_code=400)
+    headers = {"Retry-After": str(settings.INGEST_RETRY_AFTER)} if status == 429 else None
+    return JSONResponse(body, status_code=status, headers=headers)
 
-async def main():
-    """Основная функция запуска приложения"""
+def main():
+    """Основная функция запуска приложения: API, планировщик и бот в одном процессе"""
     try:
-        # Инициализируем планировщик
-        scheduler = NewsScheduler()
-        scheduler.start()
-        
-        # Запускаем бота
-        await start_bot()
-        
+        uvicorn.run(app, host=settings.API_HOST, port=settings.API_PORT)
     except Exception as e:
         logger.error("error_starting_app", error=str(e))
         raise
@@ -64,4 +172,4 @@ if __name__ == "__main__":
     )
     
     # Запускаем приложение
-    asyncio.run(main()) 
\ No newline at end of file
+    main()
@@ -0,0 +1,350 @@
+import sqlite3
+from typing import Callable, List, NamedTuple
+import structlog
+from app.ranker import SCORE_HALF_LIFE_HOURS
+from app.utils import compress_text, url_key
+
+logger = structlog.get_logger()
+
+
+class Migration(NamedTuple):
+    """Крок міграції схеми; номер версії зберігається в PRAGMA user_version"""
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _base_schema(conn: sqlite3.Connection):
+    """Початкова схема (IF NOT EXISTS — бази, створені до міграцій, теж підходять)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sources (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            weight INTEGER DEFAULT 1,
+            active BOOLEAN DEFAULT 1,
+            etag TEXT,
+            last_modified TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS news_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT UNIQUE,
+            title TEXT,
+            source_id TEXT REFERENCES sources(id),
+            published TIMESTAMP,
+            content TEXT,
+            lang TEXT,
+            score REAL,
+            impact INTEGER,
+            summary TEXT,
+            why_matters TEXT,
+            processed_at TIMESTAMP,
+            sent BOOLEAN DEFAULT 0,
+            llm_model TEXT,
+            cost_usd REAL
+        )
+    """)
+    # Старі бази могли не мати колонок etag/last_modified
+    existing = _columns(conn, "sources")
+    for name in ("etag", "last_modified"):
+        if name not in existing:
+            conn.execute(f"ALTER TABLE sources ADD COLUMN {name} TEXT")
+
+
+def _rank_columns(conn: sqlite3.Connection):
+    """base_score/rank_key для ранжування з затуханням та індекс неотправлених"""
+    existing = _columns(conn, "news_items")
+    if "base_score" not in existing:
+        conn.execute("ALTER TABLE news_items ADD COLUMN base_score REAL DEFAULT 1.0")
+    if "rank_key" not in existing:
+        conn.execute("ALTER TABLE news_items ADD COLUMN rank_key REAL")
+    # Для старих записів base_score = 2^(impact-1), тож log2(base_score) = impact - 1
+    conn.execute(f"""
+        UPDATE news_items
+        SET base_score = 1 << (COALESCE(impact, 1) - 1),
+            rank_key = (COALESCE(impact, 1) - 1)
+                + (julianday(published) - 2440587.5) * 24 / {SCORE_HALF_LIFE_HOURS}
+        WHERE rank_key IS NULL AND published IS NOT NULL
+    """)
+    # Індекс для дайджесту: лише неотправлені, впорядковані за rank_key.
+    # Разом з rowid він покриває підзапит вибору кандидатів.
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_news_unsent_rank
+        ON news_items(rank_key DESC, sent) WHERE sent = 0
+    """)
+
+
+def _digest_candidates(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS digest_candidates (
+            news_id INTEGER PRIMARY KEY REFERENCES news_items(id),
+            source_id TEXT,
+            title TEXT,
+            rank_key REAL
+        )
+    """)
+
+
+def _published_index(conn: sqlite3.Connection):
+    """Індекс для фільтрів published >= ?: get_recent_news, get_last_news,
+    get_stats_since. impact у ключі робить його покриваючим для статистики."""
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_news_published
+        ON news_items(published, impact)
+    """)
+
+
+def _split_content(conn: sqlite3.Connection):
+    """Винести тексти новин у окрему таблицю зі стисненням zlib.
+
+    news_items.content лишається, але стає NULL: так гарячі сторінки таблиці
+    містять лише короткі поля, а місце повертає VACUUM.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS news_content (
+            news_id INTEGER PRIMARY KEY REFERENCES news_items(id),
+            body BLOB
+        )
+    """)
+    cursor = conn.execute("SELECT id, content FROM news_items WHERE content IS NOT NULL")
+    while True:
+        rows = cursor.fetchmany(500)
+        if not rows:
+            break
+        conn.executemany(
+            "INSERT OR REPLACE INTO news_content (news_id, body) VALUES (?, ?)",
+            [(news_id, compress_text(content)) for news_id, content in rows]
+        )
+    conn.execute("UPDATE news_items SET content = NULL WHERE content IS NOT NULL")
+
+
+def _hourly_rollups(conn: sqlite3.Connection):
+    """Погодинні агрегати для /stats, що оновлюються при кожній вставці.
+
+    Бакет — година публікації; агрегати не видаляються разом з архівацією новин.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS news_rollup_hourly (
+            bucket TEXT NOT NULL,
+            source_id TEXT NOT NULL,
+            llm_model TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            breaking INTEGER NOT NULL DEFAULT 0,
+            impact_sum INTEGER NOT NULL DEFAULT 0,
+            cost_usd REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (bucket, source_id, llm_model)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("DELETE FROM news_rollup_hourly")
+    conn.execute("""
+        INSERT INTO news_rollup_hourly
+        SELECT strftime('%Y-%m-%d %H:00:00', published),
+               COALESCE(source_id, ''),
+               COALESCE(llm_model, ''),
+               COUNT(*),
+               SUM(CASE WHEN impact >= 4 THEN 1 ELSE 0 END),
+               SUM(COALESCE(impact, 0)),
+               SUM(COALESCE(cost_usd, 0))
+        FROM news_items
+        WHERE published IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+
+
+def _search_triggers(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news_items BEGIN
+            INSERT INTO news_fts(rowid, title, summary, why_matters)
+            VALUES (new.id, new.title, new.summary, new.why_matters);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS news_fts_delete AFTER DELETE ON news_items BEGIN
+            INSERT INTO news_fts(news_fts, rowid, title, summary, why_matters)
+            VALUES ('delete', old.id, old.title, old.summary, old.why_matters);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS news_fts_update
+        AFTER UPDATE OF title, summary, why_matters ON news_items BEGIN
+            INSERT INTO news_fts(news_fts, rowid, title, summary, why_matters)
+            VALUES ('delete', old.id, old.title, old.summary, old.why_matters);
+            INSERT INTO news_fts(rowid, title, summary, why_matters)
+            VALUES (new.id, new.title, new.summary, new.why_matters);
+        END
+    """)
+
+
+def _search_index(conn: sqlite3.Connection):
+    """FTS5-індекс по title/summary/why_matters, синхронізований тригерами.
+
+    Тригер оновлення реагує лише на індексовані колонки, тож mark_as_sent
+    індекс не чіпає.
+    """
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+            title, summary, why_matters,
+            content='news_items', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    _search_triggers(conn)
+    conn.execute("INSERT INTO news_fts(news_fts) VALUES ('rebuild')")
+
+
+_NEWS_ITEMS_COLUMNS = (
+    "id", "url", "title", "source_id", "published", "content", "lang", "score",
+    "impact", "summary", "why_matters", "processed_at", "sent", "llm_model",
+    "cost_usd", "base_score", "rank_key",
+)
+
+
+def _url_keys(conn: sqlite3.Connection):
+    """Унікальність новин за url_key (хеш канонічного URL) замість сирого url.
+
+    UNIQUE-обмеження колонки url неможливо зняти через ALTER TABLE, тому
+    таблиця перебудовується; id зберігаються, тож news_content, digest_candidates
+    та FTS-індекс лишаються валідними. Для старих дублікатів (однаковий
+    канонічний URL) ключ отримує лише найраніший запис, решта — NULL.
+    """
+    conn.execute("""
+        CREATE TABLE news_items_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT,
+            title TEXT,
+            source_id TEXT REFERENCES sources(id),
+            published TIMESTAMP,
+            content TEXT,
+            lang TEXT,
+            score REAL,
+            impact INTEGER,
+            summary TEXT,
+            why_matters TEXT,
+            processed_at TIMESTAMP,
+            sent BOOLEAN DEFAULT 0,
+            llm_model TEXT,
+            cost_usd REAL,
+            base_score REAL DEFAULT 1.0,
+            rank_key REAL,
+            url_key INTEGER
+        )
+    """)
+    columns = ", ".join(_NEWS_ITEMS_COLUMNS)
+    conn.execute(f"INSERT INTO news_items_new ({columns}) SELECT {columns} FROM news_items")
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'news_items'").fetchone()
+
+    seen = set()
+    updates = []
+    for news_id, url in conn.execute("SELECT id, url FROM news_items_new ORDER BY id").fetchall():
+        key = url_key(url or "")
+        if key not in seen:
+            seen.add(key)
+            updates.append((key, news_id))
+    for start in range(0, len(updates), 500):
+        conn.executemany("UPDATE news_items_new SET url_key = ? WHERE id = ?", updates[start:start + 500])
+
+    # Разом з таблицею зникають її індекси й тригери — створюємо їх заново
+    conn.execute("DROP TABLE news_items")
+    conn.execute("ALTER TABLE news_items_new RENAME TO news_items")
+    if sequence:
+        # AUTOINCREMENT не повинен видати id, які вже пішли в архів
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'news_items'")
+        conn.execute(
+            "INSERT INTO sqlite_sequence (name, seq) "
+            "VALUES ('news_items', MAX(?, (SELECT COALESCE(MAX(id), 0) FROM news_items)))",
+            (sequence[0],)
+        )
+    conn.execute("CREATE UNIQUE INDEX idx_news_url_key ON news_items(url_key)")
+    _rank_columns(conn)
+    _published_index(conn)
+    _search_triggers(conn)
+
+
+def _outbox(conn: sqlite3.Connection):
+    """Черга доставки в Telegram (transactional outbox).
+
+    Запис у outbox робиться в тій самій транзакції, що й вставка новини, тож
+    падіння між вставкою і відправкою нічого не губить. next_attempt_at IS NULL
+    у недоставленого запису означає, що спроби вичерпано.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            news_id INTEGER NOT NULL REFERENCES news_items(id),
+            kind TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            next_attempt_at TIMESTAMP,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            sent_at TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_news_kind ON outbox(news_id, kind)")
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_outbox_due
+        ON outbox(next_attempt_at) WHERE sent_at IS NULL
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_outbox_sent
+        ON outbox(sent_at) WHERE sent_at IS NOT NULL
+    """)
+
+
+def _digest_fragments(conn: sqlite3.Connection):
+    """Готовий HTML-фрагмент кандидата: дайджест не рендериться під час відправки"""
+    conn.execute("ALTER TABLE digest_candidates ADD COLUMN fragment TEXT")
+
+
+def _outbox_channels(conn: sqlite3.Connection):
+    """Канал доставки в outbox: одна новина — окремий запис на кожен канал,
+    тож збій в одному каналі не повторює відправку в інші"""
+    conn.execute("ALTER TABLE outbox ADD COLUMN channel TEXT NOT NULL DEFAULT 'main'")
+    conn.execute("DROP INDEX IF EXISTS idx_outbox_news_kind")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_news_kind_channel ON outbox(news_id, kind, channel)")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "base_schema", _base_schema),
+    Migration(2, "rank_columns", _rank_columns),
+    Migration(3, "digest_candidates", _digest_candidates),
+    Migration(4, "published_index", _published_index),
+    Migration(5, "split_content", _split_content),
+    Migration(6, "hourly_rollups", _hourly_rollups),
+    Migration(7, "search_index", _search_index),
+    Migration(8, "url_keys", _url_keys),
+    Migration(9, "outbox", _outbox),
+    Migration(10, "digest_fragments", _digest_fragments),
+    Migration(11, "outbox_channels", _outbox_channels),
+]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, migrations: List[Migration] = MIGRATIONS) -> int:
+    """Застосувати всі нові міграції, кожну в окремій транзакції.
+
+    Повертає версію схеми після міграції.
+    """
+    current = schema_version(conn)
+    for migration in migrations:
+        if migration.version <= current:
+            continue
+        conn.execute("BEGIN")
+        try:
+            migration.apply(conn)
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+        except Exception:
+            conn.rollback()
+            logger.error("migration_failed", version=migration.version, name=migration.name)
+            raise
+        conn.commit()
+        current = migration.version
+        logger.info("migration_applied", version=migration.version, name=migration.name)
+    return current
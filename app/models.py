@@ -1,9 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 class NewsItem(BaseModel):
     """Модель для хранения новостей"""
+    id: Optional[int] = None
     url: str
     title: str
     source_id: str
@@ -18,6 +19,22 @@ class NewsItem(BaseModel):
     sent: bool = False
     llm_model: Optional[str] = None
     cost_usd: Optional[float] = None
+    base_score: float = 1.0  # незалежна від часу частина score
+    rank_key: Optional[float] = None  # log2(base_score) + published / half-life
+    llm_impact: Optional[int] = None  # impact від LLM до ранжування (не зберігається)
+
+class NewsIn(BaseModel):
+    """Новина від зовнішнього продюсера (POST /api/news).
+
+    impact і summary заповнює конвеєр; переданий impact — лише початкове значення.
+    """
+    url: str = Field(pattern=r"^https?://", max_length=2048)
+    title: str = Field(min_length=1, max_length=1000)
+    source_id: str = Field(min_length=1, max_length=100)
+    published: datetime
+    content: str = ""
+    lang: str = Field(min_length=2, max_length=8)
+    impact: int = Field(default=1, ge=1, le=5)
 
 class Source(BaseModel):
     """Модель для источников новостей"""
@@ -32,6 +49,21 @@ class Source(BaseModel):
     etag: Optional[str] = None
     last_modified: Optional[str] = None
 
+class Channel(BaseModel):
+    """Канал Telegram і правила, за якими в нього потрапляють новини.
+
+    Порожній список означає «будь-яке значення»; новина йде в канал, лише
+    якщо підходять усі задані правила.
+    """
+    id: str
+    chat_id: str
+    sources: List[str] = []
+    exclude_sources: List[str] = []
+    langs: List[str] = []
+    keywords: List[str] = []  # хоча б одне слово в заголовку чи summary
+    min_impact: Optional[int] = None  # за замовчуванням BREAKING_MIN_IMPACT
+    digest: bool = False  # чи надсилати в канал щоденний дайджест
+
 class SummarySchema(BaseModel):
     """Схема для ответа LLM"""
     summary: str
@@ -0,0 +1,576 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional
+import structlog
+from app.config import settings
+from app.db import NEWS_COLUMNS, _breaking_groups, _row_decoder, _rollup_rows
+from app.models import NewsItem
+from app.ranker import Ranker
+from app.routing import DEFAULT_CHANNEL
+from app.search import build_tsquery, ts_rank_weights
+from app.utils import compress_text, decompress_text, naive_local, url_key
+
+try:
+    import asyncpg  # type: ignore[import-untyped]
+except ImportError:  # потрібен лише для DB_URL=postgresql://...
+    asyncpg = None
+
+logger = structlog.get_logger()
+
+# Довільний, але сталий ключ advisory lock для створення схеми кількома процесами
+_SCHEMA_LOCK_ID = 4_103_117
+
+# Схема ідемпотентна: її застосовує кожен процес при першому підключенні
+POSTGRES_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sources (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        weight INTEGER DEFAULT 1,
+        active BOOLEAN DEFAULT TRUE,
+        etag TEXT,
+        last_modified TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS news_items (
+        id BIGSERIAL PRIMARY KEY,
+        url_key BIGINT NOT NULL UNIQUE,
+        url TEXT NOT NULL,
+        title TEXT NOT NULL,
+        source_id TEXT,
+        published TIMESTAMP NOT NULL,
+        lang TEXT,
+        score DOUBLE PRECISION DEFAULT 0,
+        impact INTEGER,
+        summary TEXT,
+        why_matters TEXT,
+        processed_at TIMESTAMP,
+        sent BOOLEAN NOT NULL DEFAULT FALSE,
+        llm_model TEXT,
+        cost_usd DOUBLE PRECISION,
+        base_score DOUBLE PRECISION DEFAULT 1.0,
+        rank_key DOUBLE PRECISION,
+        search TSVECTOR GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', COALESCE(title, '')), 'A')
+            || setweight(to_tsvector('simple', COALESCE(summary, '')), 'B')
+            || setweight(to_tsvector('simple', COALESCE(why_matters, '')), 'C')
+        ) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_news_unsent_rank ON news_items (rank_key DESC) WHERE NOT sent",
+    "CREATE INDEX IF NOT EXISTS idx_news_published ON news_items (published) INCLUDE (title)",
+    "CREATE INDEX IF NOT EXISTS idx_news_search ON news_items USING GIN (search)",
+    """
+    CREATE TABLE IF NOT EXISTS news_content (
+        news_id BIGINT PRIMARY KEY REFERENCES news_items(id) ON DELETE CASCADE,
+        body BYTEA
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS news_rollup_hourly (
+        bucket TIMESTAMP NOT NULL,
+        source_id TEXT NOT NULL,
+        llm_model TEXT NOT NULL,
+        total BIGINT NOT NULL DEFAULT 0,
+        breaking BIGINT NOT NULL DEFAULT 0,
+        impact_sum BIGINT NOT NULL DEFAULT 0,
+        cost_usd DOUBLE PRECISION NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, source_id, llm_model)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS outbox (
+        id BIGSERIAL PRIMARY KEY,
+        news_id BIGINT NOT NULL REFERENCES news_items(id) ON DELETE CASCADE,
+        kind TEXT NOT NULL,
+        created_at TIMESTAMP NOT NULL,
+        next_attempt_at TIMESTAMP,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        sent_at TIMESTAMP
+    )
+    """,
+    # Окремий запис на кожен канал (до маршрутизації ключем була пара news_id, kind)
+    "ALTER TABLE outbox ADD COLUMN IF NOT EXISTS channel TEXT NOT NULL DEFAULT 'main'",
+    "ALTER TABLE outbox DROP CONSTRAINT IF EXISTS outbox_news_id_kind_key",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_news_kind_channel ON outbox (news_id, kind, channel)",
+    "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (next_attempt_at) WHERE sent_at IS NULL",
+    "CREATE INDEX IF NOT EXISTS idx_outbox_sent ON outbox (sent_at) WHERE sent_at IS NOT NULL",
+    """
+    CREATE TABLE IF NOT EXISTS digest_candidates (
+        news_id BIGINT PRIMARY KEY,
+        source_id TEXT,
+        title TEXT,
+        rank_key DOUBLE PRECISION
+    )
+    """,
+    "ALTER TABLE digest_candidates ADD COLUMN IF NOT EXISTS fragment TEXT",
+)
+
+_COLUMNS_SQL = ", ".join(NEWS_COLUMNS)
+_SELECT_NEWS = f"SELECT {_COLUMNS_SQL} FROM news_items"
+
+_INSERT_NEWS_SQL = """
+    INSERT INTO news_items (
+        url_key, url, title, source_id, published, lang, score, impact, summary,
+        why_matters, processed_at, sent, llm_model, cost_usd, base_score, rank_key
+    )
+    SELECT * FROM unnest(
+        $1::bigint[], $2::text[], $3::text[], $4::text[], $5::timestamp[], $6::text[],
+        $7::float8[], $8::int[], $9::text[], $10::text[], $11::timestamp[], $12::bool[],
+        $13::text[], $14::float8[], $15::float8[], $16::float8[]
+    )
+    ON CONFLICT (url_key) DO NOTHING
+    RETURNING id, url_key
+"""
+
+_UPSERT_ROLLUP_SQL = """
+    INSERT INTO news_rollup_hourly AS r (bucket, source_id, llm_model, total, breaking, impact_sum, cost_usd)
+    SELECT * FROM unnest(
+        $1::timestamp[], $2::text[], $3::text[], $4::bigint[], $5::bigint[], $6::bigint[], $7::float8[]
+    )
+    ON CONFLICT (bucket, source_id, llm_model) DO UPDATE SET
+        total = r.total + excluded.total,
+        breaking = r.breaking + excluded.breaking,
+        impact_sum = r.impact_sum + excluded.impact_sum,
+        cost_usd = r.cost_usd + excluded.cost_usd
+"""
+
+
+def _hour_start(moment: datetime) -> datetime:
+    return naive_local(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def _to_items(records) -> List[NewsItem]:
+    if not records:
+        return []
+    decode = _row_decoder(tuple(records[0].keys()))
+    return [decode(record) for record in records]
+
+
+def _columns(rows: List[tuple]) -> List[list]:
+    """Рядки -> колонки для INSERT ... SELECT FROM unnest(...)"""
+    return [list(column) for column in zip(*rows)]
+
+
+class _DeferredWriter:
+    """Запис без очікування: виклик запускає задачу в event loop і повертає її"""
+
+    def __init__(self, owner: "PostgresDatabase"):
+        self._owner = owner
+        self._tasks: set = set()
+
+    def __getattr__(self, name: str):
+        method = getattr(self._owner, name)
+
+        def schedule(*args, **kwargs) -> asyncio.Task:
+            task = asyncio.get_running_loop().create_task(method(*args, **kwargs))
+            self._tasks.add(task)
+            task.add_done_callback(self._done)
+            return task
+
+        return schedule
+
+    async def wait(self):
+        """Дочекатися всіх запущених відкладених записів"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("db_deferred_write_failed", error=str(task.exception()))
+
+
+class PostgresDatabase:
+    """Сховище в PostgreSQL з тими ж асинхронними методами, що й AsyncDatabase.
+
+    Кілька процесів можуть писати в одну базу одночасно: унікальність новин
+    забезпечує url_key з ON CONFLICT DO NOTHING, агрегати — upsert. Пул
+    зʼєднань (asyncpg) створюється ліниво при першому зверненні.
+    """
+
+    backend = "postgres"
+
+    def __init__(self, db_url: Optional[str] = None, pool_size: Optional[int] = None):
+        if asyncpg is None:
+            raise RuntimeError("PostgreSQL backend requires asyncpg: pip install asyncpg")
+        self.db_url = (db_url or settings.DB_URL).replace("postgresql+asyncpg://", "postgresql://")
+        self.pool_size = pool_size or settings.DB_POOL_SIZE
+        self.deferred = _DeferredWriter(self)
+        self._pool = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+
+    async def _get_pool(self):
+        if self._pool is not None:
+            return self._pool
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool is None:
+                pool = await asyncpg.create_pool(self.db_url, min_size=1, max_size=self.pool_size)
+                async with pool.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.execute("SELECT pg_advisory_xact_lock($1)", _SCHEMA_LOCK_ID)
+                        for statement in POSTGRES_SCHEMA:
+                            await conn.execute(statement)
+                self._pool = pool
+        return self._pool
+
+    async def ping(self):
+        pool = await self._get_pool()
+        await pool.fetchval("SELECT 1")
+
+    async def add_news_item(self, item: NewsItem) -> bool:
+        """Добавить новую новость в БД"""
+        try:
+            return (await self.add_news_items([item]))[0]
+        except Exception as e:
+            logger.error("error_adding_news", error=str(e), url=item.url)
+            return False
+
+    async def add_news_items(self, items: List[NewsItem], breaking_impact: Optional[int] = None,
+                             channels: Optional[List[List[str]]] = None) -> List[bool]:
+        """Добавить пачку новостей одной транзакцией (статусы и outbox как у Database.add_news_items).
+
+        Конкурентные вставки того же URL из других процессов тихо
+        пропускаются благодаря ON CONFLICT DO NOTHING.
+        """
+        if not items:
+            return []
+        keys = [url_key(item.url) for item in items]
+        by_key: dict = {}
+        for item, key in zip(items, keys):
+            by_key.setdefault(key, item)
+        rows = []
+        for key, item in by_key.items():
+            if item.rank_key is None:
+                item.rank_key = Ranker.calculate_rank_key(item.base_score, item.published)
+            rows.append((
+                key, item.url, item.title, item.source_id, naive_local(item.published), item.lang,
+                item.score, item.impact, item.summary, item.why_matters, naive_local(item.processed_at),
+                item.sent, item.llm_model, item.cost_usd, item.base_score, item.rank_key
+            ))
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                inserted = await conn.fetch(_INSERT_NEWS_SQL, *_columns(rows))
+                ids = {record["url_key"]: record["id"] for record in inserted}
+                to_insert = []
+                for key, news_id in ids.items():
+                    by_key[key].id = news_id
+                    to_insert.append(by_key[key])
+                if to_insert:
+                    await conn.execute(
+                        "INSERT INTO news_content (news_id, body) SELECT * FROM unnest($1::bigint[], $2::bytea[])",
+                        [item.id for item in to_insert],
+                        [compress_text(item.content) for item in to_insert]
+                    )
+                    # Сортування ключів — однаковий порядок блокувань у всіх процесах
+                    rollups = sorted(_rollup_rows(to_insert, bucket=_hour_start))
+                    await conn.execute(_UPSERT_ROLLUP_SQL, *_columns(rollups))
+                # Вставленою вважається лише перша новина з таким ключем у пачці
+                statuses = [key in ids and by_key[key] is item for item, key in zip(items, keys)]
+                if breaking_impact is not None:
+                    groups = _breaking_groups(items, statuses, breaking_impact, channels)
+                    for (channel, kind, delay), news_ids in sorted(groups.items()):
+                        await self._enqueue(conn, news_ids, kind, delay=delay, channel=channel)
+        return statuses
+
+    async def get_known_urls(self, urls: List[str]) -> set:
+        """URL з пачки, чия канонічна форма вже є в БД (до суммаризації)"""
+        keys = {url: url_key(url) for url in urls}
+        pool = await self._get_pool()
+        records = await pool.fetch(
+            "SELECT url_key FROM news_items WHERE url_key = ANY($1::bigint[])", list(set(keys.values()))
+        )
+        existing = {record["url_key"] for record in records}
+        return {url for url, key in keys.items() if key in existing}
+
+    async def get_unsent_news(self, limit: int = 10, now: Optional[datetime] = None) -> List[NewsItem]:
+        """Неотправленные новости по score на момент запроса (см. Database.get_unsent_news)"""
+        now_key = Ranker.calculate_rank_key(1.0, now or datetime.now())
+        pool = await self._get_pool()
+        records = await pool.fetch(f"""
+            SELECT {_COLUMNS_SQL}, power(2.0, rank_key - $1) AS score
+            FROM news_items
+            WHERE NOT sent
+            ORDER BY rank_key DESC
+            LIMIT $2
+        """, now_key, limit)
+        return _to_items(records)
+
+    async def get_content(self, ids: List[int]) -> dict:
+        """Отримати розпаковані тексти новин: {id: content}"""
+        pool = await self._get_pool()
+        records = await pool.fetch(
+            "SELECT news_id, body FROM news_content WHERE news_id = ANY($1::bigint[])", list(ids)
+        )
+        return {record["news_id"]: decompress_text(record["body"]) for record in records}
+
+    async def load_content(self, items: List[NewsItem]) -> List[NewsItem]:
+        """Підвантажити content для новин, прочитаних без тексту"""
+        contents = await self.get_content([item.id for item in items if item.id is not None])
+        for item in items:
+            item.content = contents.get(item.id, item.content)
+        return items
+
+    async def get_news_by_ids(self, ids: List[int]) -> List[NewsItem]:
+        """Получить новости по id, сохраняя порядок ids"""
+        if not ids:
+            return []
+        pool = await self._get_pool()
+        records = await pool.fetch(f"{_SELECT_NEWS} WHERE id = ANY($1::bigint[])", list(ids))
+        by_id = {item.id: item for item in _to_items(records)}
+        return [by_id[news_id] for news_id in ids if news_id in by_id]
+
+    async def get_digest_candidates(self) -> List[dict]:
+        """Отримати збережених кандидатів у дайджест"""
+        pool = await self._get_pool()
+        records = await pool.fetch("SELECT news_id, source_id, title, rank_key, fragment FROM digest_candidates")
+        return [dict(record) for record in records]
+
+    async def replace_digest_candidate(self, candidate: dict, evicted_id: Optional[int] = None):
+        """Додати кандидата у дайджест і, за потреби, витіснити іншого"""
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if evicted_id is not None:
+                    await conn.execute("DELETE FROM digest_candidates WHERE news_id = $1", evicted_id)
+                await conn.execute("""
+                    INSERT INTO digest_candidates (news_id, source_id, title, rank_key, fragment)
+                    VALUES ($1, $2, $3, $4, $5)
+                    ON CONFLICT (news_id) DO UPDATE SET
+                        source_id = excluded.source_id, title = excluded.title,
+                        rank_key = excluded.rank_key, fragment = excluded.fragment
+                """, candidate["news_id"], candidate["source_id"], candidate["title"], candidate["rank_key"],
+                    candidate.get("fragment"))
+
+    async def delete_digest_candidates(self, ids: List[int]):
+        """Прибрати кандидатів з дайджесту"""
+        pool = await self._get_pool()
+        await pool.execute("DELETE FROM digest_candidates WHERE news_id = ANY($1::bigint[])", list(ids))
+
+    async def mark_as_sent(self, url: str):
+        """Отметить новость как отправленную"""
+        pool = await self._get_pool()
+        await pool.execute("UPDATE news_items SET sent = TRUE WHERE url_key = $1", url_key(url))
+
+    async def mark_many_as_sent(self, ids: List[int]) -> int:
+        """Отметить новости как отправленные одним UPDATE на пачку id"""
+        pool = await self._get_pool()
+        status = await pool.execute(
+            "UPDATE news_items SET sent = TRUE WHERE id = ANY($1::bigint[]) AND NOT sent", list(ids)
+        )
+        return int(status.split()[-1])
+
+    @staticmethod
+    async def _enqueue(conn, news_ids: List[int], kind: str, now: Optional[datetime] = None,
+                       delay: float = 0, channel: str = DEFAULT_CHANNEL) -> int:
+        if not news_ids:
+            return 0
+        now = now or datetime.now()
+        status = await conn.execute("""
+            INSERT INTO outbox (news_id, kind, channel, created_at, next_attempt_at)
+            SELECT news_id, $2, $5, $3, $4 FROM unnest($1::bigint[]) AS news_id
+            ON CONFLICT (news_id, kind, channel) DO NOTHING
+        """, list(news_ids), kind, now, now + timedelta(seconds=delay), channel)
+        return int(status.split()[-1])
+
+    async def enqueue_deliveries(self, news_ids: List[int], kind: str, now: Optional[datetime] = None,
+                                 delay: float = 0, channel: str = DEFAULT_CHANNEL) -> int:
+        """Поставити новини в outbox (див. Database.enqueue_deliveries)"""
+        pool = await self._get_pool()
+        async with pool.acquire() as conn:
+            return await self._enqueue(conn, news_ids, kind, now, delay, channel)
+
+    async def claim_deliveries(self, limit: int, lease_until: datetime, now: Optional[datetime] = None,
+                               kind: Optional[str] = None) -> List[dict]:
+        """Забрати записи outbox (див. Database.claim_deliveries).
+
+        SKIP LOCKED дозволяє кільком процесам-доставникам не чекати один одного
+        і не отримувати однакові записи.
+        """
+        pool = await self._get_pool()
+        records = await pool.fetch("""
+            UPDATE outbox SET next_attempt_at = $3
+            WHERE id IN (
+                SELECT id FROM outbox
+                WHERE sent_at IS NULL AND next_attempt_at <= $1 AND ($4::text IS NULL OR kind = $4)
+                ORDER BY next_attempt_at
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, news_id, kind, channel, attempts, created_at
+        """, now or datetime.now(), limit, lease_until, kind)
+        return [dict(record) for record in records]
+
+    async def ack_deliveries(self, ids: List[int], sent_at: Optional[datetime] = None) -> int:
+        """Підтвердити доставку пачки записів (news_items.sent не змінюється, див. Database.ack_deliveries)"""
+        pool = await self._get_pool()
+        status = await pool.execute(
+            "UPDATE outbox SET sent_at = $2 WHERE id = ANY($1::bigint[]) AND sent_at IS NULL",
+            list(ids), sent_at or datetime.now()
+        )
+        return int(status.split()[-1])
+
+    async def fail_deliveries(self, failures: List[tuple]):
+        """Записати невдалі спроби: (id, next_attempt_at або None — здатися, error)"""
+        pool = await self._get_pool()
+        await pool.executemany("""
+            UPDATE outbox
+            SET attempts = attempts + 1, next_attempt_at = $2, last_error = $3
+            WHERE id = $1
+        """, list(failures))
+
+    async def get_delivery_stats(self, since: datetime, now: Optional[datetime] = None) -> dict:
+        """Стан outbox: черга, вичерпані спроби і затримка доставки (секунди) з since"""
+        pool = await self._get_pool()
+        record = await pool.fetchrow("""
+            SELECT
+                COUNT(*) FILTER (WHERE sent_at IS NULL AND next_attempt_at IS NOT NULL) AS pending,
+                MIN(created_at) FILTER (WHERE sent_at IS NULL AND next_attempt_at IS NOT NULL) AS oldest,
+                COUNT(*) FILTER (WHERE sent_at IS NULL AND next_attempt_at IS NULL) AS failed
+            FROM outbox
+            WHERE sent_at IS NULL
+        """)
+        delivered = await pool.fetchrow("""
+            SELECT COUNT(*) AS delivered,
+                   AVG(EXTRACT(EPOCH FROM sent_at - created_at)) AS avg_lag,
+                   MAX(EXTRACT(EPOCH FROM sent_at - created_at)) AS max_lag
+            FROM outbox WHERE sent_at >= $1
+        """, since)
+        oldest = record['oldest']
+        return {
+            'pending': record['pending'],
+            'failed': record['failed'],
+            'oldest_pending_seconds': ((now or datetime.now()) - oldest).total_seconds() if oldest else 0.0,
+            'delivered': delivered['delivered'],
+            'avg_lag_seconds': float(delivered['avg_lag'] or 0.0),
+            'max_lag_seconds': float(delivered['max_lag'] or 0.0),
+        }
+
+    async def get_last_news(self) -> Optional[NewsItem]:
+        """Получить последнюю новость (по дате публикации)"""
+        pool = await self._get_pool()
+        records = await pool.fetch(f"{_SELECT_NEWS} ORDER BY published DESC LIMIT 1")
+        items = _to_items(records)
+        return items[0] if items else None
+
+    async def get_recent_news(self, minutes: int = 60) -> List[NewsItem]:
+        """Получить новости за последние N минут"""
+        pool = await self._get_pool()
+        records = await pool.fetch(
+            f"{_SELECT_NEWS} WHERE published >= $1", datetime.now() - timedelta(minutes=minutes)
+        )
+        return _to_items(records)
+
+    async def get_news_after(self, after_id: int, limit: int = 1000) -> List[NewsItem]:
+        """Новини з id > after_id по зростанню id — для інкрементального експорту"""
+        pool = await self._get_pool()
+        records = await pool.fetch(f"{_SELECT_NEWS} WHERE id > $1 ORDER BY id LIMIT $2", after_id, limit)
+        return _to_items(records)
+
+    async def search_news(self, query: str, limit: int = 10, offset: int = 0) -> List[NewsItem]:
+        """Повнотекстовий пошук, від найрелевантніших (ts_rank з вагами колонок)"""
+        tsquery = build_tsquery(query)
+        if not tsquery:
+            return []
+        pool = await self._get_pool()
+        records = await pool.fetch(f"""
+            {_SELECT_NEWS}
+            WHERE search @@ to_tsquery('simple', $1)
+            ORDER BY ts_rank('{ts_rank_weights()}', search, to_tsquery('simple', $1)) DESC, id
+            LIMIT $2 OFFSET $3
+        """, tsquery, limit, offset)
+        return _to_items(records)
+
+    async def get_recent_titles(self, minutes: int = 60) -> List[str]:
+        """Заголовки за последние N минут — всё, что нужно для дедупликации"""
+        pool = await self._get_pool()
+        records = await pool.fetch(
+            "SELECT title FROM news_items WHERE published >= $1", datetime.now() - timedelta(minutes=minutes)
+        )
+        return [record["title"] for record in records]
+
+    async def get_stats_since(self, since: datetime) -> dict:
+        """Статистика з погодинних агрегатів (див. Database.get_stats_since)"""
+        pool = await self._get_pool()
+        records = await pool.fetch("""
+            SELECT source_id,
+                   SUM(total) AS total,
+                   SUM(breaking) AS breaking,
+                   SUM(impact_sum) AS impact_sum,
+                   SUM(cost_usd) AS cost_usd
+            FROM news_rollup_hourly
+            WHERE bucket >= $1
+            GROUP BY source_id
+        """, _hour_start(since))
+
+        by_source = {}
+        for record in records:
+            by_source[record['source_id']] = {
+                'total': record['total'],
+                'breaking': record['breaking'],
+                'avg_impact': record['impact_sum'] / record['total'] if record['total'] else 0,
+                'cost_usd': record['cost_usd']
+            }
+        total = sum(stats['total'] for stats in by_source.values())
+        impact_sum = sum(stats['avg_impact'] * stats['total'] for stats in by_source.values())
+        return {
+            'total': total,
+            'breaking': sum(stats['breaking'] for stats in by_source.values()),
+            'avg_impact': impact_sum / total if total else 0,
+            'cost_usd': sum(stats['cost_usd'] for stats in by_source.values()),
+            'by_source': by_source
+        }
+
+    async def toggle_source(self, source_id: str) -> bool:
+        """Увімкнути/вимкнути джерело"""
+        try:
+            pool = await self._get_pool()
+            status = await pool.execute("UPDATE sources SET active = NOT active WHERE id = $1", source_id)
+            return status != "UPDATE 0"
+        except Exception as e:
+            logger.error("error_toggling_source", error=str(e), source_id=source_id)
+            return False
+
+    async def update_source_headers(self, source_id: str, etag: Optional[str] = None,
+                                    last_modified: Optional[str] = None):
+        """Оновити etag/last_modified для джерела"""
+        pool = await self._get_pool()
+        await pool.execute("""
+            UPDATE sources
+            SET etag = COALESCE($2, etag), last_modified = COALESCE($3, last_modified)
+            WHERE id = $1
+        """, source_id, etag, last_modified)
+
+    async def get_source_headers(self, source_id: str):
+        """Отримати etag/last_modified для джерела"""
+        pool = await self._get_pool()
+        record = await pool.fetchrow("SELECT etag, last_modified FROM sources WHERE id = $1", source_id)
+        return (record['etag'], record['last_modified']) if record else (None, None)
+
+    async def aclose(self):
+        """Дочекатися відкладених записів і запитів, що виконуються, і закрити пул.
+
+        Якщо за DB_CLOSE_TIMEOUT зʼєднання не звільнились, пул закривається примусово.
+        """
+        await self.deferred.wait()
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        try:
+            async with asyncio.timeout(settings.DB_CLOSE_TIMEOUT):
+                await pool.close()
+        except TimeoutError:
+            logger.warning("db_pool_close_timeout", timeout=settings.DB_CLOSE_TIMEOUT)
+            pool.terminate()
+
+    def close(self):
+        """Примусово закрити всі зʼєднання пулу (без event loop); запити, що
+        виконуються, і відкладені записи обриваються — для штатної зупинки є aclose()"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
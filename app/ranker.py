@@ -1,9 +1,23 @@
+import math
 from datetime import datetime
+from typing import Optional
 import structlog
 from app.models import NewsItem
+from app.utils import naive_local
 
 logger = structlog.get_logger()
 
+# Період напіврозпаду score у годинах: новина втрачає половину ваги кожні N годин
+SCORE_HALF_LIFE_HOURS = 6.0
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch_hours(moment: datetime) -> float:
+    """Кількість годин від епохи (naive local datetime, як і в БД)"""
+    return (naive_local(moment) - _EPOCH).total_seconds() / 3600
+
+
 class Ranker:
     """Класс для ранжирования новостей"""
     
@@ -41,4 +55,36 @@ class Ranker:
             
         except Exception as e:
             logger.error("error_calculating_impact", error=str(e), score=score)
-            return 1 
\ No newline at end of file
+            return 1
+
+    @staticmethod
+    def calculate_base_score(impact: int, source_weight: float = 1.0) -> float:
+        """Базова (незалежна від часу) оцінка: кожен рівень impact подвоює вагу"""
+        return max(source_weight, 0.01) * 2 ** (max(1, min(5, impact)) - 1)
+
+    @staticmethod
+    def calculate_rank_key(base_score: float, published: datetime) -> float:
+        """Ключ ранжування, що не залежить від поточного часу.
+
+        score(now) = base * 2^(-(now - published) / H), тож порядок за score
+        збігається з порядком за log2(base) + published / H. Саме цей ключ
+        зберігається в БД та індексується.
+        """
+        return math.log2(max(base_score, 1e-6)) + _epoch_hours(published) / SCORE_HALF_LIFE_HOURS
+
+    @staticmethod
+    def decayed_score(rank_key: float, now: Optional[datetime] = None) -> float:
+        """Поточний score новини з урахуванням затухання"""
+        now_key = _epoch_hours(now or datetime.now()) / SCORE_HALF_LIFE_HOURS
+        return round(2 ** (rank_key - now_key), 4)
+
+    def rank(self, item: NewsItem, source_weight: float = 1.0) -> NewsItem:
+        """Заповнити score, impact, base_score та rank_key для новини (оцінку LLM зберігає в llm_impact)"""
+        item.score = self.calculate_score(item)
+        item.llm_impact = item.impact
+        item.impact = self.calculate_impact(item.score, item.impact)
+        # Свіжість уже врахована затуханням rank_key; підсилений нею impact —
+        # лише для показу та порогу breaking news, у базову оцінку йде оцінка LLM
+        item.base_score = self.calculate_base_score(item.llm_impact, source_weight)
+        item.rank_key = self.calculate_rank_key(item.base_score, item.published)
+        return item
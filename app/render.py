@@ -0,0 +1,92 @@
+"""HTML-фрагменти новин для Telegram і пакування їх у повідомлення.
+
+Фрагмент новини рендериться й екранується один раз — коли новина стає
+кандидатом у дайджест — і зберігається разом із кандидатом. Під час
+відправки дайджест лише розкладає готові фрагменти по повідомленнях.
+"""
+from html import escape
+from typing import List, Optional
+from app.models import NewsItem
+
+# Ліміт Telegram на текст повідомлення; рахується в UTF-16 code units
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+DIGEST_HEADER = "<b>📰 Дайджест найцікавіших новин за день</b>\n\n"
+
+_MAX_TITLE = 300
+_MAX_SUMMARY = 1200
+_MAX_WHY = 600
+
+
+def message_length(text: str) -> int:
+    """Довжина так, як її рахує Telegram (емодзі поза BMP — дві одиниці).
+
+    Теги й сутності рахуються теж, тож оцінка не менша за реальну.
+    """
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _clip(text: Optional[str], limit: int) -> str:
+    text = text or ""
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def render_digest_fragment(item: NewsItem) -> str:
+    """Фрагмент новини для дайджесту (parse_mode=HTML); довгі поля обрізаються,
+    щоб фрагмент гарантовано вміщався в одне повідомлення разом із заголовком"""
+    return (
+        f"<b>• {escape(_clip(item.title, _MAX_TITLE), quote=False)}</b>\n"
+        f"<i>{escape(_clip(item.summary, _MAX_SUMMARY), quote=False)}</i>\n"
+        f"<b>Чому це важливо:</b> {escape(_clip(item.why_matters, _MAX_WHY), quote=False)}\n"
+        f"<b>Джерело:</b> <code>{escape(item.source_id or '', quote=False)}</code> | <b>Impact:</b> {item.impact}\n"
+        f"<a href=\"{escape(item.url)}\">Читати повністю</a>\n\n"
+    )
+
+
+def render_breaking(item: NewsItem) -> str:
+    """Пост breaking news (parse_mode=HTML)"""
+    return (
+        f"<b>Breaking News</b>\n\n"
+        f"<b>{escape(_clip(item.title, _MAX_TITLE), quote=False)}</b>\n\n"
+        f"{escape(_clip(item.summary, _MAX_SUMMARY), quote=False)}\n\n"
+        f"{escape(item.url, quote=False)}"
+    )
+
+
+def render_breaking_batch(items: List[NewsItem], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Кілька breaking news одним постом (parse_mode=HTML): заголовок — посилання на новину.
+
+    Довгі заголовки й URL можуть не вміститися в ліміт Telegram — тоді пост
+    розкладається на кілька повідомлень через pack_messages.
+    """
+    fragments = [
+        f"• <a href=\"{escape(item.url)}\">{escape(_clip(item.title, _MAX_TITLE), quote=False)}</a>\n"
+        for item in items
+    ]
+    return pack_messages(fragments, header=f"<b>Breaking News ({len(items)})</b>\n\n", limit=limit)
+
+
+def pack_messages(fragments: List[str], header: str = DIGEST_HEADER,
+                  limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Розкласти фрагменти по якомога меншій кількості повідомлень (first fit).
+
+    Заголовок займає місце лише в першому повідомленні. Фрагмент іде в перше
+    повідомлення, де для нього є місце, тож порядок ранжування зберігається
+    всередині кожного повідомлення, а повідомлення заповнюються щільно.
+    """
+    messages: List[List[str]] = [[header]] if header else []
+    free: List[int] = [limit - message_length(header)] if header else []
+    for fragment in fragments:
+        size = message_length(fragment)
+        for i, room in enumerate(free):
+            if size <= room:
+                messages[i].append(fragment)
+                free[i] -= size
+                break
+        else:
+            messages.append([fragment])
+            free.append(limit - size)
+    if header and len(messages[0]) == 1:
+        # Жоден фрагмент не вмістився поряд із заголовком — окремий заголовок не потрібен
+        del messages[0]
+    return ["".join(parts).rstrip() for parts in messages]
@@ -0,0 +1,164 @@
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+import structlog
+from app.config import settings
+
+logger = structlog.get_logger()
+
+# Таблиці, що переносяться в архів
+_ARCHIVED_TABLES = ("news_items", "news_content")
+
+
+def retention_cutoff(now: Optional[datetime] = None) -> datetime:
+    """Новини, опубліковані раніше за цей момент, переносяться в архів"""
+    return (now or datetime.now()) - timedelta(days=settings.RETENTION_DAYS)
+
+
+def archive_path(month: str, archive_dir: Optional[Path] = None) -> Path:
+    """Файл архіву за місяць у форматі YYYY-MM"""
+    return Path(archive_dir or settings.ARCHIVE_DIR) / f"news-{month}.db"
+
+
+def _month_bounds(month: str) -> tuple[datetime, datetime]:
+    start = datetime.strptime(month, "%Y-%m")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def months_to_archive(conn: sqlite3.Connection, cutoff: datetime) -> List[str]:
+    """Місяці, в яких є живі новини, старші за cutoff"""
+    cursor = conn.execute("""
+        SELECT DISTINCT strftime('%Y-%m', published) FROM news_items
+        WHERE published < ?
+    """, (cutoff,))
+    return sorted(row[0] for row in cursor if row[0])
+
+
+def _prepare_archive_table(conn: sqlite3.Connection, table: str) -> str:
+    """Створити таблицю в архіві або дописати колонки, додані міграціями.
+
+    Повертає список колонок для INSERT ... SELECT.
+    """
+    conn.execute(f"CREATE TABLE IF NOT EXISTS archive.{table} AS SELECT * FROM main.{table} WHERE 0")
+    main_columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+    archive_columns = {row[1] for row in conn.execute(f"PRAGMA archive.table_info({table})")}
+    for column in main_columns:
+        if column not in archive_columns:
+            conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {column}")
+    return ", ".join(main_columns)
+
+
+def archive_chunk(database, month: str, cutoff: datetime, limit: int,
+                  archive_dir: Optional[Path] = None) -> int:
+    """Перенести до `limit` новин місяця, старших за cutoff, у місячний архів.
+
+    Виконується поза транзакціями записувача (AsyncDatabase.maintenance):
+    ATTACH не можна робити всередині транзакції. Повертає кількість
+    перенесених новин; 0 означає, що місяць вичищено.
+    """
+    conn = database.conn
+    start, end = _month_bounds(month)
+    upper = min(end, cutoff)
+    path = archive_path(month, archive_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+    try:
+        conn.execute("BEGIN")
+        try:
+            columns = {table: _prepare_archive_table(conn, table) for table in _ARCHIVED_TABLES}
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS archive.idx_archive_published
+                ON news_items(published, impact)
+            """)
+            conn.execute("DROP TABLE IF EXISTS temp.archive_ids")
+            conn.execute("""
+                CREATE TEMP TABLE archive_ids AS
+                SELECT id FROM main.news_items
+                WHERE published >= ? AND published < ?
+                LIMIT ?
+            """, (start, upper, limit))
+            moved = conn.execute("SELECT COUNT(*) FROM temp.archive_ids").fetchone()[0]
+            if moved:
+                for table, column in (("news_items", "id"), ("news_content", "news_id")):
+                    conn.execute(f"""
+                        INSERT OR IGNORE INTO archive.{table} ({columns[table]})
+                        SELECT {columns[table]} FROM main.{table}
+                        WHERE {column} IN (SELECT id FROM temp.archive_ids)
+                    """)
+                for table, column in (("digest_candidates", "news_id"), ("outbox", "news_id"),
+                                      ("news_content", "news_id"), ("news_items", "id")):
+                    conn.execute(
+                        f"DELETE FROM main.{table} WHERE {column} IN (SELECT id FROM temp.archive_ids)"
+                    )
+            conn.execute("DROP TABLE temp.archive_ids")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    finally:
+        conn.execute("DETACH DATABASE archive")
+    return moved
+
+
+def ensure_incremental_vacuum(database) -> bool:
+    """Перевести базу в auto_vacuum=INCREMENTAL (одноразовий повний VACUUM).
+
+    Нові бази отримують цей режим одразу при створенні (див. Database).
+    """
+    conn = database.conn
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    logger.info("auto_vacuum_enabled")
+    return True
+
+
+def incremental_vacuum(database, pages: int) -> int:
+    """Повернути ОС до `pages` вільних сторінок; повертає, скільки лишилось"""
+    conn = database.conn
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+class RetentionJob:
+    """Фонове завдання: архівує старі новини і стискає живу базу.
+
+    Кожен крок — окрема коротка операція в потоці-записувачі, тож звичайні
+    записи пайплайну встигають виконуватись між кроками.
+    """
+
+    def __init__(self, database, archive_dir: Optional[Path] = None):
+        self.database = database
+        self.archive_dir = archive_dir
+
+    async def run(self, now: Optional[datetime] = None) -> int:
+        cutoff = retention_cutoff(now)
+        moved_total = 0
+        try:
+            await self.database.maintenance(ensure_incremental_vacuum)
+            months = await self.database.maintenance(
+                lambda database: months_to_archive(database.conn, cutoff)
+            )
+            for month in months:
+                while True:
+                    moved = await self.database.maintenance(
+                        archive_chunk, month, cutoff, settings.RETENTION_BATCH_SIZE, self.archive_dir
+                    )
+                    moved_total += moved
+                    if moved < settings.RETENTION_BATCH_SIZE:
+                        break
+            free_pages = None
+            while free_pages != 0:
+                remaining = await self.database.maintenance(
+                    incremental_vacuum, settings.RETENTION_VACUUM_PAGES
+                )
+                if free_pages is not None and remaining >= free_pages:
+                    break
+                free_pages = remaining
+            logger.info("retention_done", archived=moved_total, cutoff=cutoff.isoformat())
+        except Exception as e:
+            logger.error("retention_failed", error=str(e))
+        return moved_total
@@ -0,0 +1,99 @@
+"""Маршрутизація новин по каналах Telegram.
+
+Канали й правила описуються в config/channels.yml; без файла все йде в
+один канал TELEGRAM_CHANNEL_ID, як і раніше. Приклад:
+
+    channels:
+      - id: main
+        chat_id: ${TELEGRAM_CHANNEL_ID}
+        exclude_sources: [coindesk]
+        digest: true
+      - id: crypto
+        chat_id: ${TELEGRAM_CRYPTO_CHANNEL_ID}
+        sources: [coindesk]
+      - id: firehose
+        chat_id: ${TELEGRAM_FIREHOSE_CHANNEL_ID}
+        min_impact: 1
+
+chat_id підставляється зі змінних оточення; канал із незаданою змінною
+пропускається з попередженням.
+"""
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+import structlog
+import yaml  # type: ignore[import-untyped]
+from app.config import settings
+from app.models import Channel, NewsItem
+
+logger = structlog.get_logger()
+
+DEFAULT_CHANNEL = "main"
+
+
+class ChannelRouter:
+    """Відображає новину в список id каналів, куди її треба доставити"""
+
+    def __init__(self, channels: List[Channel]):
+        if not channels:
+            raise ValueError("at least one channel is required")
+        self.channels: Dict[str, Channel] = {channel.id: channel for channel in channels}
+        # Один регулярний вираз на канал замість перебору слів для кожної новини
+        self._keywords = {
+            channel.id: re.compile(r"\b(?:" + "|".join(map(re.escape, channel.keywords)) + r")\b", re.IGNORECASE)
+            for channel in channels if channel.keywords
+        }
+
+    @classmethod
+    def single(cls, chat_id: str) -> "ChannelRouter":
+        """Один канал для всього — поведінка без config/channels.yml"""
+        return cls([Channel(id=DEFAULT_CHANNEL, chat_id=chat_id, digest=True)])
+
+    def _min_impact(self, channel: Channel) -> int:
+        return settings.BREAKING_MIN_IMPACT if channel.min_impact is None else channel.min_impact
+
+    @property
+    def min_impact(self) -> int:
+        """Найменший impact, з яким новина може потрапити хоч в один канал"""
+        return min(self._min_impact(channel) for channel in self.channels.values())
+
+    def _matches(self, channel: Channel, item: NewsItem) -> bool:
+        if item.impact < self._min_impact(channel):
+            return False
+        if channel.sources and item.source_id not in channel.sources:
+            return False
+        if item.source_id in channel.exclude_sources:
+            return False
+        if channel.langs and item.lang not in channel.langs:
+            return False
+        pattern = self._keywords.get(channel.id)
+        if pattern is not None and not pattern.search(f"{item.title}\n{item.summary or ''}"):
+            return False
+        return True
+
+    def route(self, item: NewsItem) -> List[str]:
+        return [channel.id for channel in self.channels.values() if self._matches(channel, item)]
+
+    def chat_id(self, channel_id: str) -> str:
+        return self.channels[channel_id].chat_id
+
+    def digest_channels(self) -> List[str]:
+        return [channel.id for channel in self.channels.values() if channel.digest]
+
+
+def load_channels(path: Optional[Path] = None) -> ChannelRouter:
+    """Прочитати канали з CHANNELS_FILE; без файла — один канал TELEGRAM_CHANNEL_ID"""
+    path = Path(path or settings.CHANNELS_FILE)
+    if not path.exists():
+        return ChannelRouter.single(settings.TELEGRAM_CHANNEL_ID)
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    channels = []
+    for raw in data.get("channels", []):
+        chat_id = os.path.expandvars(str(raw.get("chat_id", "")))
+        if not chat_id or "$" in chat_id:
+            logger.warning("channel_skipped", channel=raw.get("id"), reason="chat_id is not set")
+            continue
+        channels.append(Channel(**{**raw, "chat_id": chat_id}))
+    return ChannelRouter(channels)
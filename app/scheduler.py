@@ -1,15 +1,27 @@
 import yaml
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+import httpx
 import structlog
 from datetime import datetime, timedelta
+from time import perf_counter
+from typing import Dict, Optional
 from app.config import settings
 from app.fetchers.rss import RSSFetcher
 from app.fetchers.api import APIFetcher
 from app.fetchers.github import GitHubTrendingFetcher
 from app.models import Source
-from app.db import db
+from app.delivery import BREAKING_KIND, URGENT_KIND, DeliveryWorker
+from app.digest import DigestAccumulator
+from app.export import NewsExporter
 from app.ranker import Ranker
+from app.metrics import (
+    DUPLICATE_RATE, NEWS_IMPACT, NEWS_PROCESSED, NEWS_PROCESSING_TIME, PIPELINE_STAGE, SCHEDULER_JOBS,
+    register_sources, source_label,
+)
+from app.retention import RetentionJob
+from app.routing import ChannelRouter
+from app.render import pack_messages, render_digest_fragment
 from app.summarizer import Summarizer
 
 logger = structlog.get_logger()
@@ -23,19 +35,39 @@ FETCHER_MAP = {
 class NewsScheduler:
     """Планировщик задач для обработки новостей"""
     
-    def __init__(self):
+    def __init__(self, storage, publisher=None, summarizer: Optional[Summarizer] = None,
+                 http: Optional[httpx.AsyncClient] = None, router: Optional[ChannelRouter] = None):
+        """storage — сховище новин, publisher — хто відправляє в канали (NewsBot),
+        http — спільний пул зʼєднань для фетчерів, router — правила розподілу
+        новин по каналах. Усе це належить AppContext."""
+        self.storage = storage
+        self.publisher = publisher
+        self.http = http
+        self.router = router or ChannelRouter.single(settings.TELEGRAM_CHANNEL_ID)
         self.scheduler = AsyncIOScheduler()
         self.ranker = Ranker()
-        self.summarizer = Summarizer()
+        self.summarizer = summarizer or Summarizer()
         self.sources = self._load_sources()
+        self.digest = DigestAccumulator(writer=storage.deferred)
+        self.delivery = DeliveryWorker(
+            storage,
+            senders={BREAKING_KIND: self._send_breaking, URGENT_KIND: self._send_breaking},
+            group_senders={BREAKING_KIND: self._send_breaking_batch},
+        )
         self.delivery_stats = {"total": 0, "success": 0}
         self.duplicate_stats = {"total": 0, "duplicates": 0}
+        # Час останнього успішного фетчу по джерелах — для /readyz
+        self.last_fetch: Dict[str, datetime] = {}
+        self.started_at: Optional[datetime] = None
     
     def _load_sources(self) -> list[Source]:
         """Загрузить источники из конфига"""
         with open(settings.SOURCES_FILE) as f:
             data = yaml.safe_load(f)
-            return [Source(**source) for source in data['sources']]
+            sources = [Source(**source) for source in data['sources']]
+        # Мітка source у метриках обмежена джерелами з конфігу
+        register_sources(source.id for source in sources)
+        return sources
     
     def _is_breaking_news_timely(self, item) -> bool:
         """Проверить, что новость не старше 15 минут"""
@@ -44,11 +76,10 @@ class NewsScheduler:
         time_diff = datetime.now() - item.published
         return time_diff <= timedelta(minutes=15)
     
-    def _is_duplicate(self, item) -> bool:
-        """Проверить на дубликаты"""
-        recent_news = db.get_recent_news(minutes=60)  # Проверяем последний час
-        for news in recent_news:
-            if self._calculate_similarity(item.title, news.title) > 0.8:  # Порог схожести 80%
+    def _is_duplicate(self, item, recent_titles: list[str]) -> bool:
+        """Проверить на дубликаты среди заголовков за последний час"""
+        for title in recent_titles:
+            if self._calculate_similarity(item.title, title) > 0.8:  # Порог схожести 80%
                 self.duplicate_stats["duplicates"] += 1
                 return True
         return False
@@ -64,70 +95,141 @@ class NewsScheduler:
     
     async def process_source(self, source: Source):
         """Обработать один источник"""
-        print(f"process_source called for {source.id}")
+        logger.debug("process_source_started", source_id=source.id)
         try:
             fetcher_cls = FETCHER_MAP.get(source.type)
             if not fetcher_cls:
                 logger.error(f"Unknown fetcher type: {source.type}", source_id=source.id)
                 return
-            fetcher = fetcher_cls(source)
+            fetcher = fetcher_cls(source, client=self.http, storage=self.storage)
+            started = perf_counter()
             items = await fetcher.fetch()
-            print(f"Fetched {len(items)} items from {source.id}")  # DEBUG
-            if not items:
-                return
+            if not fetcher.failed:
+                self.last_fetch[source.id] = datetime.now()
+            logger.info("source_fetched", source_id=source.id, items=len(items))
+            self._count(source, "fetched", len(items))
+            await self.process_items(source, items, started=started)
+            await fetcher.close()
+        except Exception as e:
+            logger.error("error_processing_source", error=str(e), source_id=source.id)
+
+    def source_for(self, source_id: str) -> Source:
+        """Джерело з конфігу; для невідомого id (приймання через API) — джерело з вагою 1"""
+        for source in self.sources:
+            if source.id == source_id:
+                return source
+        return Source(id=source_id, name=source_id, type="api", url="", interval=0, lang="")
+
+    async def process_items(self, source: Source, items: list, started: Optional[float] = None) -> int:
+        """Дедуплікація, суммаризація, ранжування і запис пачки новин одного джерела.
+
+        Спільний шлях для фетчерів і POST /api/news; повертає кількість нових записів.
+        """
+        started = started if started is not None else perf_counter()
+        # Уже відомі (з точністю до канонічного URL) новини не суммаризуємо
+        with PIPELINE_STAGE.time("dedup", source.id):
+            known = await self.storage.get_known_urls([item.url for item in items])
+            items = [item for item in items if item.url not in known]
+        self._count(source, "known", len(known))
+        if not items:
+            return 0
+        with PIPELINE_STAGE.time("summarize", source.id):
             processed_items = await self.summarizer.process_batch(items)
+        self._count(source, "failed", len(items) - len(processed_items))
+        with PIPELINE_STAGE.time("dedup", source.id):
+            # Заголовки за последний час читаем один раз на пачку
+            recent_titles = await self.storage.get_recent_titles(minutes=60)
+            fresh_items = []
             for item in processed_items:
-                if self._is_duplicate(item):
+                self.duplicate_stats["total"] += 1
+                if self._is_duplicate(item, recent_titles):
                     logger.info("duplicate_skipped", title=item.title)
                     continue
-                    
-                score = self.ranker.calculate_score(item)
-                item.score = score
-                item.impact = self.ranker.calculate_impact(score, item.impact)
-                
-                if db.add_news_item(item):
-                    if item.impact >= 2:
-                        print(f"TRY SEND: {item.title} | {item.source_id}")
-                        print(f"Send breaking news: {item.title}")  # DEBUG
-                        try:
-                            from app.bot import send_breaking_news
-                            await send_breaking_news(item)
-                            self.delivery_stats["success"] += 1
-                            logger.info("breaking_news_sent", title=item.title, impact=item.impact)
-                        except Exception as e:
-                            logger.error("breaking_news_delivery_failed", error=str(e), title=item.title)
-                        self.delivery_stats["total"] += 1
-            await fetcher.close()
-        except Exception as e:
-            logger.error("error_processing_source", error=str(e), source_id=source.id)
+                recent_titles.append(item.title)
+                fresh_items.append(item)
+        self._count(source, "duplicate", len(processed_items) - len(fresh_items))
+        DUPLICATE_RATE.set(self.duplicate_stats["duplicates"] / self.duplicate_stats["total"]
+                           if self.duplicate_stats["total"] else 0)
+        with PIPELINE_STAGE.time("rank", source.id):
+            for item in fresh_items:
+                self.ranker.rank(item, source_weight=source.weight)
+        
+        # Вся пачка пишется одной транзакцией; breaking news у тій же транзакції
+        # потрапляють в outbox, а відправляє їх DeliveryWorker
+        with PIPELINE_STAGE.time("store", source.id):
+            statuses = await self.storage.add_news_items(
+                fresh_items,
+                breaking_impact=self.router.min_impact,
+                channels=[self.router.route(item) for item in fresh_items],
+            )
+        for item, inserted in zip(fresh_items, statuses):
+            if inserted:
+                self.digest.offer(item)
+                NEWS_IMPACT.observe(item.impact)
+        self._count(source, "stored", sum(statuses))
+        self._count(source, "exists", len(statuses) - sum(statuses))
+        NEWS_PROCESSING_TIME.observe(perf_counter() - started)
+        if any(statuses):
+            self.delivery.notify()
+        return sum(statuses)
+    
+    def _count(self, source: Source, status: str, count: int):
+        if count:
+            NEWS_PROCESSED.labels(source=source_label(source.id), status=status).inc(count)
+    
+    def _publisher(self):
+        if self.publisher is None:
+            raise RuntimeError("NewsScheduler has no publisher to send messages")
+        return self.publisher
+    
+    async def _send_breaking(self, item, channel: str):
+        """Відправка breaking news для DeliveryWorker; помилка означає повторну спробу"""
+        try:
+            await self._publisher().send_breaking_news(item, channel)
+        except Exception:
+            self.delivery_stats["total"] += 1
+            raise
+        self.delivery_stats["total"] += 1
+        self.delivery_stats["success"] += 1
+    
+    async def _send_breaking_batch(self, items, channel: str):
+        """Склеєні breaking news одним постом"""
+        try:
+            await self._publisher().send_breaking_batch(items, channel)
+        except Exception:
+            self.delivery_stats["total"] += 1
+            raise
+        self.delivery_stats["total"] += 1
+        self.delivery_stats["success"] += 1
     
     async def send_daily_digest(self):
         """Отправить ежедневный дайджест"""
         try:
-            news = db.get_unsent_news()
-            if not news:
+            candidates = self.digest.top()
+            news = {item.id: item for item in await self.storage.get_news_by_ids([c.news_id for c in candidates])}
+            # Фрагменти відрендерені при відборі; рендеримо лише кандидатів зі старих версій
+            selected = [c for c in candidates if c.news_id in news and not news[c.news_id].sent]
+            if not selected:
                 logger.info("no_news_for_digest")
                 return
-            text = "<b>📰 Дайджест найцікавіших новин за день</b>\n\n"
-            for item in news:
-                text += (
-                    f"<b>• {item.title}</b>\n"
-                    f"<i>{item.summary}</i>\n"
-                    f"<b>Чому це важливо:</b> {item.why_matters}\n"
-                    f"<b>Джерело:</b> <code>{item.source_id}</code> | <b>Impact:</b> {item.impact}\n"
-                    f"<a href='{item.url}'>Читати повністю</a>\n\n"
-                )
+            channels = self.router.digest_channels()
+            if not channels:
+                logger.warning("no_digest_channels")
+                return
+            messages = pack_messages([c.fragment or render_digest_fragment(news[c.news_id]) for c in selected])
+            self.delivery_stats["total"] += 1
             try:
-                from app.bot import send_breaking_news
-                await send_breaking_news(news[0])  # TODO: можна зробити окрему функцію для красивого дайджесту
-                self.delivery_stats["success"] += 1
-                logger.info("digest_sent", items_count=len(news))
+                delivered = await self._publisher().send_digest_messages(messages, channels)
             except Exception as e:
+                # Кандидати лишаються в акумуляторі й підуть у наступний дайджест
                 logger.error("digest_delivery_failed", error=str(e))
-            self.delivery_stats["total"] += 1
-            
-            for item in news:
-                db.mark_as_sent(item.url)
+                return
+            self.delivery_stats["success"] += 1
+            logger.info("digest_sent", items_count=len(selected), messages=len(messages), channels=delivered)
+
+            # Новини позначаються відправленими, лише коли дайджест дійшов хоч до одного каналу
+            await self.storage.mark_many_as_sent([c.news_id for c in selected])
+            self.digest.discard(c.news_id for c in candidates)
                 
             # Логируем статистику
             delivery_rate = (self.delivery_stats["success"] / self.delivery_stats["total"] * 100) if self.delivery_stats["total"] > 0 else 0
@@ -138,6 +240,13 @@ class NewsScheduler:
         except Exception as e:
             logger.error("error_sending_digest", error=str(e))
 
+    async def export_news(self):
+        """Дописати нові новини в Parquet-файли для аналітики"""
+        try:
+            await NewsExporter(self.storage).run()
+        except Exception as e:
+            logger.error("export_failed", error=str(e))
+
     def start(self):
         """Запустить планировщик"""
         for source in self.sources:
@@ -154,6 +263,30 @@ class NewsScheduler:
             CronTrigger(hour=12, minute=30, timezone='Europe/Kiev'),
             id="daily_digest"
         )
-        print("Scheduler jobs:", self.scheduler.get_jobs())  # DEBUG
+        # Стан дайджесту відновлюється один раз, до першого опитування джерел
+        self.scheduler.add_job(self.digest.load_async, args=[self.storage], id="digest_restore")
+        # Нічний експорт у Parquet — до архівації, щоб не пропустити старі новини
+        self.scheduler.add_job(
+            self.export_news,
+            CronTrigger(hour=3, minute=30, timezone='Europe/Kiev'),
+            id="export"
+        )
+        # Архівація старих новин у файли SQLite — вночі, коли навантаження мінімальне
+        if self.storage.backend == "sqlite":
+            self.scheduler.add_job(
+                RetentionJob(self.storage).run,
+                CronTrigger(hour=4, minute=0, timezone='Europe/Kiev'),
+                id="retention"
+            )
+        logger.info("scheduler_jobs", jobs=[job.id for job in self.scheduler.get_jobs()])
         self.scheduler.start()
-        logger.info("scheduler_started") 
\ No newline at end of file
+        self.started_at = datetime.now()
+        SCHEDULER_JOBS.set_function(lambda: len(self.scheduler.get_jobs()) if self.scheduler.running else 0)
+        self.delivery.start()
+        logger.info("scheduler_started")
+
+    async def stop(self):
+        """Зупинити задачі й воркер доставки (незавершені записи outbox доставить наступний запуск)"""
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+        await self.delivery.stop()
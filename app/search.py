@@ -0,0 +1,73 @@
+"""Повнотекстовий пошук по новинах (SQLite FTS5, PostgreSQL tsvector).
+
+Індекс news_fts — external-content таблиця над news_items, яку тримають
+синхронною тригери (див. міграцію search_index). Перебудувати індекс
+офлайн, наприклад після ручних правок БД:
+
+    python -m app.search rebuild
+
+У PostgreSQL індекс — згенерована колонка news_items.search з GIN-індексом,
+перебудова не потрібна.
+"""
+import re
+import sys
+import sqlite3
+
+# Вага колонок для bm25: title, summary, why_matters
+BM25_WEIGHTS = (10.0, 3.0, 1.0)
+
+_TOKEN_PATTERN = re.compile(r"[\w'-]+", re.UNICODE)
+
+
+def build_match_query(query: str) -> str:
+    """Перетворити довільний текст на безпечний вираз FTS5 MATCH.
+
+    Кожне слово береться в лапки (оператори FTS5 не інтерпретуються),
+    слова обʼєднуються через AND; `*` в кінці слова — пошук за префіксом.
+    """
+    terms = []
+    for raw in query.split():
+        prefix = raw.endswith("*")
+        for token in _TOKEN_PATTERN.findall(raw):
+            terms.append('"' + token.replace('"', '""') + '"')
+        if prefix and terms:
+            terms[-1] += "*"
+    return " ".join(terms)
+
+
+def build_tsquery(query: str) -> str:
+    """Те саме, що build_match_query, але для to_tsquery() PostgreSQL"""
+    terms = []
+    for raw in query.split():
+        prefix = raw.endswith("*")
+        for token in _TOKEN_PATTERN.findall(raw):
+            terms.append("'" + token.replace("'", "''") + "'")
+        if prefix and terms:
+            terms[-1] += ":*"
+    return " & ".join(terms)
+
+
+def ts_rank_weights() -> str:
+    """BM25_WEIGHTS у форматі масиву ваг ts_rank: {D, C, B, A}, title — A"""
+    top = max(BM25_WEIGHTS)
+    title, summary, why_matters = (weight / top for weight in BM25_WEIGHTS)
+    return f"{{0, {why_matters:g}, {summary:g}, {title:g}}}"
+
+
+def rebuild_index(conn: sqlite3.Connection):
+    """Перебудувати news_fts з news_items і оптимізувати сегменти"""
+    with conn:
+        conn.execute("INSERT INTO news_fts(news_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO news_fts(news_fts) VALUES ('optimize')")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print("usage: python -m app.search rebuild")
+        sys.exit(1)
+    from app.db import Database
+    database = Database()
+    rebuild_index(database.conn)
+    count = database.conn.execute("SELECT COUNT(*) FROM news_fts").fetchone()[0]
+    database.close()
+    print(f"news_fts rebuilt: {count} rows")
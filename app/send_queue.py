@@ -0,0 +1,251 @@
+"""Черга відправки в Telegram з урахуванням лімітів.
+
+Telegram обмежує бота глобально (~30 повідомлень/с) і по кожному чату
+(канал — ~20 повідомлень/хв). Відправки проходять через спільний
+token bucket і bucket свого чату, а при 429 (TelegramRetryAfter) задача
+повертається в чергу із затримкою, яку назвав сервер. Серед готових до
+відправки задач першою йде та, що має менший пріоритет, далі — FIFO.
+
+Відправки в різні чати виконуються паралельно (не більше concurrency
+одночасно), в один чат — по одній, тож порядок повідомлень у чаті
+зберігається.
+"""
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+import structlog
+from app.config import settings
+from app.metrics import SEND_QUEUE_DEPTH, SEND_QUEUE_WAIT, SEND_RETRY_AFTER
+
+try:
+    from aiogram.exceptions import TelegramRetryAfter
+except ImportError:  # без aiogram 429 не розпізнається, помилка йде викликачу
+    TelegramRetryAfter = None  # type: ignore[misc,assignment]
+
+logger = structlog.get_logger()
+
+PRIORITY_BREAKING = 0
+PRIORITY_DIGEST = 10
+PRIORITY_LOW = 20
+
+ChatId = Union[int, str]
+
+
+class QueueStopped(Exception):
+    """Черга зупинена раніше, ніж задачу відправили"""
+
+
+class TokenBucket:
+    """rate токенів за секунду, не більше capacity; pause_until блокує bucket повністю"""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Скільки секунд чекати до наступного токена (0 — можна зараз)"""
+        self._refill(now)
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause_until(self, until: float):
+        self.blocked_until = max(self.blocked_until, until)
+        self.tokens = min(self.tokens, 0.0)
+
+
+@dataclass
+class _SendJob:
+    priority: int
+    seq: int
+    chat_id: ChatId
+    send: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float
+    not_before: float = 0.0
+    retries: int = field(default=0)
+
+
+class SendQueue:
+    """Планувальник відправок: глобальний ліміт і ліміти чатів, пріоритети, RetryAfter.
+
+    Задачі ставляться через send() і розподіляються єдиною фоновою
+    корутиною, яка стартує ліниво при першій відправці. Сама відправка
+    йде окремою задачею, щоб повільний запит не тримав інші чати.
+    """
+
+    def __init__(self, global_rate: Optional[float] = None, chat_rate: Optional[float] = None,
+                 chat_burst: Optional[int] = None, max_retry_after: Optional[int] = None,
+                 concurrency: Optional[int] = None, clock: Callable[[], float] = time.monotonic):
+        self.global_rate = global_rate or settings.TELEGRAM_GLOBAL_RATE
+        self.chat_rate = chat_rate or settings.TELEGRAM_CHAT_RATE_PER_MINUTE / 60
+        self.chat_burst = chat_burst or settings.TELEGRAM_CHAT_BURST
+        self.max_retry_after = settings.TELEGRAM_MAX_RETRY_AFTER if max_retry_after is None else max_retry_after
+        self.concurrency = concurrency or settings.TELEGRAM_SEND_CONCURRENCY
+        self.clock = clock
+        self.stats = {"sent": 0, "failed": 0, "retry_after": 0}
+        self._global = TokenBucket(self.global_rate, self.global_rate, clock())
+        self._chats: Dict[ChatId, TokenBucket] = {}
+        self._jobs: List[_SendJob] = []
+        self._seq = itertools.count()
+        # Подія й семафор перевідкриваються, якщо черга перейшла в інший event loop
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._inflight: Set[asyncio.Task] = set()
+        # Чати, у які зараз іде відправка
+        self._busy: Set[ChatId] = set()
+
+    @property
+    def depth(self) -> int:
+        return len(self._jobs)
+
+    async def send(self, chat_id: ChatId, send: Callable[[], Awaitable[Any]],
+                   priority: int = PRIORITY_BREAKING) -> Any:
+        """Поставити send() у чергу й дочекатися результату (або помилки) відправки"""
+        return await self.submit(chat_id, send, priority)
+
+    def submit(self, chat_id: ChatId, send: Callable[[], Awaitable[Any]],
+               priority: int = PRIORITY_BREAKING) -> asyncio.Future:
+        self._ensure_worker()
+        loop = asyncio.get_running_loop()
+        job = _SendJob(priority, next(self._seq), chat_id, send, loop.create_future(), self.clock())
+        self._jobs.append(job)
+        SEND_QUEUE_DEPTH.set(len(self._jobs))
+        self._wakeup.set()
+        return job.future
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            # Задачі з іншого (вже закритого) event loop нікому віддати
+            self._jobs = [job for job in self._jobs if job.future.get_loop() is loop]
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._busy = set()
+            self._inflight = set()
+            self._task = loop.create_task(self._run())
+
+    def _chat_bucket(self, chat_id: ChatId, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst, now)
+        return bucket
+
+    def _next_job(self, now: float):
+        """Найпріоритетніша задача, яку можна відправити зараз, або час очікування.
+
+        Задачі чату, що вичерпав ліміт або ще чекає попередньої відправки,
+        не блокують інші чати.
+        """
+        best, wait = None, None
+        for job in self._jobs:
+            if job.chat_id in self._busy:
+                continue
+            delay = max(job.not_before - now, self._chat_bucket(job.chat_id, now).delay(now))
+            if delay <= 0:
+                if best is None or (job.priority, job.seq) < (best.priority, best.seq):
+                    best = job
+            elif wait is None or delay < wait:
+                wait = delay
+        if best is not None:
+            global_delay = self._global.delay(now)
+            if global_delay > 0:
+                return None, global_delay
+        return best, wait
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            now = self.clock()
+            job, wait = self._next_job(now)
+            if job is None:
+                self._slots.release()
+                self._wakeup.clear()
+                try:
+                    async with asyncio.timeout(wait):
+                        await self._wakeup.wait()
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self._jobs.remove(job)
+            SEND_QUEUE_DEPTH.set(len(self._jobs))
+            if job.future.cancelled():
+                self._slots.release()
+                continue
+            self._global.take(now)
+            self._chat_bucket(job.chat_id, now).take(now)
+            self._busy.add(job.chat_id)
+            task = asyncio.create_task(self._execute(job, now))
+            self._inflight.add(task)
+            task.add_done_callback(lambda task, chat_id=job.chat_id: self._finished(task, chat_id))
+
+    def _finished(self, task: asyncio.Task, chat_id: ChatId):
+        self._inflight.discard(task)
+        self._busy.discard(chat_id)
+        self._slots.release()
+        self._wakeup.set()
+
+    async def _execute(self, job: _SendJob, started: float):
+        try:
+            result = await job.send()
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.set_exception(QueueStopped("send queue stopped during the send"))
+            raise
+        except Exception as e:
+            if TelegramRetryAfter is not None and isinstance(e, TelegramRetryAfter) \
+                    and job.retries < self.max_retry_after:
+                self._requeue(job, e.retry_after)
+                return
+            self.stats["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+            return
+        self.stats["sent"] += 1
+        SEND_QUEUE_WAIT.observe(started - job.enqueued_at)
+        if not job.future.done():
+            job.future.set_result(result)
+
+    def _requeue(self, job: _SendJob, retry_after: float):
+        """429: чат мовчить стільки, скільки сказав сервер, задача повертається в чергу"""
+        now = self.clock()
+        until = now + retry_after
+        self._chat_bucket(job.chat_id, now).pause_until(until)
+        job.not_before = until
+        job.retries += 1
+        self._jobs.append(job)
+        self.stats["retry_after"] += 1
+        SEND_RETRY_AFTER.inc()
+        SEND_QUEUE_DEPTH.set(len(self._jobs))
+        logger.warning("telegram_retry_after", chat_id=job.chat_id, retry_after=retry_after, retries=job.retries)
+
+    async def stop(self):
+        tasks = list(self._inflight)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        # Ті, хто чекає send(), отримують помилку, а не висять до кінця процесу
+        for job in self._jobs:
+            if not job.future.done():
+                job.future.set_exception(QueueStopped("send queue stopped"))
+        if self._jobs:
+            logger.warning("send_queue_dropped", jobs=len(self._jobs))
+        self._jobs = []
+        SEND_QUEUE_DEPTH.set(0)
@@ -1,9 +1,11 @@
 import json
 import re
+from time import perf_counter
 from typing import List
 import openai
 import google.generativeai as genai
 import structlog
+from app.metrics import LLM_COST, LLM_LATENCY, LLM_REQUESTS
 from app.models import NewsItem, SummarySchema
 from app.config import settings
 
@@ -22,6 +24,9 @@ class Summarizer:
         genai.configure(api_key=settings.GOOGLE_API_KEY)
         self.gemini_model = genai.GenerativeModel('gemini-1.5-flash')
         self.gemini_temperature = getattr(settings, 'GEMINI_TEMPERATURE', 0.2)
+        
+        # Помилки поспіль по провайдеру — для /readyz
+        self.failures = {"gemini": 0, "openai": 0}
     
     async def process_batch(self, items: List[NewsItem]) -> List[NewsItem]:
         """Обработать пакет новостей"""
@@ -30,15 +35,17 @@ class Summarizer:
             try:
                 # Сначала пробуем Gemini
                 try:
-                    summary = await self._process_with_gemini(item)
+                    summary = await self._call("gemini", self._process_with_gemini, item)
                     item.llm_model = "gemini-1.5-flash"
                     item.cost_usd = 0.0001  # примерная оценка
+                    LLM_COST.labels(model="gemini").inc(item.cost_usd)
                 except Exception as e:
                     logger.warning("gemini_failed", error=str(e), url=item.url)
                     # Если Gemini не справился, пробуем OpenAI
-                    summary = await self._process_with_openai(item)
+                    summary = await self._call("openai", self._process_with_openai, item)
                     item.llm_model = "openai"
                     item.cost_usd = 0.002  # примерная оценка
+                    LLM_COST.labels(model="openai").inc(item.cost_usd)
                 
                 item.summary = summary.summary
                 item.why_matters = summary.why
@@ -49,6 +56,21 @@ class Summarizer:
                 continue
         return results
 
+    async def _call(self, provider: str, process, item: NewsItem) -> SummarySchema:
+        """Запит до провайдера з лічильником помилок поспіль і метриками llm_*"""
+        started = perf_counter()
+        try:
+            summary = await process(item)
+        except Exception:
+            self.failures[provider] += 1
+            LLM_REQUESTS.labels(model=provider, status="error").inc()
+            raise
+        finally:
+            LLM_LATENCY.labels(model=provider).observe(perf_counter() - started)
+        self.failures[provider] = 0
+        LLM_REQUESTS.labels(model=provider, status="ok").inc()
+        return summary
+
     async def _process_with_gemini(self, item: NewsItem) -> SummarySchema:
         """Обработать новость через Gemini"""
         prompt = self._create_prompt(item)
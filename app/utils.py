@@ -1,5 +1,9 @@
 import re
 import hashlib
+import zlib
+from datetime import datetime
+from typing import Optional, overload
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from langdetect import detect_langs
 import logging
 
@@ -8,6 +12,25 @@ MARKDOWN_PATTERN = re.compile(r'([*_~`\[\](){}<>#=|])')
 
 STOP_WORDS = ["about", "tags", "sponsor"]
 
+# Параметри, що не впливають на зміст сторінки (трекінг, реферали)
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "ref_url", "via", "si", "_ga", "_hsenc", "_hsmi", "spm", "cmpid",
+})
+TRACKING_PREFIXES = ("utm_", "at_", "pk_", "hmb_")
+
+# Альтернативні хости одного сайту
+HOST_ALIASES = {
+    "old.reddit.com": "reddit.com",
+    "new.reddit.com": "reddit.com",
+    "np.reddit.com": "reddit.com",
+    "m.reddit.com": "reddit.com",
+    "m.youtube.com": "youtube.com",
+    "mobile.twitter.com": "x.com",
+    "twitter.com": "x.com",
+    "export.arxiv.org": "arxiv.org",
+}
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,6 +65,90 @@ def detect_language(text: str) -> tuple[str, float]:
     return 'unknown', 0.0
 
 
+def compress_text(text: str) -> bytes:
+    """Стиснути текст для зберігання в БД (zlib)."""
+    return zlib.compress(text.encode('utf-8'), 6)
+
+
+def decompress_text(data: bytes) -> str:
+    """Розпакувати текст, стиснутий compress_text."""
+    return zlib.decompress(data).decode('utf-8') if data else ''
+
+
+@overload
+def naive_local(moment: datetime) -> datetime: ...
+@overload
+def naive_local(moment: None) -> None: ...
+def naive_local(moment: Optional[datetime]) -> Optional[datetime]:
+    """Дата без часового поясу; aware-дати переводяться в локальний час."""
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
 def url_hash(url: str) -> str:
     """Повертає sha256-хеш для url."""
-    return hashlib.sha256(url.encode('utf-8')).hexdigest() 
\ No newline at end of file
+    return hashlib.sha256(url.encode('utf-8')).hexdigest() 
+
+
+def _canonical_youtube(host: str, path: str, params: list) -> tuple:
+    # youtu.be/<id> і youtube.com/watch?v=<id> — одне відео; решта параметрів зайві
+    if host == "youtu.be":
+        return "youtube.com", "/watch", [("v", path.strip("/"))]
+    return host, path, [(k, v) for k, v in params if k == "v"]
+
+
+def _canonical_arxiv(host: str, path: str, params: list) -> tuple:
+    # /pdf/<id>.pdf і /abs/<id> — одна стаття
+    if path.startswith("/pdf/"):
+        path = "/abs/" + path[len("/pdf/"):].removesuffix(".pdf")
+    return host, path, params
+
+
+def _canonical_without_query(host: str, path: str, params: list) -> tuple:
+    return host, path, []
+
+
+# Правила для окремих доменів: (host, path, params) -> (host, path, params)
+DOMAIN_RULES = {
+    "youtube.com": _canonical_youtube,
+    "youtu.be": _canonical_youtube,
+    "arxiv.org": _canonical_arxiv,
+    "reddit.com": _canonical_without_query,
+    "x.com": _canonical_without_query,
+}
+
+
+def canonicalize_url(url: str) -> str:
+    """Канонічна форма URL для дедуплікації.
+
+    https замість http, хост у нижньому регістрі без www. і стандартного порту,
+    без фрагмента, трекінг-параметрів і кінцевого слеша; решта параметрів
+    відсортована. Для окремих доменів діють правила з DOMAIN_RULES.
+    """
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return url.strip()
+    scheme = "https" if parts.scheme.lower() in ("http", "https") else parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    host = host.removeprefix("www.")
+    host = HOST_ALIASES.get(host, host)
+    params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+    rule = DOMAIN_RULES.get(host)
+    if rule:
+        host, path, params = rule(host, path, params)
+    return urlunsplit((scheme, host, path, urlencode(sorted(params)), ""))
+
+
+def url_key(url: str) -> int:
+    """Компактний ключ новини: перші 8 байт url_hash канонічного URL як signed int64.
+
+    Поміщається в INTEGER SQLite; колізії на мільйонах URL практично неможливі.
+    """
+    return int.from_bytes(bytes.fromhex(url_hash(canonicalize_url(url))[:16]), "big", signed=True)
@@ -0,0 +1,91 @@
+"""Розмір БД і латентність запитів дедупу та дайджесту на місяці даних:
+тексти в news_items (стара схема) vs стиснуті тексти в news_content.
+
+    python -m benchmarks.content_split [новин_на_день]
+"""
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.db import Database
+from app.migrations import _base_schema, _published_index
+from app.models import NewsItem
+
+WORDS = (
+    "model data training release open source research startup funding bitcoin "
+    "market regulation chip inference agent benchmark policy security cloud "
+    "language vision robot token price launch update paper team company"
+).split()
+
+
+def month_of_news(per_day: int, days: int = 30) -> list[NewsItem]:
+    rng = random.Random(42)
+    now = datetime.now()
+    items = []
+    for n in range(per_day * days):
+        body = " ".join(rng.choice(WORDS) for _ in range(500))[:4000]
+        items.append(NewsItem(
+            url=f"https://example.com/{n}",
+            title=" ".join(rng.choice(WORDS) for _ in range(8)),
+            source_id=f"source_{n % 7}",
+            published=now - timedelta(minutes=n * 24 * 60 / per_day),
+            content=body,
+            lang="en",
+            impact=1 + n % 5,
+            summary="Summary " * 20,
+            why_matters="Why it matters " * 10,
+        ))
+    return items
+
+
+def timed(fn, repeat: int = 50) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def inline_layout(path: Path, items: list[NewsItem]) -> dict:
+    conn = sqlite3.connect(path)
+    _base_schema(conn)
+    _published_index(conn)
+    conn.executemany(
+        "INSERT INTO news_items (url, title, source_id, published, content, lang, impact, summary, why_matters) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(i.url, i.title, i.source_id, i.published, i.content, i.lang, i.impact, i.summary, i.why_matters)
+         for i in items]
+    )
+    conn.commit()
+    hour_ago = datetime.now() - timedelta(hours=1)
+    result = {
+        "dedup_ms": timed(lambda: conn.execute(
+            "SELECT * FROM news_items WHERE published >= ?", (hour_ago,)).fetchall()),
+        "digest_ms": timed(lambda: conn.execute(
+            "SELECT * FROM news_items WHERE sent = 0 ORDER BY impact DESC, published DESC LIMIT 10").fetchall()),
+    }
+    conn.close()
+    result["size_mb"] = round(path.stat().st_size / 2**20, 2)
+    return result
+
+
+def split_layout(path: Path, items: list[NewsItem]) -> dict:
+    database = Database(f"sqlite:///{path}")
+    database.add_news_items(items)
+    database.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    result = {
+        "dedup_ms": timed(lambda: database.get_recent_titles(minutes=60)),
+        "digest_ms": timed(lambda: database.get_unsent_news()),
+    }
+    database.close()
+    result["size_mb"] = round(path.stat().st_size / 2**20, 2)
+    return result
+
+
+if __name__ == "__main__":
+    items = month_of_news(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
+    with tempfile.TemporaryDirectory() as tmp:
+        print("inline:", inline_layout(Path(tmp) / "inline.db", items))
+        print("split: ", split_layout(Path(tmp) / "split.db", items))
@@ -0,0 +1,50 @@
+"""Порівняння швидкості вставки: по одній новині vs add_news_items.
+
+    python -m benchmarks.db_inserts [кількість]
+"""
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from app.db import Database
+from app.models import NewsItem
+
+
+def synthetic_items(count: int, prefix: str) -> list[NewsItem]:
+    now = datetime.now()
+    return [
+        NewsItem(
+            url=f"https://example.com/{prefix}/{n}",
+            title=f"Synthetic news {n}",
+            source_id="bench",
+            published=now - timedelta(minutes=n),
+            content="Lorem ipsum dolor sit amet " * 20,
+            lang="en",
+            impact=1 + n % 5,
+        )
+        for n in range(count)
+    ]
+
+
+def bench(count: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite:///{Path(tmp) / 'bench.db'}")
+
+        items = synthetic_items(count, "single")
+        start = time.perf_counter()
+        for item in items:
+            database.add_news_item(item)
+        single = count / (time.perf_counter() - start)
+
+        items = synthetic_items(count, "bulk")
+        start = time.perf_counter()
+        database.add_news_items(items)
+        bulk = count / (time.perf_counter() - start)
+
+        database.close()
+    return {"items": count, "single_per_sec": round(single), "bulk_per_sec": round(bulk)}
+
+
+if __name__ == "__main__":
+    print(bench(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,43 @@
+"""Декодування рядків news_items у NewsItem: валідація pydantic
+(NewsItem(**dict(row))) vs пряме складання моделі (app.db._row_decoder).
+
+Рядки вибираються один раз, тож час і памʼять — лише на декодування.
+
+    python -m benchmarks.read_model [кількість_рядків]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from app.db import Database, _SELECT_NEWS, _row_decoder
+from app.models import NewsItem
+from benchmarks.content_split import month_of_news
+
+
+def measure(decode, rows: list, repeat: int = 10) -> dict:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        [decode(row) for row in rows]
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    items = [decode(row) for row in rows]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return {"decode_ms": round(elapsed * 1000, 1), "allocated_mb": round(allocated / 2**20, 1)}
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite:///{Path(tmp) / 'read.db'}")
+        database.add_news_items(month_of_news(count // 30 + 1)[:count])
+        cursor = database.conn.execute(_SELECT_NEWS)
+        columns = tuple(column[0] for column in cursor.description)
+        cursor.row_factory = None
+        rows = cursor.fetchall()
+        database.close()
+    print(f"{len(rows)} rows")
+    print("validated:  ", measure(lambda row: NewsItem(content="", **dict(zip(columns, row))), rows))
+    print("constructed:", measure(_row_decoder(columns), rows))
@@ -0,0 +1,445 @@
+"""Офлайн-прогін усього конвеєра на записаних стрічках із симульованим часом.
+
+Для кожного джерела з config/sources.yml є касета в
+benchmarks/fixtures/replay/<id>.json: записи стрічки з моментом, коли вони
+зʼявилися (at, секунди від початку запису), і виміряні латентності
+відповідей. ReplayTransport віддає httpx-клієнту фетчерів стрічку такою,
+якою вона була в момент симульованого часу (останні window записів, ETag
+і 304), із латентністю з касети. FakeSummarizer замінює LLM. Симульований
+час іде дискретно — від одного опитування до наступного за розкладом
+джерел, тож години опитувань проходять за секунди.
+
+    python -m benchmarks.replay run --hours 6             # звіт про прогін
+    python -m benchmarks.replay run --hours 24 --scale 10 --json /tmp/replay.json
+    python -m benchmarks.replay record --minutes 60       # записати касети з мережі
+
+Латентність мережі й LLM не витрачає реального часу: вона додається до
+годинника стадій (app.metrics.perf_counter) лише в межах задачі, яка
+«чекала», тож перцентилі стадій містять і реальну роботу CPU/БД, і
+симульоване очікування.
+
+Дати публікації рендеряться відносно реального часу (now - вік запису в
+симуляції), тому вікна дедупу й ранжування в БД поводяться так само, як у
+живому процесі.
+"""
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import io
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from html import escape
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+import yaml
+
+CASSETTES = Path(__file__).parent / "fixtures" / "replay"
+
+# Слова для заголовків копій при --scale: копії не мають виглядати дублікатами
+_VOCABULARY = (
+    "model agent chip cloud funding policy robot vision speech token market exchange "
+    "regulator benchmark dataset inference training startup security privacy lawsuit "
+    "release upgrade partnership outage launch research paper compute energy"
+).split()
+
+# Симульоване очікування поточної задачі, секунди (список — щоб змінювати на місці)
+_waited: contextvars.ContextVar = contextvars.ContextVar("replay_waited")
+
+
+def _task_clock() -> float:
+    """perf_counter із симульованим очікуванням поточної задачі"""
+    holder = _waited.get(None)
+    return time.perf_counter() + (holder[0] if holder else 0.0)
+
+
+class SimClock:
+    """Симульований час від початку прогону"""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def advance_to(self, elapsed: float):
+        self.elapsed = max(self.elapsed, elapsed)
+
+    async def sleep(self, seconds: float):
+        """Очікування мережі чи LLM: реального часу не витрачає, але рахується задачі"""
+        holder = _waited.get(None)
+        if holder is not None:
+            holder[0] += seconds
+        await asyncio.sleep(0)
+
+
+@dataclass
+class Cassette:
+    source: str
+    type: str
+    url: str
+    span: float
+    window: int
+    latency_ms: List[float]
+    entries: List[dict]
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        return cls(**json.loads(path.read_text(encoding="utf-8")))
+
+    def expanded(self, hours: float, scale: int, rng: random.Random) -> List[dict]:
+        """Записи на весь прогін: касета повторюється по колу, --scale множить потік"""
+        entries = []
+        loops = int(hours * 3600 // self.span) + 1
+        for loop in range(loops):
+            for entry in self.entries:
+                for copy in range(scale):
+                    if loop == 0 and copy == 0:
+                        entries.append(entry)
+                        continue
+                    at = entry["at"] + loop * self.span
+                    title = entry["title"]
+                    if copy:
+                        # Копії — окремі новини: свій час у межах години й незвʼязаний заголовок
+                        at += rng.uniform(0, 3600)
+                        title = " ".join(rng.sample(_VOCABULARY, 7))
+                    link = f"{entry['link'].rstrip('/')}/r{loop}-{copy}"
+                    entries.append({**entry, "at": at, "link": link, "title": title})
+        entries.sort(key=lambda entry: entry["at"])
+        return entries
+
+
+def _render_rss(cassette: Cassette, visible: List[dict], now: datetime, elapsed: float) -> bytes:
+    items = "".join(
+        f"<item><title>{escape(entry['title'])}</title><link>{escape(entry['link'])}</link>"
+        f"<guid>{escape(entry['link'])}</guid>"
+        f"<pubDate>{format_datetime(now - timedelta(seconds=elapsed - entry['at']))}</pubDate>"
+        f"<description>{escape(entry['body'])}</description></item>"
+        for entry in visible
+    )
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>{cassette.source}</title><link>{escape(cassette.url)}</link>{items}</channel></rss>").encode()
+
+
+def _render_scrap(cassette: Cassette, visible: List[dict], now: datetime, elapsed: float) -> bytes:
+    rows = "".join(
+        f'<article class="Box-row"><h2><a href="{escape(entry["link"])}">{escape(entry["title"])}</a></h2>'
+        f"<p>{escape(entry['body'])}</p></article>"
+        for entry in visible
+    )
+    return f"<html><body>{rows}</body></html>".encode()
+
+
+def _render_api(cassette: Cassette, visible: List[dict], now: datetime, elapsed: float) -> bytes:
+    return json.dumps({"tools": [
+        {"url": entry["link"], "name": entry["title"], "description": entry["body"],
+         "createdAt": (now - timedelta(seconds=elapsed - entry["at"])).isoformat()}
+        for entry in visible
+    ]}).encode()
+
+
+RENDERERS = {"rss": _render_rss, "scrap": _render_scrap, "api": _render_api}
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Відповіді з касет замість мережі, з ETag/304 і записаними латентностями"""
+
+    def __init__(self, cassettes: Dict[str, Cassette], clock: SimClock, hours: float, scale: int = 1,
+                 seed: int = 1):
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.cassettes = {cassette.url: cassette for cassette in cassettes.values()}
+        self.entries = {url: cassette.expanded(hours, scale, self.rng) for url, cassette in self.cassettes.items()}
+        self.stats = {"requests": 0, "not_modified": 0, "entries_served": 0, "entries_visible": 0}
+
+    def visible(self, url: str) -> List[dict]:
+        """Стрічка в поточний момент: останні window записів, новіші першими"""
+        cassette = self.cassettes[url]
+        entries = [entry for entry in self.entries[url] if entry["at"] <= self.clock.elapsed]
+        return entries[-cassette.window:][::-1]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        cassette = self.cassettes.get(url)
+        if cassette is None:
+            return httpx.Response(404, request=request)
+        await self.clock.sleep(self.rng.choice(cassette.latency_ms) / 1000)
+        visible = self.visible(url)
+        self.stats["requests"] += 1
+        self.stats["entries_visible"] += len(visible)
+        etag = f'"{cassette.source}-{visible[0]["link"] if visible else ""}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.stats["not_modified"] += 1
+            return httpx.Response(304, headers={"ETag": etag}, request=request)
+        self.stats["entries_served"] += len(visible)
+        body = RENDERERS[cassette.type](cassette, visible, datetime.now(), self.clock.elapsed)
+        return httpx.Response(200, headers={"ETag": etag}, content=body, request=request)
+
+
+class FakeSummarizer:
+    """Детермінований замінник LLM із симульованою латентністю на виклик"""
+
+    def __init__(self, clock: SimClock, latency: tuple = (0.4, 1.8), seed: int = 1):
+        self.clock = clock
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.failures = {"replay": 0}
+        self.calls = 0
+
+    async def process_batch(self, items):
+        for item in items:
+            await self.clock.sleep(self.rng.uniform(*self.latency))
+            self.calls += 1
+            digest = zlib.crc32(item.url.encode())
+            item.summary = f"Summary of {item.title}"
+            item.why_matters = "Replay run"
+            item.impact = 1 + digest % 5
+            item.llm_model = "replay"
+            item.cost_usd = 0.0
+        return items
+
+
+class CountingPublisher:
+    """Замість Telegram: рахує пости"""
+
+    def __init__(self):
+        self.posts = 0
+
+    async def send_breaking_news(self, item, channel=None):
+        self.posts += 1
+
+    async def send_breaking_batch(self, items, channel=None):
+        self.posts += 1
+
+    async def send_digest_messages(self, messages, channels=None):
+        self.posts += len(messages)
+
+
+@dataclass
+class _Samples:
+    """Сирі спостереження StageHistogram на час прогону — для точних перцентилів"""
+    by_series: Dict[int, List[float]] = field(default_factory=dict)
+
+    @contextlib.contextmanager
+    def capture(self):
+        import app.metrics as metrics
+        original_observe, original_clock = metrics._Series.observe, metrics.perf_counter
+        samples = self.by_series
+
+        def observe(series, value):
+            samples.setdefault(id(series), []).append(value)
+            original_observe(series, value)
+
+        metrics._Series.observe, metrics.perf_counter = observe, _task_clock
+        try:
+            yield
+        finally:
+            metrics._Series.observe, metrics.perf_counter = original_observe, original_clock
+
+    def by_stage(self) -> Dict[str, List[float]]:
+        from app.metrics import PIPELINE_STAGE
+        stages: Dict[str, List[float]] = {}
+        for (stage, _), series in PIPELINE_STAGE._series.items():
+            stages.setdefault(stage, []).extend(self.by_series.get(id(series), []))
+        return stages
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def _db_size(db_path: Path) -> int:
+    """Логічний розмір БД (page_count * page_size).
+
+    Сума розмірів файлів не годиться: -wal і -shm зникають після checkpoint
+    при закритті, і приріст виходив відʼємним.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        (page_count,) = conn.execute("PRAGMA page_count").fetchone()
+        (page_size,) = conn.execute("PRAGMA page_size").fetchone()
+    finally:
+        conn.close()
+    return page_count * page_size
+
+
+def load_cassettes(sources) -> Dict[str, Cassette]:
+    cassettes = {}
+    for source in sources:
+        path = CASSETTES / f"{source.id}.json"
+        if not path.exists():
+            raise FileNotFoundError(f"no cassette for source {source.id}: {path}")
+        cassettes[source.id] = Cassette.load(path)
+    return cassettes
+
+
+async def replay(hours: float = 6.0, scale: int = 1, seed: int = 1, workdir: Optional[Path] = None) -> dict:
+    from app.async_db import AsyncDatabase
+    from app.scheduler import NewsScheduler
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(workdir or tmp) / "replay.db"
+        storage = AsyncDatabase(f"sqlite:///{db_path}")
+        storage.start()
+        clock = SimClock()
+        summarizer = FakeSummarizer(clock, seed=seed)
+        publisher = CountingPublisher()
+        scheduler = NewsScheduler(storage, publisher=publisher, summarizer=summarizer)
+        sources = [source for source in scheduler.sources if source.active]
+        transport = ReplayTransport(load_cassettes(sources), clock, hours, scale=scale, seed=seed)
+        scheduler.http = httpx.AsyncClient(transport=transport)
+        size_before = _db_size(db_path)
+
+        # Розклад як у APScheduler: кожне джерело раз на interval хвилин
+        horizon = hours * 3600
+        ticks: Dict[float, list] = {}
+        for source in sources:
+            step = source.interval * 60
+            for n in range(int(horizon // step) + 1):
+                ticks.setdefault(n * step, []).append(source)
+
+        async def poll(source):
+            _waited.set([0.0])
+            await scheduler.process_source(source)
+
+        samples = _Samples()
+        started = time.perf_counter()
+        with samples.capture(), contextlib.redirect_stdout(io.StringIO()):
+            for at in sorted(ticks):
+                clock.advance_to(at)
+                await asyncio.gather(*(asyncio.ensure_future(poll(source)) for source in ticks[at]))
+                # Доставка з outbox; вікно склейки рахуємо вже минулим
+                await scheduler.delivery.run_once(
+                    now=datetime.now() + timedelta(seconds=scheduler.delivery.coalesce_seconds)
+                )
+            while await scheduler.delivery.run_once(
+                now=datetime.now() + timedelta(seconds=scheduler.delivery.coalesce_seconds)
+            ):
+                pass
+        wall = time.perf_counter() - started
+
+        items = (await storage.get_stats_since(datetime.now() - timedelta(days=365 * 10)))["total"]
+        await scheduler.http.aclose()
+        storage.close()
+        size_after = _db_size(db_path)
+
+    stages = samples.by_stage()
+    return {
+        "simulated_hours": hours,
+        "scale": scale,
+        "wall_seconds": round(wall, 2),
+        "speedup": round(horizon / wall) if wall else None,
+        "polls": transport.stats["requests"],
+        "not_modified": transport.stats["not_modified"],
+        "entries_fetched": transport.stats["entries_served"],
+        "items_stored": items,
+        "items_per_sec": round(items / wall, 1) if wall else None,
+        "entries_per_sec": round(transport.stats["entries_served"] / wall, 1) if wall else None,
+        "llm_calls": summarizer.calls,
+        # Без ETag/304 і фільтра відомих URL кожен видимий запис ішов би в LLM
+        "llm_calls_avoided": transport.stats["entries_visible"] - summarizer.calls,
+        "posts": publisher.posts,
+        "db_bytes_before": size_before,
+        "db_bytes_after": size_after,
+        "db_bytes_per_item": round((size_after - size_before) / items) if items else None,
+        "stages_ms": {
+            stage: {
+                "count": len(values),
+                "p50": round(percentile(values, 0.50) * 1000, 2),
+                "p95": round(percentile(values, 0.95) * 1000, 2),
+                "p99": round(percentile(values, 0.99) * 1000, 2),
+            }
+            for stage, values in sorted(stages.items()) if values
+        },
+    }
+
+
+def _active_sources() -> list:
+    from app.config import settings
+    from app.models import Source
+
+    with open(settings.SOURCES_FILE) as f:
+        return [Source(**source) for source in yaml.safe_load(f)["sources"] if source.get("active", True)]
+
+
+def _save_cassettes(cassettes: Dict[str, dict], out: Path):
+    out.mkdir(parents=True, exist_ok=True)
+    for source_id, cassette in cassettes.items():
+        (out / f"{source_id}.json").write_text(json.dumps(cassette, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+async def record(minutes: float, out: Path = CASSETTES):
+    """Записати касети з мережі: опитувати джерела за їхнім розкладом і
+    зберігати нові записи з моментом появи та латентності відповідей"""
+    from app.scheduler import FETCHER_MAP
+
+    sources = await asyncio.to_thread(_active_sources)
+    cassettes = {source.id: {"source": source.id, "type": source.type, "url": source.url, "span": minutes * 60,
+                             "window": 0, "latency_ms": [], "entries": []} for source in sources}
+    seen = {source.id: set() for source in sources}
+    started = time.monotonic()
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        while time.monotonic() - started < minutes * 60:
+            elapsed = time.monotonic() - started
+            for source in sources:
+                cassette = cassettes[source.id]
+                polls = len(cassette["latency_ms"])
+                if elapsed < polls * source.interval * 60:
+                    continue
+                fetcher = FETCHER_MAP[source.type](source, client=client)
+                request_started = time.monotonic()
+                items = await fetcher.fetch()
+                cassette["latency_ms"].append(round((time.monotonic() - request_started) * 1000))
+                cassette["window"] = max(cassette["window"], len(items))
+                for item in items:
+                    if item.url not in seen[source.id]:
+                        seen[source.id].add(item.url)
+                        # Записи першого опитування вважаємо такими, що вже були в стрічці
+                        cassette["entries"].append({"at": round(elapsed) if polls else 0, "link": item.url,
+                                                    "title": item.title, "body": item.content})
+            await asyncio.sleep(5)
+    await asyncio.to_thread(_save_cassettes, cassettes, out)
+    print(f"recorded {sum(len(c['entries']) for c in cassettes.values())} entries to {out}")
+
+
+def _print_report(report: dict):
+    for key, value in report.items():
+        if key != "stages_ms":
+            print(f"{key:<20} {value}")
+    print(f"{'stage':<12} {'count':>7} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for stage, row in report["stages_ms"].items():
+        print(f"{stage:<12} {row['count']:>7} {row['p50']:>10} {row['p95']:>10} {row['p99']:>10}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="прогнати конвеєр на касетах")
+    run_parser.add_argument("--hours", type=float, default=6.0, help="симульований час")
+    run_parser.add_argument("--scale", type=int, default=1, help="у скільки разів збільшити потік новин")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--json", type=Path, help="зберегти звіт у JSON")
+    record_parser = commands.add_parser("record", help="записати касети з мережі")
+    record_parser.add_argument("--minutes", type=float, default=60.0)
+    record_parser.add_argument("--out", type=Path, default=CASSETTES)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        asyncio.run(record(args.minutes, args.out))
+        return 0
+    report = asyncio.run(replay(args.hours, scale=args.scale, seed=args.seed))
+    _print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""Пошук: FTS5 (search_news) vs LIKE по title/summary/why_matters.
+
+    python -m benchmarks.search [кількість_новин]
+"""
+import sys
+import tempfile
+from pathlib import Path
+from app.db import Database
+from benchmarks.content_split import month_of_news, timed
+
+# Частий, рідкісний (кожна тисячна новина) і префіксний запити
+QUERIES = ("bitcoin", "zeppelin", "regulation chip", "agen*")
+
+
+def like_search(database: Database, query: str, limit: int = 10) -> list:
+    clauses, params = [], []
+    for term in query.rstrip("*").split():
+        clauses.append("(title LIKE ? OR summary LIKE ? OR why_matters LIKE ?)")
+        params += [f"%{term}%"] * 3
+    return database.conn.execute(
+        f"SELECT id FROM news_items WHERE {' AND '.join(clauses)} ORDER BY published DESC LIMIT ?", (*params, limit)
+    ).fetchall()
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    items = month_of_news(count // 30)
+    for item in items[::1000]:
+        item.title += " zeppelin"
+    with tempfile.TemporaryDirectory() as tmp:
+        database = Database(f"sqlite:///{Path(tmp) / 'search.db'}")
+        database.add_news_items(items)
+        for query in QUERIES:
+            print(f"{query!r:20} fts5: {timed(lambda query=query: database.search_news(query), 20):7.2f} ms"
+                  f"   like: {timed(lambda query=query: like_search(database, query), 20):7.2f} ms")
+        database.close()
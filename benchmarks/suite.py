@@ -0,0 +1,248 @@
+"""Мікробенчмарки гарячих функцій конвеєра з JSON-базою для порівняння.
+
+Вхідні дані — записані фікстури з benchmarks/fixtures (RSS-стрічка, тексти
+різними мовами, відповіді LLM) і БД на місяць синтетичних новин.
+
+    python -m benchmarks.suite                                  # прогнати й надрукувати
+    python -m benchmarks.suite --save benchmarks/baseline.json  # зберегти базу
+    python -m benchmarks.suite --compare benchmarks/baseline.json --threshold 0.15
+    python -m benchmarks.suite -k dedup -k db_                  # лише кейси з підрядком у назві
+
+У режимі --compare кейс, чий найкращий час гірший за базу більше ніж на
+threshold, вважається регресією, і процес завершується з кодом 1. Для
+порівняння береться мінімум із повторів — він найменше залежить від шуму.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+# name -> setup(workdir) -> функція без аргументів, яку заміряємо
+CASES: Dict[str, Callable[[Path], Callable[[], object]]] = {}
+
+
+def case(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def _feed_items():
+    import feedparser
+    from app.models import NewsItem
+    feed = feedparser.parse(_fixture("feed.xml"))
+    return [
+        NewsItem(url=entry.link, title=entry.title, source_id="bench", published=datetime(*entry.published_parsed[:6]),
+                 content=entry.summary, lang="en", impact=3)
+        for entry in feed.entries
+    ]
+
+
+@case("clean_text")
+def _clean_text(workdir: Path):
+    from app.utils import clean_text
+    texts = list(json.loads(_fixture("texts.json")).values())
+    return lambda: [clean_text(text) for text in texts]
+
+
+@case("detect_language")
+def _detect_language(workdir: Path):
+    from app.utils import detect_language
+    text = json.loads(_fixture("texts.json"))["uk"]
+    return lambda: detect_language(text)
+
+
+@case("rss_clean_html")
+def _rss_clean_html(workdir: Path):
+    from app.fetchers.rss import RSSFetcher
+    html = json.loads(_fixture("texts.json"))["html"]
+    return lambda: RSSFetcher._clean_html(None, html)
+
+
+@case("feedparser_parse")
+def _feedparser_parse(workdir: Path):
+    import feedparser
+    feed = _fixture("feed.xml")
+    return lambda: feedparser.parse(feed)
+
+
+@case("calculate_similarity")
+def _calculate_similarity(workdir: Path):
+    from app.scheduler import NewsScheduler
+    titles = [item.title for item in _feed_items()]
+    return lambda: NewsScheduler._calculate_similarity(None, titles[0], titles[1])
+
+
+@case("is_duplicate")
+def _is_duplicate(workdir: Path):
+    from app.scheduler import NewsScheduler
+    items = _feed_items()
+    # Гірший випадок: новина не дублікат, тож перебираються всі заголовки за годину
+    recent = [item.title for item in items[1:]] * 5
+    checker = NewsScheduler.__new__(NewsScheduler)
+    checker.duplicate_stats = {"total": 0, "duplicates": 0}
+    probe = items[0].model_copy(update={"title": "A completely unrelated headline about gardening"})
+    return lambda: checker._is_duplicate(probe, recent)
+
+
+@case("parse_llm_response")
+def _parse_llm_response(workdir: Path):
+    from app.summarizer import Summarizer
+    responses = list(json.loads(_fixture("llm_responses.json")).values())
+    return lambda: [Summarizer._parse_llm_response(None, response) for response in responses]
+
+
+@case("ranker_calculate_score")
+def _ranker_calculate_score(workdir: Path):
+    from app.ranker import Ranker
+    items = _feed_items()
+    return lambda: [Ranker.calculate_score(item) for item in items]
+
+
+def _database(workdir: Path):
+    from app.db import Database
+    from benchmarks.content_split import month_of_news
+    path = workdir / "bench.db"
+    if not path.exists():
+        database = Database(f"sqlite:///{path}")
+        database.add_news_items(month_of_news(30))
+        database.close()
+    return Database(f"sqlite:///{path}")
+
+
+@case("db_add_news_items")
+def _db_add_news_items(workdir: Path):
+    database = _database(workdir)
+    items = _feed_items()
+    batch = iter(range(10**9))
+
+    def write():
+        n = next(batch)
+        database.add_news_items([
+            item.model_copy(update={"url": f"{item.url}?b={n}", "id": None}) for item in items
+        ])
+    return write
+
+
+@case("db_get_known_urls")
+def _db_get_known_urls(workdir: Path):
+    database = _database(workdir)
+    urls = [item.url for item in database.get_recent_news(minutes=60 * 24 * 3)][:40]
+    urls += [f"https://example.com/unknown/{n}" for n in range(40)]
+    return lambda: database.get_known_urls(urls)
+
+
+@case("db_get_unsent_news")
+def _db_get_unsent_news(workdir: Path):
+    database = _database(workdir)
+    return lambda: database.get_unsent_news(limit=10)
+
+
+@case("db_get_recent_titles")
+def _db_get_recent_titles(workdir: Path):
+    database = _database(workdir)
+    return lambda: database.get_recent_titles(minutes=60 * 24)
+
+
+@case("db_search_news")
+def _db_search_news(workdir: Path):
+    database = _database(workdir)
+    return lambda: database.search_news("model release", limit=10)
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> dict:
+    """Час одного виклику fn у мікросекундах: мінімум і медіана з repeat серій"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = [elapsed / number * 1e6 for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {"min_us": round(min(runs), 3), "median_us": round(statistics.median(runs), 3), "loops": number}
+
+
+def run(selected: Optional[List[str]] = None, repeat: int = 5) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, setup in CASES.items():
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+            fn = setup(Path(tmp))
+            # Фолбек парсера LLM друкує в stdout — не засмічуємо звіт
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn()
+                results[name] = measure(fn, repeat=repeat)
+            print(f"{name:<26} {results[name]['min_us']:>12.3f} us  (median {results[name]['median_us']:.3f})",
+                  file=sys.stderr)
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[dict]:
+    """Порівняти min_us кейсів, які є в обох прогонах; повертає рядки звіту"""
+    report = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = result["min_us"] / base["min_us"] if base["min_us"] else 1.0
+        status = "regression" if ratio > 1 + threshold else "improved" if ratio < 1 - threshold else "ok"
+        report.append({"case": name, "baseline_us": base["min_us"], "current_us": result["min_us"],
+                       "ratio": round(ratio, 3), "status": status})
+    return report
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "commit": commit, "created_at": datetime.now().isoformat(timespec="seconds")}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-k", dest="select", action="append", help="запускати лише кейси з цим підрядком")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", type=Path, help="зберегти результати як JSON-базу")
+    parser.add_argument("--compare", type=Path, help="порівняти з JSON-базою")
+    parser.add_argument("--threshold", type=float, default=0.15, help="допустиме сповільнення (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args.select, repeat=args.repeat)
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({"environment": _environment(), "results": results}, indent=2) + "\n")
+    if not args.compare:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    baseline = json.loads(args.compare.read_text())
+    report = compare(results, baseline["results"], args.threshold)
+    for row in report:
+        print(f"{row['case']:<26} {row['baseline_us']:>12.3f} -> {row['current_us']:>12.3f} us"
+              f"  x{row['ratio']:<6} {row['status']}")
+    regressions = [row["case"] for row in report if row["status"] == "regression"]
+    if regressions:
+        print(f"regressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
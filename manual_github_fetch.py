@@ -1,7 +1,7 @@
 import asyncio
 from app.fetchers.github import GitHubTrendingFetcher
 from app.models import Source
-from app.db import db
+from app.async_db import create_storage
 
 async def main():
     source = Source(
@@ -14,17 +14,21 @@ async def main():
         weight=1,
         active=True
     )
-    fetcher = GitHubTrendingFetcher(source)
-    items = await fetcher.fetch()
-    print(f'Fetched: {len(items)}')
-    added = 0
-    for item in items:
-        if db.add_news_item(item):
-            print(f'Added: {item.title} | {item.url}')
-            added += 1
-        else:
-            print(f'Skipped (duplicate?): {item.title}')
-    await fetcher.close()
+    storage = create_storage()
+    fetcher = GitHubTrendingFetcher(source, storage=storage)
+    try:
+        items = await fetcher.fetch()
+        print(f'Fetched: {len(items)}')
+        added = 0
+        for item in items:
+            if await storage.add_news_item(item):
+                print(f'Added: {item.title} | {item.url}')
+                added += 1
+            else:
+                print(f'Skipped (duplicate?): {item.title}')
+    finally:
+        await fetcher.close()
+        await storage.aclose()
     print(f'Added to DB: {added}')
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+import pytest
+from app.db import Database
+from app.models import NewsItem
+from app.ranker import Ranker
+
+
+def make_item(n: int, impact: int = 1, hours_old: float = 0, **kwargs) -> NewsItem:
+    item = NewsItem(
+        url=f"https://example.com/news/{n}",
+        title=f"News {n}",
+        source_id=kwargs.pop("source_id", "test"),
+        published=datetime.now() - timedelta(hours=hours_old),
+        content="Test content",
+        lang="en",
+        impact=impact,
+        **kwargs
+    )
+    item.base_score = Ranker.calculate_base_score(item.impact)
+    return item
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Окрема SQLite-база для кожного тесту"""
+    db = Database(f"sqlite:///{tmp_path / 'test.db'}")
+    yield db
+    db.close()
@@ -1,17 +1,30 @@
 import pytest
 from fastapi.testclient import TestClient
+from app.config import settings
 from app.main import app
 from app.models import NewsItem
 from app.db import Database
 import json
 
 @pytest.fixture
-def client():
-    return TestClient(app)
+def db_url(tmp_path, monkeypatch):
+    # Застосунок і тест пишуть в окрему базу, а не в data.db репозиторію
+    url = f"sqlite:///{tmp_path / 'api.db'}"
+    monkeypatch.setattr(settings, "DB_URL", url)
+    return url
 
 @pytest.fixture
-def db():
-    return Database()
+def client(monkeypatch, db_url):
+    # Lifespan піднімає AppContext; polling Telegram у тестах не потрібен
+    monkeypatch.setattr(settings, "BOT_POLLING", False)
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture
+def db(db_url):
+    database = Database(db_url)
+    yield database
+    database.close()
 
 @pytest.fixture
 def sample_news():
@@ -33,6 +46,15 @@ def test_healthz_endpoint(client):
     assert "scheduler_jobs" in data
     assert "version" in data
 
+def test_livez_and_readyz(client):
+    """Liveness і readiness віддають знімок стану без звернень до БД"""
+    assert client.get("/livez").json() == {"status": "alive"}
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] in ("ready", "degraded")
+    assert data["components"]["db"]["ok"] is True
+
 def test_metrics_endpoint(client):
     """Тест metrics endpoint"""
     response = client.get("/metrics")
@@ -40,45 +62,78 @@ def test_metrics_endpoint(client):
     assert "news_processed_total" in response.text
     assert "news_impact" in response.text
 
-def test_news_processing(client, sample_news):
-    """Тест обработки новости"""
-    response = client.post(
+@pytest.fixture
+def ingest_client(monkeypatch, db_url):
+    # Без воркерів новини лишаються в черзі: перевіряємо саме API, без LLM
+    monkeypatch.setattr(settings, "BOT_POLLING", False)
+    monkeypatch.setattr(settings, "INGEST_WORKERS", 0)
+    with TestClient(app) as client:
+        yield client
+
+def test_news_processing(ingest_client, sample_news):
+    """Новина приймається в чергу конвеєра, відповідь — одразу з id"""
+    response = ingest_client.post(
         "/api/news",
         json=sample_news,
         headers={"Content-Type": "application/json"}
     )
-    assert response.status_code == 200
+    assert response.status_code == 202
     data = response.json()
-    assert "summary" in data
-    assert "why_matters" in data
-    assert "impact" in data
+    assert data["status"] == "queued"
+    assert len(data["id"]) == 64
+    assert ingest_client.app.state.context.ingest.queue.qsize() == 1
 
-def test_duplicate_handling(client, sample_news):
+def test_duplicate_handling(ingest_client, sample_news):
     """Тест обработки дубликатов"""
     # Отправляем первую новость
-    response1 = client.post(
+    response1 = ingest_client.post(
         "/api/news",
         json=sample_news,
         headers={"Content-Type": "application/json"}
     )
-    assert response1.status_code == 200
+    assert response1.status_code == 202
     
     # Отправляем ту же новость снова
-    response2 = client.post(
+    response2 = ingest_client.post(
         "/api/news",
         json=sample_news,
         headers={"Content-Type": "application/json"}
     )
     assert response2.status_code == 409  # Conflict
+    assert response2.json()["id"] == response1.json()["id"]
+
+def test_bulk_ingestion_and_backpressure(ingest_client, monkeypatch, sample_news):
+    """NDJSON: валідні рядки в черзі, решта — в invalid; повна черга — 429"""
+    queue = ingest_client.app.state.context.ingest.queue
+    monkeypatch.setattr(queue, "_maxsize", 3)
+    lines = [json.dumps({**sample_news, "url": f"https://example.com/bulk/{n}"}) for n in range(2)]
+    response = ingest_client.post("/api/news/bulk", content="\n".join(lines + ["{}"]),
+                                  headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 202
+    data = response.json()
+    assert data["accepted"] == 2 and len(data["ids"]) == 2
+    assert data["invalid"][0]["line"] == 3
+
+    lines = [json.dumps({**sample_news, "url": f"https://example.com/bulk/{n}"}) for n in range(2, 4)]
+    response = ingest_client.post("/api/news/bulk", content="\n".join(lines),
+                                  headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(settings.INGEST_RETRY_AFTER)
+    assert response.json()["resume_from_line"] == 1
+
+    assert ingest_client.post("/api/news", json={**sample_news, "url": "https://example.com/bulk/8"}).status_code == 202
+    response = ingest_client.post("/api/news", json={**sample_news, "url": "https://example.com/bulk/9"})
+    assert response.status_code == 429
+    assert response.json()["status"] == "rejected"
 
-def test_invalid_news_format(client):
+def test_invalid_news_format(ingest_client):
     """Тест обработки невалидного формата новости"""
     invalid_news = {
         "url": "invalid-url",
         "title": "Test News"
         # Отсутствуют обязательные поля
     }
-    response = client.post(
+    response = ingest_client.post(
         "/api/news",
         json=invalid_news,
         headers={"Content-Type": "application/json"}
@@ -95,4 +150,30 @@ async def test_scheduler_integration(db):
     
     # Проверяем, что задачи выполняются
     for job in jobs:
-        assert job.next_run_time is not None 
\ No newline at end of file
+        assert job.next_run_time is not None 
+
+
+def test_search_endpoint(client, db):
+    """Тест пошуку з пагінацією"""
+    db.add_news_items([
+        NewsItem(
+            url=f"https://example.com/search/{n}",
+            title=f"Searchable zeppelin story {n}",
+            source_id="test_source",
+            published="2024-03-20T12:00:00",
+            content="content",
+            lang="en",
+            impact=1
+        )
+        for n in range(3)
+    ])
+
+    response = client.get("/api/search", params={"q": "zeppelin", "per_page": 2})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["items"]) == 2
+    assert data["has_more"] is True
+
+    response = client.get("/api/search", params={"q": "zeppelin", "per_page": 2, "page": 2})
+    assert len(response.json()["items"]) == 1
+    assert response.json()["has_more"] is False
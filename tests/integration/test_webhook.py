@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from aiogram import Bot
+from aiogram.methods import SendMessage, SetWebhook
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.main import app
+
+SECRET = "s3cret-token"
+
+
+class FakeTelegram:
+    """Замість Bot API: записує викликані методи, повертає мінімальні відповіді"""
+
+    def __init__(self, delay: float = 0):
+        self.calls = []
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, method):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            self.calls.append(method)
+            return True if isinstance(method, SetWebhook) else None
+        finally:
+            self.in_flight -= 1
+
+
+def command_update(update_id: int, user_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1700000000,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}],
+        },
+    }
+
+
+@pytest.fixture
+def telegram(monkeypatch):
+    fake = FakeTelegram(delay=0.05)
+
+    async def call(bot, method, request_timeout=None):
+        return await fake(method)
+
+    monkeypatch.setattr(Bot, "__call__", call)
+    monkeypatch.setattr(settings, "WEBHOOK_URL", "https://bot.example.com/")
+    monkeypatch.setattr(settings, "WEBHOOK_SECRET", SECRET)
+    monkeypatch.setattr(settings, "RUN_SCHEDULER", False)
+    monkeypatch.setattr(settings, "ADMIN_IDS", '["42"]')
+    return fake
+
+
+def post_update(client, update, secret=SECRET):
+    return client.post(settings.WEBHOOK_PATH, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": secret})
+
+
+def test_webhook_registered_on_startup(telegram):
+    with TestClient(app):
+        pass
+
+    webhook = next(call for call in telegram.calls if isinstance(call, SetWebhook))
+    assert webhook.url == "https://bot.example.com" + settings.WEBHOOK_PATH
+    assert webhook.secret_token == SECRET
+    assert "message" in webhook.allowed_updates
+
+
+def test_rejects_wrong_secret(telegram):
+    with TestClient(app) as client:
+        assert post_update(client, command_update(1, 7, "/stats"), secret="nope").status_code == 401
+        assert client.post(settings.WEBHOOK_PATH, json=command_update(2, 7, "/stats")).status_code == 401
+
+    assert not any(isinstance(call, SendMessage) for call in telegram.calls)
+
+
+def test_rejects_malformed_update(telegram):
+    with TestClient(app) as client:
+        assert post_update(client, {"message": "not an update"}).status_code == 400
+
+
+def test_updates_processed_concurrently(telegram):
+    with TestClient(app) as client:
+        for update_id in range(5):
+            assert post_update(client, command_update(update_id, 7, "/stats")).status_code == 200
+
+    # Lifespan дочікується оброблюваних оновлень перед закриттям
+    replies = [call for call in telegram.calls if isinstance(call, SendMessage)]
+    assert len(replies) == 5
+    assert all(reply.chat_id == 7 and "доступу" in reply.text for reply in replies)
+    assert telegram.max_in_flight > 1
+
+
+def test_webhook_disabled_without_url(telegram, monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_URL", "")
+    monkeypatch.setattr(settings, "BOT_POLLING", False)
+    with TestClient(app) as client:
+        assert post_update(client, command_update(1, 7, "/stats")).status_code == 404
@@ -1,35 +1,56 @@
 from locust import HttpUser, task, between
+import json
 import random
+import uuid
+
+# Частка повторних URL: дублікати (409) — штатна відповідь, а не помилка
+DUPLICATE_RATE = 0.1
+BULK_SIZE = 20
+
+def make_news(url=None):
+    """Тестова новина в форматі POST /api/news"""
+    return {
+        "url": url or f"https://example.com/news/{uuid.uuid4().hex}",
+        "title": f"Test News {random.randint(1, 1000)}",
+        "content": "This is a test news content for load testing.",
+        "source_id": "test_source",
+        "published": "2024-03-20T12:00:00Z",
+        "lang": "en"
+    }
 
 class NewsBotUser(HttpUser):
     wait_time = between(1, 5)
-    
+
+    def on_start(self):
+        self.sent = []
+
     @task(3)
     def check_health(self):
-        """Проверка healthz endpoint"""
-        self.client.get("/healthz")
-    
+        """Проверка readiness endpoint (готовый снимок состояния)"""
+        self.client.get("/readyz")
+
     @task(1)
     def check_metrics(self):
         """Проверка метрик"""
         self.client.get("/metrics")
-    
+
     @task(2)
     def simulate_news_processing(self):
-        """Симуляция обработки новостей"""
-        # Генерируем тестовую новость
-        news = {
-            "url": f"https://example.com/news/{random.randint(1, 1000)}",
-            "title": f"Test News {random.randint(1, 1000)}",
-            "content": "This is a test news content for load testing.",
-            "source_id": "test_source",
-            "published": "2024-03-20T12:00:00Z",
-            "lang": "en"
-        }
-        
-        # Отправляем POST запрос
-        self.client.post(
-            "/api/news",
-            json=news,
-            headers={"Content-Type": "application/json"}
-        ) 
\ No newline at end of file
+        """Приймання новини: 202 — у черзі, 409 — дублікат, 429 — черга заповнена (помилка навантаження)"""
+        repeat = self.sent and random.random() < DUPLICATE_RATE
+        news = make_news(random.choice(self.sent) if repeat else None)
+        with self.client.post("/api/news", json=news, catch_response=True) as response:
+            if response.status_code in (202, 409):
+                response.success()
+                self.sent = (self.sent + [news["url"]])[-100:]
+            else:
+                response.failure(f"status {response.status_code}")
+
+    @task(1)
+    def simulate_bulk_ingestion(self):
+        """Пакетне приймання NDJSON"""
+        body = "\n".join(json.dumps(make_news()) for _ in range(BULK_SIZE))
+        with self.client.post("/api/news/bulk", data=body, headers={"Content-Type": "application/x-ndjson"},
+                              name="/api/news/bulk", catch_response=True) as response:
+            if response.status_code != 202:
+                response.failure(f"status {response.status_code}")
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import pytest
+from app.async_db import AsyncDatabase
+from tests.conftest import make_item
+
+
+@pytest.fixture
+def async_database(tmp_path):
+    database = AsyncDatabase(f"sqlite:///{tmp_path / 'async.db'}", readers=2)
+    yield database
+    database.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_are_batched(async_database):
+    results = await asyncio.gather(*(async_database.add_news_item(make_item(n)) for n in range(50)))
+
+    assert all(results)
+    assert len(await async_database.get_recent_news(minutes=60)) == 50
+    stats = async_database.write_stats
+    assert stats["writes"] == 50
+    assert stats["batches"] < 50
+
+
+@pytest.mark.asyncio
+async def test_failed_write_does_not_break_batch(async_database):
+    def broken(database):
+        database.conn.execute("INSERT INTO missing_table VALUES (1)")
+
+    outcomes = await asyncio.gather(
+        async_database.write(broken),
+        async_database.add_news_item(make_item(1)),
+        return_exceptions=True,
+    )
+
+    assert isinstance(outcomes[0], Exception)
+    assert outcomes[1] is True
+    assert len(await async_database.get_news_by_ids([1])) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_write_does_not_stall_loop(async_database):
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    beat = asyncio.create_task(heartbeat())
+    await async_database.write(lambda database: time.sleep(0.2))
+    beat.cancel()
+
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_deferred_write_is_ordered_before_later_reads(async_database):
+    await async_database.add_news_item(make_item(1))
+    async_database.deferred.replace_digest_candidate(
+        {"news_id": 1, "source_id": "test", "title": "News 1", "rank_key": 1.0}
+    )
+    await async_database.mark_as_sent("https://example.com/news/1")
+
+    assert len(await async_database.get_digest_candidates()) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_write_does_not_kill_writer(async_database):
+    # Записувач зайнятий, тож наступний запис ще в черзі, коли його скасовують
+    slow = asyncio.ensure_future(async_database.write(lambda database: time.sleep(0.2)))
+    await asyncio.sleep(0.05)
+    queued = asyncio.ensure_future(async_database.add_news_item(make_item(1)))
+    await asyncio.sleep(0)
+    queued.cancel()
+    await slow
+
+    assert await asyncio.wait_for(async_database.add_news_item(make_item(2)), timeout=5) is True
+    assert async_database._writer.is_alive()
+    assert [item.url for item in await async_database.get_recent_news(minutes=60)] == ["https://example.com/news/2"]
@@ -0,0 +1,16 @@
+import pytest
+from benchmarks.suite import CASES, compare
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_benchmark_case_runs(name, tmp_path):
+    CASES[name](tmp_path)()
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"fast": {"min_us": 10.0}, "slow": {"min_us": 10.0}, "removed": {"min_us": 1.0}}
+    current = {"fast": {"min_us": 8.0}, "slow": {"min_us": 12.0}, "new": {"min_us": 5.0}}
+
+    report = {row["case"]: row["status"] for row in compare(current, baseline, threshold=0.15)}
+
+    assert report == {"fast": "improved", "slow": "regression"}
@@ -0,0 +1,39 @@
+import threading
+from app.async_db import AsyncDatabase
+from app.context import AppContext
+
+
+async def test_context_wires_shared_objects(tmp_path):
+    storage = AsyncDatabase(f"sqlite:///{tmp_path / 'context.db'}", readers=1)
+    context = AppContext(storage=storage)
+
+    assert context.scheduler.storage is storage
+    assert context.scheduler.publisher is context.bot
+    assert context.bot.scheduler is context.scheduler
+    assert context.bot.storage is storage
+    assert context.scheduler.summarizer is context.summarizer
+
+    await context.start(polling=False)
+    assert context.scheduler.scheduler.running
+    await context.stop()
+
+    assert not context.scheduler.scheduler.running
+    assert context.http.is_closed
+
+
+async def test_storage_started_off_the_event_loop(tmp_path, monkeypatch):
+    storage = AsyncDatabase(f"sqlite:///{tmp_path / 'context.db'}", readers=1)
+    context = AppContext(storage=storage)
+    threads = []
+    start = storage.start
+
+    def recording_start():
+        threads.append(threading.current_thread())
+        return start()
+
+    monkeypatch.setattr(storage, "start", recording_start)
+    await context.start(polling=False)
+    await context.stop()
+
+    # Міграції виконуються до першого звернення і не в потоці event loop
+    assert threads and threads[0] is not threading.main_thread()
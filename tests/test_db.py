@@ -0,0 +1,153 @@
+import pytest
+from datetime import datetime, timedelta
+from app.db import Database, _SELECT_NEWS
+from app.models import NewsItem
+from app.ranker import Ranker
+from tests.conftest import make_item
+
+
+def test_unsent_news_ranked_by_decayed_score(database):
+    database.add_news_item(make_item(1, impact=3, hours_old=24))
+    database.add_news_item(make_item(2, impact=3, hours_old=1))
+    database.add_news_item(make_item(3, impact=2, hours_old=0))
+
+    news = database.get_unsent_news()
+
+    assert [item.url[-1] for item in news] == ["2", "3", "1"]
+    # score рахується на момент запиту, а не заморожується при вставці
+    assert news[0].score == pytest.approx(4 * 2 ** (-1 / 6), rel=1e-3)
+    later = database.get_unsent_news(now=datetime.now() + timedelta(hours=6))
+    assert later[0].score == pytest.approx(news[0].score / 2, rel=1e-3)
+
+
+def test_add_news_item_reports_duplicates(database):
+    item = make_item(1)
+    assert database.add_news_item(item) is True
+    assert item.id is not None
+    assert database.add_news_item(make_item(1)) is False
+
+
+def test_unsent_news_skips_sent(database):
+    database.add_news_item(make_item(1, impact=5))
+    database.add_news_item(make_item(2, impact=1))
+    database.mark_as_sent("https://example.com/news/1")
+
+    assert [item.url for item in database.get_unsent_news()] == ["https://example.com/news/2"]
+
+
+def test_old_schema_gets_rank_key(tmp_path):
+    path = tmp_path / "old.db"
+    import sqlite3
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE news_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE, title TEXT,
+            source_id TEXT, published TIMESTAMP, content TEXT, lang TEXT,
+            score REAL, impact INTEGER, summary TEXT, why_matters TEXT,
+            processed_at TIMESTAMP, sent BOOLEAN DEFAULT 0, llm_model TEXT, cost_usd REAL
+        )
+    """)
+    conn.execute(
+        "INSERT INTO news_items (url, title, source_id, published, content, lang, impact) "
+        "VALUES ('u', 't', 's', '2025-05-13 14:35:16', 'c', 'en', 3)"
+    )
+    conn.commit()
+    conn.close()
+
+    database = Database(f"sqlite:///{path}")
+    news = database.get_unsent_news()
+    inline = database.conn.execute("SELECT content FROM news_items").fetchone()[0]
+    content = database.get_content([news[0].id])
+    stats = database.get_stats_since(datetime(2025, 5, 1))
+    database.close()
+
+    expected = Ranker.calculate_rank_key(4.0, datetime(2025, 5, 13, 14, 35, 16))
+    assert news[0].base_score == 4.0
+    assert news[0].rank_key == pytest.approx(expected)
+    # текст переїхав у news_content
+    assert inline is None
+    assert content == {news[0].id: "c"}
+    # агрегати заповнено з наявних новин
+    assert (stats["total"], stats["avg_impact"]) == (1, 3)
+
+
+def test_add_news_items_reports_per_row_status(database):
+    database.add_news_item(make_item(1))
+    items = [make_item(1), make_item(2), make_item(3), make_item(2)]
+
+    statuses = database.add_news_items(items)
+
+    assert statuses == [False, True, True, False]
+    assert items[1].id is not None and items[2].id is not None
+    assert items[3].id is None
+    assert len(database.get_recent_news(minutes=60)) == 3
+
+
+def test_url_variants_are_one_story(database):
+    item = make_item(1)
+    variant = make_item(2)
+    variant.url = "http://www.example.com/news/1/?utm_source=rss#comments"
+
+    assert database.add_news_items([item, variant]) == [True, False]
+    assert database.add_news_item(make_item(1)) is False
+    assert database.get_known_urls([variant.url, "https://example.com/news/2"]) == {variant.url}
+
+    database.mark_as_sent(variant.url)
+    assert database.get_unsent_news() == []
+
+
+def test_rows_decode_like_validated_model(database):
+    database.add_news_item(make_item(1, impact=4, summary="S", llm_model="gemini", cost_usd=0.01))
+    row = database.conn.execute(f"{_SELECT_NEWS} LIMIT 1").fetchone()
+
+    item = database.get_news_by_ids([1])[0]
+
+    assert item == NewsItem(content="", **dict(row))
+    assert isinstance(item.published, datetime) and item.sent is False
+    database.load_content([item])
+    assert item.content == "Test content" and "content" in item.model_fields_set
+
+
+def test_mark_many_as_sent(database):
+    items = [make_item(n) for n in range(3)]
+    database.add_news_items(items)
+
+    assert database.mark_many_as_sent([items[0].id, items[2].id]) == 2
+    assert [item.url for item in database.get_unsent_news()] == [items[1].url]
+
+
+def test_content_stored_compressed_and_loaded_lazily(database):
+    body = "Long article body. " * 200
+    item = NewsItem(
+        url="https://example.com/long", title="Long", source_id="test",
+        published=datetime.now(), content=body, lang="en", impact=1
+    )
+    database.add_news_item(item)
+
+    stored = database.conn.execute("SELECT length(body) FROM news_content").fetchone()[0]
+    assert stored < len(body) / 5
+
+    news = database.get_news_by_ids([item.id])
+    assert news[0].content == ""
+    assert database.load_content(news)[0].content == body
+    assert database.get_recent_titles(minutes=60) == ["Long"]
+
+
+def test_stats_from_hourly_rollups(database):
+    database.add_news_item(make_item(1, impact=5, source_id="a", llm_model="gemini", cost_usd=0.001))
+    database.add_news_items([
+        make_item(2, impact=1, source_id="a", llm_model="openai", cost_usd=0.002),
+        make_item(3, impact=4, source_id="b"),
+        make_item(4, impact=2, source_id="b", hours_old=24 * 3),
+        make_item(1, impact=5, source_id="a"),  # дублікат не враховується
+    ])
+
+    day = database.get_stats_since(datetime.now() - timedelta(days=1))
+    week = database.get_stats_since(datetime.now() - timedelta(days=7))
+
+    assert (day["total"], day["breaking"]) == (3, 2)
+    assert day["avg_impact"] == pytest.approx(10 / 3)
+    assert day["cost_usd"] == pytest.approx(0.003)
+    assert day["by_source"]["a"]["total"] == 2
+    assert week["total"] == 4
+    assert week["by_source"]["b"]["avg_impact"] == 3
@@ -0,0 +1,249 @@
+from datetime import datetime, timedelta
+import pytest
+from app.async_db import AsyncDatabase
+from app.config import settings
+from app.delivery import DeliveryWorker, retry_delay
+from app.routing import ChannelRouter
+from app.models import Channel
+from app.ranker import Ranker
+from app.scheduler import NewsScheduler
+from tests.conftest import make_item
+
+
+@pytest.fixture
+def storage(tmp_path):
+    store = AsyncDatabase(f"sqlite:///{tmp_path / 'outbox.db'}", readers=1)
+    yield store
+    store.close()
+
+
+async def test_breaking_news_enqueued_with_insert(storage):
+    items = [make_item(1, impact=5), make_item(2, impact=1), make_item(3, impact=3)]
+
+    await storage.add_news_items(items, breaking_impact=2)
+    await storage.add_news_items([make_item(1, impact=5)], breaking_impact=2)
+
+    lease_until = datetime.now() + timedelta(hours=1)
+    claimed = await storage.claim_deliveries(10, lease_until=lease_until)
+    assert [(entry["news_id"], entry["kind"]) for entry in claimed] == [(items[0].id, "urgent")]
+    # Не термінова новина чекає вікна склейки
+    window_end = datetime.now() + timedelta(seconds=settings.BREAKING_COALESCE_SECONDS)
+    claimed = await storage.claim_deliveries(10, lease_until=lease_until, now=window_end)
+    assert [entry["news_id"] for entry in claimed] == [items[2].id]
+
+
+async def test_worker_acks_in_batch(storage):
+    items = [make_item(n, impact=5) for n in range(3)]
+    await storage.add_news_items(items, breaking_impact=2)
+    sent = []
+
+    async def send(item, channel):
+        sent.append(item.id)
+
+    worker = DeliveryWorker(storage, {"urgent": send})
+    assert await worker.run_once() == 3
+    assert await worker.run_once() == 0
+
+    assert sorted(sent) == [item.id for item in items]
+    # Доставка breaking news не знімає новини з кандидатів у дайджест
+    assert len(await storage.get_unsent_news()) == 3
+    stats = await storage.get_delivery_stats(datetime.now() - timedelta(hours=1))
+    assert stats["delivered"] == 3 and stats["pending"] == 0
+    assert storage.write_stats["batches"] <= 4
+
+
+async def test_failed_send_is_retried_with_backoff(storage):
+    item = make_item(1, impact=5)
+    await storage.add_news_items([item], breaking_impact=2)
+    calls = 0
+
+    async def flaky(news, channel):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("telegram timeout")
+
+    worker = DeliveryWorker(storage, {"urgent": flaky})
+    now = datetime.now()
+    await worker.run_once(now=now)
+    assert await worker.run_once(now=now) == 0
+
+    assert await worker.run_once(now=now + retry_delay(1)) == 1
+    assert calls == 2
+    stats = await storage.get_delivery_stats(now - timedelta(hours=1), now=now + retry_delay(1))
+    assert stats["delivered"] == 1 and stats["pending"] == 0
+
+
+async def test_unacked_claim_is_redelivered_after_lease(storage):
+    await storage.add_news_items([make_item(1, impact=5)], breaking_impact=2)
+    now = datetime.now()
+    lease_until = now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+
+    # Воркер забрав запис і "впав" до підтвердження
+    assert len(await storage.claim_deliveries(10, lease_until=lease_until, now=now)) == 1
+    assert await storage.claim_deliveries(10, lease_until=lease_until, now=now) == []
+
+    redelivered = await storage.claim_deliveries(10, lease_until=lease_until, now=lease_until)
+    assert len(redelivered) == 1
+
+
+async def test_gives_up_after_max_attempts(storage):
+    await storage.add_news_items([make_item(1, impact=5)], breaking_impact=2)
+
+    async def broken(news):
+        raise RuntimeError("chat not found")
+
+    worker = DeliveryWorker(storage, {"urgent": broken})
+    now = datetime.now()
+    for _ in range(settings.OUTBOX_MAX_ATTEMPTS):
+        await worker.run_once(now=now)
+        now += timedelta(seconds=settings.OUTBOX_RETRY_MAX_SECONDS)
+
+    stats = await storage.get_delivery_stats(datetime.now(), now=now)
+    assert stats["failed"] == 1 and stats["pending"] == 0
+    assert await worker.run_once(now=now) == 0
+
+
+async def _insert(storage, items):
+    await storage.add_news_items(items)
+    return [item.id for item in items]
+
+
+async def test_burst_is_coalesced_into_few_posts(storage):
+    ids = await _insert(storage, [make_item(n, impact=3) for n in range(12)])
+    t0 = datetime.now()
+    await storage.enqueue_deliveries(ids[:6], "breaking", now=t0, delay=60)
+    await storage.enqueue_deliveries(ids[6:], "breaking", now=t0 + timedelta(seconds=30), delay=60)
+    posts = []
+
+    async def send_one(item, channel):
+        posts.append([item.id])
+
+    async def send_many(items, channel):
+        posts.append([item.id for item in items])
+
+    worker = DeliveryWorker(storage, {"breaking": send_one}, group_senders={"breaking": send_many},
+                            coalesce_seconds=60)
+    assert await worker.run_once(now=t0 + timedelta(seconds=30)) == 0
+
+    # Перший запис вікна забирає й ті, що надійшли пізніше
+    assert await worker.run_once(now=t0 + timedelta(seconds=60)) == 12
+    assert sorted(len(post) for post in posts) == [2, 10]
+    assert sorted(news_id for post in posts for news_id in post) == sorted(ids)
+    assert worker.stats == {"items": 12, "posts": 2}
+
+
+async def test_top_impact_bypasses_window(storage):
+    urgent, regular = await _insert(storage, [make_item(1, impact=5), make_item(2, impact=3)])
+    await storage.enqueue_deliveries([urgent], "urgent")
+    await storage.enqueue_deliveries([regular], "breaking", delay=60)
+    singles, groups = [], []
+
+    async def send_one(item, channel):
+        singles.append(item.id)
+
+    async def send_many(items, channel):
+        groups.append([item.id for item in items])
+
+    worker = DeliveryWorker(storage, {"breaking": send_one, "urgent": send_one},
+                            group_senders={"breaking": send_many}, coalesce_seconds=60)
+    assert await worker.run_once() == 1
+
+    assert singles == [urgent] and groups == []
+
+
+async def test_fresh_burst_is_coalesced_despite_ranked_impact(storage):
+    # Ранжування дає свіжим новинам impact 5, але терміновість визначає оцінка LLM
+    ranker = Ranker()
+    items = [ranker.rank(make_item(n, impact=3)) for n in range(8)] + [ranker.rank(make_item(8, impact=5))]
+    assert all(item.impact == 5 for item in items)
+    await storage.add_news_items(items, breaking_impact=2)
+    singles, groups = [], []
+
+    async def send_one(item, channel):
+        singles.append(item.id)
+
+    async def send_many(items, channel):
+        groups.append([item.id for item in items])
+
+    worker = DeliveryWorker(storage, {"breaking": send_one, "urgent": send_one},
+                            group_senders={"breaking": send_many}, coalesce_seconds=60)
+    later = datetime.now() + timedelta(seconds=settings.BREAKING_COALESCE_SECONDS)
+    while await worker.run_once(now=later):
+        pass
+
+    assert singles == [items[8].id]
+    assert groups == [[item.id for item in items[:8]]]
+    assert worker.stats == {"items": 9, "posts": 2}
+
+
+async def test_failed_combined_post_retries_every_item(storage):
+    ids = await _insert(storage, [make_item(n, impact=3) for n in range(3)])
+    await storage.enqueue_deliveries(ids, "breaking")
+
+    async def broken(items, channel):
+        raise RuntimeError("telegram timeout")
+
+    worker = DeliveryWorker(storage, {}, group_senders={"breaking": broken}, coalesce_seconds=60)
+    now = datetime.now()
+    await worker.run_once(now=now)
+
+    retried = await storage.claim_deliveries(10, lease_until=now, now=now + retry_delay(1))
+    assert sorted(entry["news_id"] for entry in retried) == sorted(ids)
+    assert all(entry["attempts"] == 1 for entry in retried)
+
+
+async def test_delivered_breaking_news_still_fill_the_digest(storage):
+    # Канал-стрічка з min_impact: 1 — breaking news стає кожна новина дня
+    router = ChannelRouter([Channel(id="main", chat_id="@main", digest=True),
+                            Channel(id="firehose", chat_id="@firehose", min_impact=1)])
+    digests = []
+
+    class Publisher:
+        async def send_breaking_news(self, item, channel):
+            pass
+
+        async def send_breaking_batch(self, items, channel):
+            pass
+
+        async def send_digest_messages(self, messages, channels):
+            digests.append("\n".join(messages))
+            return channels
+
+    scheduler = NewsScheduler(storage, publisher=Publisher(), router=router)
+    items = [make_item(n, impact=n % 5 + 1, hours_old=n / 4, source_id=f"source-{n % 8}") for n in range(96)]
+    statuses = await storage.add_news_items(items, breaking_impact=router.min_impact,
+                                            channels=[router.route(item) for item in items])
+    for item, inserted in zip(items, statuses):
+        if inserted:
+            scheduler.digest.offer(item)
+
+    later = datetime.now() + timedelta(hours=1)
+    while await scheduler.delivery.run_once(now=later):
+        pass
+    stats = await storage.get_delivery_stats(later - timedelta(days=1), now=later)
+    assert stats["pending"] == 0 and stats["delivered"] >= 96
+
+    await scheduler.send_daily_digest()
+    assert len(digests) == 1
+    assert sum(f"• News {n}</b>" in digests[0] for n in range(96)) == settings.DIGEST_SIZE
+
+
+async def test_failed_digest_keeps_items_for_the_next_run(storage):
+    router = ChannelRouter([Channel(id="main", chat_id="@main", digest=True)])
+
+    class Publisher:
+        async def send_digest_messages(self, messages, channels):
+            raise RuntimeError("telegram timeout")
+
+    scheduler = NewsScheduler(storage, publisher=Publisher(), router=router)
+    items = [make_item(n, impact=3) for n in range(3)]
+    await storage.add_news_items(items)
+    for item in items:
+        scheduler.digest.offer(item)
+
+    await scheduler.send_daily_digest()
+
+    # Новини не позначені відправленими й лишаються кандидатами
+    assert len(await storage.get_unsent_news()) == 3
+    assert len(scheduler.digest.top(10)) == 3
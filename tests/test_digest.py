@@ -0,0 +1,71 @@
+from app.db import Database
+from app.async_db import AsyncDatabase
+from app.digest import DigestAccumulator
+from tests.conftest import make_item
+
+
+def store(database, n, impact=1, hours_old=0, source_id="test"):
+    item = make_item(n, impact=impact, hours_old=hours_old, source_id=source_id)
+    database.add_news_item(item)
+    return item
+
+
+def test_keeps_top_k(database):
+    digest = DigestAccumulator(database, capacity=2, max_per_source=5)
+    for n, impact in enumerate([1, 4, 2, 5, 3]):
+        digest.offer(store(database, n, impact=impact))
+
+    assert [c.title for c in digest.top()] == ["News 3", "News 1"]
+    assert len(digest) == 2
+
+
+def test_limits_items_per_source(database):
+    digest = DigestAccumulator(database, capacity=3, max_per_source=2)
+    digest.offer(store(database, 1, impact=5, source_id="a"))
+    digest.offer(store(database, 2, impact=4, source_id="a"))
+    digest.offer(store(database, 3, impact=3, source_id="a"))
+    digest.offer(store(database, 4, impact=1, source_id="b"))
+
+    top = digest.top()
+    assert [c.title for c in top] == ["News 1", "News 2", "News 4"]
+    assert sum(c.source_id == "a" for c in top) == 2
+
+
+def test_survives_restart(tmp_path):
+    url = f"sqlite:///{tmp_path / 'digest.db'}"
+    database = Database(url)
+    digest = DigestAccumulator(database, capacity=2, max_per_source=2)
+    for n, impact in enumerate([2, 5, 1]):
+        digest.offer(store(database, n, impact=impact))
+    expected = [c.news_id for c in digest.top()]
+    database.close()
+
+    database = Database(url)
+    restored = DigestAccumulator(database, capacity=2, max_per_source=2)
+    assert [c.news_id for c in restored.top()] == expected
+    assert all("Читати повністю" in c.fragment for c in restored.top())
+    database.close()
+
+
+def test_discard_and_bootstrap_from_unsent(database):
+    store(database, 1, impact=3)
+    store(database, 2, impact=2)
+    digest = DigestAccumulator(database, capacity=5, max_per_source=5)
+    assert len(digest) == 2
+
+    digest.discard([c.news_id for c in digest.top(1)])
+    assert [c.title for c in digest.top()] == ["News 2"]
+    assert "News 2" in digest.preview()
+    assert len(database.get_digest_candidates()) == 1
+
+
+async def test_load_async_from_storage(tmp_path):
+    storage = AsyncDatabase(f"sqlite:///{tmp_path / 'digest.db'}", readers=1)
+    await storage.add_news_items([make_item(1, impact=3), make_item(2, impact=1)])
+
+    digest = DigestAccumulator(capacity=1, max_per_source=1, writer=storage.deferred)
+    await digest.load_async(storage)
+
+    assert [c.title for c in digest.top()] == ["News 1"]
+    assert len(await storage.get_digest_candidates()) == 1
+    storage.close()
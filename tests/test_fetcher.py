@@ -1,3 +1,4 @@
+import httpx
 import pytest
 from datetime import datetime
 from app.fetchers.rss import RSSFetcher
@@ -60,4 +61,17 @@ async def test_create_news_item(source):
     assert item.url == "https://example.com/news/1"
     assert item.title == "Test News"
     assert item.source_id == source.id
-    assert item.lang == "en" 
\ No newline at end of file
+    assert item.lang == "en" 
+
+@pytest.mark.asyncio
+async def test_shared_client_is_not_closed(source):
+    """Спільний HTTP-пул закриває контекст застосунку, а не фетчер"""
+    shared = httpx.AsyncClient()
+    fetcher = RSSFetcher(source, client=shared)
+    await fetcher.close()
+    assert not shared.is_closed
+    await shared.aclose()
+
+    fetcher = RSSFetcher(source)
+    await fetcher.close()
+    assert fetcher.client.is_closed
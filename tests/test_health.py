@@ -0,0 +1,89 @@
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.config import settings
+from app.health import HealthMonitor
+from app.models import Source
+
+
+class _Storage:
+    backend = "sqlite"
+
+    def __init__(self):
+        self.pings = 0
+        self.error = None
+
+    async def ping(self):
+        self.pings += 1
+        if self.error:
+            raise self.error
+
+
+def _scheduler(running=True, last_fetch=None, started_at=None):
+    source = Source(id="rss", name="RSS", type="rss", url="https://example.com/rss",
+                    interval=5, lang="en", weight=1, active=True)
+    jobs = ["rss", "daily_digest"]
+    return SimpleNamespace(
+        scheduler=SimpleNamespace(running=running, get_jobs=lambda: jobs),
+        sources=[source],
+        last_fetch=last_fetch or {},
+        started_at=started_at or datetime.now(),
+    )
+
+
+async def test_snapshot_is_served_without_touching_storage():
+    storage = _Storage()
+    monitor = HealthMonitor(storage, scheduler=_scheduler(), summarizer=SimpleNamespace(failures={"gemini": 0}))
+    await monitor.check()
+
+    bodies = [monitor.body for _ in range(100)]
+    assert storage.pings == 1
+    data = json.loads(bodies[-1])
+    assert monitor.ready and data["status"] == "ready"
+    assert data["components"]["scheduler"] == {"ok": True, "enabled": True, "jobs": 2}
+    assert data["components"]["sources"]["rss"]["ok"] is True
+
+
+async def test_db_failure_makes_not_ready():
+    storage = _Storage()
+    storage.error = RuntimeError("database is locked")
+    monitor = HealthMonitor(storage, scheduler=_scheduler())
+    await monitor.check()
+
+    data = json.loads(monitor.body)
+    assert not monitor.ready and data["status"] == "unavailable"
+    assert data["components"]["db"] == {"ok": False, "backend": "sqlite", "error": "database is locked"}
+
+
+async def test_stale_source_and_llm_failures_only_degrade():
+    long_ago = datetime.now() - timedelta(hours=2)
+    summarizer = SimpleNamespace(failures={"gemini": settings.LLM_FAILURE_THRESHOLD, "openai": 0})
+    monitor = HealthMonitor(_Storage(), scheduler=_scheduler(last_fetch={"rss": long_ago}, started_at=long_ago),
+                            summarizer=summarizer)
+    await monitor.check()
+
+    data = json.loads(monitor.body)
+    assert monitor.ready and data["status"] == "degraded"
+    assert data["components"]["sources"]["rss"]["ok"] is False
+    assert data["components"]["llm"]["gemini"] == {"ok": False, "consecutive_failures": settings.LLM_FAILURE_THRESHOLD}
+
+
+async def test_stopped_scheduler_is_not_ready_unless_disabled(monkeypatch):
+    monitor = HealthMonitor(_Storage(), scheduler=_scheduler(running=False))
+    await monitor.check()
+    assert not monitor.ready
+
+    monkeypatch.setattr(settings, "RUN_SCHEDULER", False)
+    await monitor.check()
+    assert monitor.ready
+
+
+def test_liveness_fails_when_checks_stall():
+    now = [100.0]
+    monitor = HealthMonitor(_Storage(), interval=10, clock=lambda: now[0])
+    assert monitor.alive
+    monitor.checked_at = 100.0
+    now[0] = 125.0
+    assert monitor.alive
+    now[0] = 131.0
+    assert not monitor.alive
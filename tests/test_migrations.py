@@ -0,0 +1,109 @@
+import re
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from app.migrations import MIGRATIONS, migrate, schema_version
+
+HOT_QUERIES = [
+    ("get_unsent_news", ()),
+    ("get_recent_news", (60,)),
+    ("get_recent_titles", (60,)),
+    ("get_last_news", ()),
+    ("get_stats_since", (datetime.now() - timedelta(days=7),)),
+    ("get_news_after", (0, 100)),
+    ("get_known_urls", (["https://example.com/a", "https://example.com/b"],)),
+]
+
+FULL_SCAN = re.compile(r"\bSCAN (news_items|n)\b(?! USING)")
+
+
+def traced_plans(database, method, *args):
+    """Виконати метод Database і повернути плани всіх його SELECT-запитів"""
+    statements = []
+    database.conn.set_trace_callback(statements.append)
+    try:
+        getattr(database, method)(*args)
+    finally:
+        database.conn.set_trace_callback(None)
+    plans = []
+    for sql in statements:
+        if sql.lstrip().upper().startswith("SELECT"):
+            rows = database.conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+            plans.append(" | ".join(row["detail"] for row in rows))
+    return plans
+
+
+def test_fresh_database_is_at_latest_version(database):
+    assert schema_version(database.conn) == MIGRATIONS[-1].version
+
+
+def test_migrate_is_idempotent(database):
+    assert migrate(database.conn) == MIGRATIONS[-1].version
+
+
+def test_pragmas_applied(database):
+    assert database.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    # NORMAL = 1
+    assert database.conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    conn = sqlite3.connect(tmp_path / "broken.db")
+
+    def broken(c):
+        c.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        migrate(conn, MIGRATIONS + [MIGRATIONS[-1]._replace(version=999, apply=broken)])
+
+    assert schema_version(conn) == MIGRATIONS[-1].version
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+    assert "half_done" not in tables
+
+
+@pytest.mark.parametrize("method,args", HOT_QUERIES)
+def test_hot_queries_never_scan_news_items(database, method, args):
+    plans = traced_plans(database, method, *args)
+
+    assert plans
+    for plan in plans:
+        # SCAN без USING INDEX означає повний прохід по таблиці
+        assert not FULL_SCAN.search(plan), plan
+
+
+def test_stats_read_rollups_by_primary_key(database):
+    plans = traced_plans(database, "get_stats_since", datetime.now())
+    assert "news_rollup_hourly USING PRIMARY KEY (bucket>?)" in plans[0]
+
+
+def test_digest_uses_unsent_index(database):
+    plans = traced_plans(database, "get_unsent_news")
+    assert "COVERING INDEX idx_news_unsent_rank" in plans[0]
+
+
+def test_known_urls_use_url_key_index(database):
+    plans = traced_plans(database, "get_known_urls", ["https://example.com/a"])
+    assert "COVERING INDEX idx_news_url_key" in plans[0]
+
+
+def test_url_keys_migration_rebuilds_news_items(tmp_path):
+    conn = sqlite3.connect(tmp_path / "legacy.db")
+    migrate(conn, MIGRATIONS[:7])
+    conn.executemany(
+        "INSERT INTO news_items (url, title, published, impact) VALUES (?, ?, ?, 1)",
+        [("https://example.com/a", "A", datetime.now()),
+         ("http://www.example.com/a/?utm_source=rss", "A again", datetime.now()),
+         ("https://example.com/b", "B", datetime.now())]
+    )
+    conn.execute("DELETE FROM news_items WHERE url = 'https://example.com/b'")
+    conn.commit()
+
+    migrate(conn)
+
+    rows = conn.execute("SELECT id, url_key IS NOT NULL FROM news_items ORDER BY id").fetchall()
+    assert rows == [(1, 1), (2, 0)]
+    assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'news_items'").fetchone()[0] == 3
+    assert conn.execute("SELECT rowid FROM news_fts WHERE news_fts MATCH 'again'").fetchall() == [(2,)]
+    conn.execute("INSERT INTO news_items (url, title) VALUES ('https://example.com/c', 'C')")
+    assert conn.execute("SELECT rowid FROM news_fts WHERE news_fts MATCH 'c'").fetchall() == [(4,)]
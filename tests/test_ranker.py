@@ -1,5 +1,5 @@
 import pytest
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from app.models import NewsItem
 from app.ranker import Ranker
 
@@ -81,4 +81,36 @@ def test_score_zero_for_empty_content(ranker):
 
 def test_impact_min_max(ranker, sample_news):
     assert ranker.calculate_impact(0, 0) == 1
-    assert ranker.calculate_impact(1000, 0) == 5 
\ No newline at end of file
+    assert ranker.calculate_impact(1000, 0) == 5 
+
+
+def test_rank_key_orders_like_decayed_score(ranker):
+    """Порядок за rank_key збігається з порядком за score на будь-який момент"""
+    now = datetime.now()
+    fresh = ranker.calculate_rank_key(ranker.calculate_base_score(2), now - timedelta(hours=1))
+    important = ranker.calculate_rank_key(ranker.calculate_base_score(4), now - timedelta(hours=10))
+
+    assert important > fresh
+    assert ranker.decayed_score(important, now) > ranker.decayed_score(fresh, now)
+    assert ranker.decayed_score(fresh, now) == pytest.approx(2 * 2 ** (-1 / 6), rel=1e-3)
+
+
+def test_rank_key_converts_aware_datetimes_to_local(ranker):
+    moment = datetime(2024, 3, 20, 12, 0, tzinfo=timezone(timedelta(hours=5)))
+    base = ranker.calculate_base_score(3)
+
+    assert ranker.calculate_rank_key(base, moment) == \
+        pytest.approx(ranker.calculate_rank_key(base, moment.astimezone().replace(tzinfo=None)))
+
+
+def test_old_important_news_outranks_fresh_minor_news(ranker):
+    now = datetime.now()
+    fresh = ranker.rank(NewsItem(url="https://example.com/fresh", title="Fresh", source_id="test",
+                                 published=now, content="", lang="en", impact=1))
+    important = ranker.rank(NewsItem(url="https://example.com/important", title="Important", source_id="test",
+                                     published=now - timedelta(hours=6), content="", lang="en", impact=5))
+
+    # Свіжість піднімає показуваний impact, але не базову оцінку
+    assert fresh.impact == 5 and fresh.base_score == ranker.calculate_base_score(1)
+    assert important.rank_key > fresh.rank_key
+    assert ranker.decayed_score(important.rank_key, now) > ranker.decayed_score(fresh.rank_key, now)
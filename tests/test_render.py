@@ -0,0 +1,86 @@
+from app.render import (
+    DIGEST_HEADER,
+    TELEGRAM_MESSAGE_LIMIT,
+    message_length,
+    pack_messages,
+    render_breaking,
+    render_breaking_batch,
+    render_digest_fragment,
+)
+from tests.conftest import make_item
+
+
+def test_fragment_escapes_html():
+    item = make_item(1, summary="1 < 2", why_matters="a & b")
+    item.title = "<b>AT&T</b> buys <script>"
+
+    fragment = render_digest_fragment(item)
+
+    assert "&lt;b&gt;AT&amp;T&lt;/b&gt; buys &lt;script&gt;" in fragment
+    assert "<i>1 &lt; 2</i>" in fragment
+    assert "a &amp; b" in fragment
+    assert f'href="{item.url}"' in fragment
+
+
+def test_breaking_posts_escape_titles_and_urls():
+    first = make_item(1, summary="*bold* 1 < 2")
+    first.title = "Token_X up 5% *today*"
+    first.url = "https://example.com/a_b?x=1&y=*"
+    second = make_item(2)
+
+    single = render_breaking(first)
+    batch = render_breaking_batch([first, second])
+
+    assert "1 &lt; 2" in single and "https://example.com/a_b?x=1&amp;y=*" in single
+    assert len(batch) == 1
+    assert '• <a href="https://example.com/a_b?x=1&amp;y=*">Token_X up 5% *today*</a>' in batch[0]
+    assert batch[0].startswith("<b>Breaking News (2)</b>") and f'• <a href="{second.url}">News 2</a>' in batch[0]
+
+
+def test_breaking_batch_with_long_titles_is_split_by_limit():
+    items = [make_item(n) for n in range(10)]
+    for n, item in enumerate(items):
+        item.title = f"{n} " + "Заголовок & <новина> " * 30
+        item.url = f"https://example.com/{'a_b/' * 100}{item.url}"
+
+    messages = render_breaking_batch(items)
+
+    assert len(messages) > 1
+    assert all(message_length(message) <= TELEGRAM_MESSAGE_LIMIT for message in messages)
+    assert sum(message.count("<a href=") for message in messages) == 10
+
+
+def test_long_fields_fit_one_message():
+    item = make_item(1, summary="x" * 10000, why_matters="y" * 10000)
+
+    fragment = render_digest_fragment(item)
+
+    assert message_length(DIGEST_HEADER + fragment) <= TELEGRAM_MESSAGE_LIMIT
+
+
+def test_message_length_counts_utf16_units():
+    assert message_length("📰") == 2
+    assert message_length("новина") == 6
+
+
+def test_pack_respects_limit_and_fills_messages():
+    fragments = [f"{n:02d}" + "a" * 1297 + "\n" for n in range(7)]
+
+    messages = pack_messages(fragments, header="H\n", limit=4096)
+
+    assert len(messages) == 3
+    assert messages[0].startswith("H\n00")
+    assert all(message_length(message) <= 4096 for message in messages)
+    assert sum(message.count("a" * 1297) for message in messages) == 7
+
+
+def test_pack_uses_free_space_in_earlier_messages():
+    fragments = ["a" * 3000, "b" * 3000, "c" * 1000]
+
+    messages = pack_messages(fragments, header="", limit=4096)
+
+    assert messages == ["a" * 3000 + "c" * 1000, "b" * 3000]
+
+
+def test_pack_empty():
+    assert pack_messages([]) == []
@@ -0,0 +1,38 @@
+import httpx
+import app.metrics
+from benchmarks.replay import CASSETTES, Cassette, ReplayTransport, SimClock, replay
+
+
+async def test_transport_serves_feed_as_of_simulated_time():
+    cassette = Cassette.load(CASSETTES / "coindesk.json")
+    clock = SimClock()
+    transport = ReplayTransport({"coindesk": cassette}, clock, hours=1)
+    async with httpx.AsyncClient(transport=transport) as client:
+        first = await client.get(cassette.url)
+        assert first.status_code == 200
+
+        unchanged = await client.get(cassette.url, headers={"If-None-Match": first.headers["ETag"]})
+        assert unchanged.status_code == 304
+
+        clock.advance_to(3600)
+        later = await client.get(cassette.url, headers={"If-None-Match": first.headers["ETag"]})
+        assert later.status_code == 200
+        assert later.headers["ETag"] != first.headers["ETag"]
+    assert transport.stats["not_modified"] == 1
+
+
+async def test_short_replay_reports_pipeline_stages():
+    perf_counter = app.metrics.perf_counter
+
+    report = await replay(hours=0.25)
+
+    assert report["items_stored"] > 0
+    assert report["llm_calls"] + report["llm_calls_avoided"] >= report["items_stored"]
+    # Свіжі breaking news склеюються у вікні, а не йдуть постом на кожну
+    assert report["posts"] < report["items_stored"]
+    assert report["db_bytes_per_item"] > 0
+    assert {"fetch", "parse", "dedup", "summarize", "rank", "store"} <= set(report["stages_ms"])
+    # Латентність із касет потрапляє в стадію fetch, хоч реального очікування немає
+    assert report["stages_ms"]["fetch"]["p50"] >= 50
+    assert report["speedup"] > 1
+    assert app.metrics.perf_counter is perf_counter
@@ -0,0 +1,72 @@
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from app.async_db import AsyncDatabase
+from app.config import settings
+from app.db import Database
+from app.retention import RetentionJob, archive_path
+from tests.conftest import make_item
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    path = tmp_path / "archive"
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", path)
+    return path
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'live.db'}"
+
+
+def seed(db_url, ages_in_days):
+    database = Database(db_url)
+    items = [make_item(n, impact=4, hours_old=days * 24) for n, days in enumerate(ages_in_days)]
+    database.add_news_items(items)
+    database.replace_digest_candidate(
+        {"news_id": items[0].id, "source_id": "test", "title": "old", "rank_key": 0.0}
+    )
+    database.close()
+    return items
+
+
+@pytest.mark.asyncio
+async def test_old_news_moved_to_monthly_archives(db_url, archive_dir):
+    items = seed(db_url, [200, 120, 1])
+    async_database = AsyncDatabase(db_url, readers=1)
+
+    moved = await RetentionJob(async_database).run()
+    async_database.close()
+
+    assert moved == 2
+    database = Database(db_url)
+    assert [item.url for item in database.get_recent_news(minutes=60 * 24 * 365)] == [items[2].url]
+    assert database.get_digest_candidates() == []
+    assert database.conn.execute("SELECT COUNT(*) FROM news_content").fetchone()[0] == 1
+    assert database.conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    month = items[0].published.strftime("%Y-%m")
+    archive = sqlite3.connect(archive_path(month, archive_dir))
+    assert archive.execute("SELECT url FROM news_items").fetchall() == [(items[0].url,)]
+    assert archive.execute("SELECT COUNT(*) FROM news_content").fetchone()[0] == 1
+    archive.close()
+
+    # погодинні агрегати переживають архівацію
+    year = database.get_stats_since(datetime.now() - timedelta(days=365))
+    week = database.get_stats_since(datetime.now() - timedelta(days=7))
+    database.close()
+    assert (year["total"], year["breaking"], year["avg_impact"]) == (3, 3, 4)
+    assert week["total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_archiving_runs_in_chunks(db_url, archive_dir, monkeypatch):
+    seed(db_url, [150] * 5)
+    monkeypatch.setattr(settings, "RETENTION_BATCH_SIZE", 2)
+    async_database = AsyncDatabase(db_url, readers=1)
+
+    assert await RetentionJob(async_database).run() == 5
+    # повторний запуск нічого не переносить
+    assert await RetentionJob(async_database).run() == 0
+    async_database.close()
@@ -0,0 +1,130 @@
+from datetime import datetime
+import pytest
+from app.async_db import AsyncDatabase
+from app.delivery import DeliveryWorker, retry_delay
+from app.models import Channel
+from app.routing import DEFAULT_CHANNEL, ChannelRouter, load_channels
+from tests.conftest import make_item
+
+
+@pytest.fixture
+def router():
+    return ChannelRouter([
+        Channel(id="main", chat_id="@main", exclude_sources=["coindesk"], min_impact=3, digest=True),
+        Channel(id="crypto", chat_id="@crypto", sources=["coindesk"], min_impact=3),
+        Channel(id="ai", chat_id="@ai", keywords=["LLM", "OpenAI"], min_impact=2),
+        Channel(id="firehose", chat_id="@firehose", min_impact=1),
+    ])
+
+
+def test_route_by_source_keywords_and_impact(router):
+    crypto = make_item(1, impact=4, source_id="coindesk")
+    ai = make_item(2, impact=2)
+    ai.title = "OpenAI ships a new LLM"
+    regular = make_item(3, impact=3)
+    minor = make_item(4, impact=1)
+
+    assert router.route(crypto) == ["crypto", "firehose"]
+    assert router.route(ai) == ["ai", "firehose"]
+    assert router.route(regular) == ["main", "firehose"]
+    assert router.route(minor) == ["firehose"]
+    assert router.min_impact == 1
+    assert router.digest_channels() == ["main"]
+
+
+def test_keywords_match_whole_words(router):
+    item = make_item(1, impact=2)
+    item.title = "Bullmarket in openaire datasets"
+    assert "ai" not in router.route(item)
+
+
+def test_load_channels_expands_env_and_skips_unset(tmp_path, monkeypatch):
+    path = tmp_path / "channels.yml"
+    path.write_text(
+        "channels:\n"
+        "  - id: main\n"
+        "    chat_id: ${TEST_MAIN_CHAT}\n"
+        "    digest: true\n"
+        "  - id: crypto\n"
+        "    chat_id: ${TEST_UNSET_CHAT}\n"
+        "    sources: [coindesk]\n"
+    )
+    monkeypatch.setenv("TEST_MAIN_CHAT", "-100123")
+    monkeypatch.delenv("TEST_UNSET_CHAT", raising=False)
+
+    router = load_channels(path)
+
+    assert list(router.channels) == ["main"]
+    assert router.chat_id("main") == "-100123"
+
+
+def test_without_file_everything_goes_to_single_channel(tmp_path):
+    router = load_channels(tmp_path / "missing.yml")
+    assert list(router.channels) == [DEFAULT_CHANNEL]
+    assert router.route(make_item(1, impact=5)) == [DEFAULT_CHANNEL]
+
+
+async def test_fan_out_is_tracked_per_channel(tmp_path, router):
+    storage = AsyncDatabase(f"sqlite:///{tmp_path / 'routing.db'}", readers=1)
+    try:
+        items = [make_item(1, impact=5), make_item(2, impact=5, source_id="coindesk")]
+        await storage.add_news_items(items, breaking_impact=router.min_impact,
+                                     channels=[router.route(item) for item in items])
+        sent, calls = [], {"main": 0}
+
+        async def send(item, channel):
+            if channel == "main":
+                calls["main"] += 1
+                if calls["main"] == 1:
+                    raise RuntimeError("telegram timeout")
+            sent.append((item.id, channel))
+
+        worker = DeliveryWorker(storage, {"urgent": send})
+        now = datetime.now()
+        assert await worker.run_once(now=now) == 4
+        assert sorted(sent) == sorted([(items[0].id, "firehose"), (items[1].id, "crypto"), (items[1].id, "firehose")])
+
+        # Повторюється лише невдалий канал, інші не отримують дубліката
+        assert await worker.run_once(now=now + retry_delay(1)) == 1
+        assert sent[-1] == (items[0].id, "main")
+        assert await worker.run_once(now=now + retry_delay(2)) == 0
+    finally:
+        storage.close()
+
+
+class _RecordingQueue:
+    def __init__(self, failing=()):
+        self.sent = []
+        self.failing = set(failing)
+
+    async def send(self, chat_id, send, priority=0):
+        if chat_id in self.failing:
+            raise RuntimeError("chat not found")
+        self.sent.append(chat_id)
+
+    async def stop(self):
+        pass
+
+
+async def test_bot_digest_fans_out_and_reuses_render(router):
+    from app.bot import NewsBot
+    from app.config import settings
+
+    queue = _RecordingQueue(failing={"@crypto"})
+    bot = NewsBot(settings, send_queue=queue, router=router)
+    item = make_item(1, impact=5)
+    item.id = 1
+
+    await bot.send_breaking_news(item, "main")
+    await bot.send_breaking_news(item, "firehose")
+    assert queue.sent == ["@main", "@firehose"]
+    assert list(bot._rendered) == [1]
+
+    queue.sent.clear()
+    delivered = await bot.send_digest_messages(["one", "two"], channels=["main", "crypto", "firehose"])
+    # Помилка одного каналу не зупиняє інші
+    assert delivered == ["main", "firehose"]
+    assert sorted(queue.sent) == ["@firehose", "@firehose", "@main", "@main"]
+    with pytest.raises(RuntimeError):
+        await bot.send_digest_messages(["one"], channels=["crypto"])
+    await bot.close()
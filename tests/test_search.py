@@ -0,0 +1,47 @@
+from app.search import build_match_query, rebuild_index
+from tests.conftest import make_item
+
+
+def test_build_match_query_quotes_terms():
+    assert build_match_query('GPT-5 "release" OR NOT') == '"GPT-5" "release" "OR" "NOT"'
+    assert build_match_query("open* ai") == '"open"* "ai"'
+    assert build_match_query("  ***  ") == ""
+
+
+def test_search_ranks_title_matches_first(database):
+    database.add_news_items([
+        make_item(1, why_matters="Bitcoin price affects markets"),
+        make_item(2, summary="Nothing relevant here"),
+        make_item(3, summary="ETF approved"),
+    ])
+    with database.conn:
+        database.conn.execute("UPDATE news_items SET title = 'Bitcoin ETF' WHERE url LIKE '%/3'")
+
+    results = database.search_news("bitcoin")
+
+    assert [item.url[-1] for item in results] == ["3", "1"]
+    assert database.search_news("bitcoin", limit=1, offset=1)[0].url.endswith("/1")
+    assert database.search_news("") == []
+
+
+def test_index_follows_updates_and_deletes(database):
+    items = [make_item(1, summary="quantum chip"), make_item(2, summary="quantum network")]
+    database.add_news_items(items)
+
+    with database.conn:
+        database.conn.execute("UPDATE news_items SET summary = 'classical chip' WHERE id = ?", (items[0].id,))
+        database.conn.execute("DELETE FROM news_items WHERE id = ?", (items[1].id,))
+
+    assert database.search_news("quantum") == []
+    assert [item.id for item in database.search_news("classical")] == [items[0].id]
+
+
+def test_rebuild_index(database):
+    database.add_news_item(make_item(1, summary="robotics startup"))
+    database.conn.execute("INSERT INTO news_fts(news_fts) VALUES ('delete-all')")
+    database.conn.commit()
+    assert database.search_news("robotics") == []
+
+    rebuild_index(database.conn)
+
+    assert len(database.search_news("robotics")) == 1
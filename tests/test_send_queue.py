@@ -0,0 +1,129 @@
+import asyncio
+from unittest.mock import MagicMock
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from app.send_queue import PRIORITY_BREAKING, PRIORITY_DIGEST, QueueStopped, SendQueue, TokenBucket
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=2.0, capacity=2, now=0.0)
+    bucket.take(0.0)
+    bucket.take(0.0)
+
+    assert bucket.delay(0.0) == pytest.approx(0.5)
+    assert bucket.delay(0.5) == 0
+
+
+def test_token_bucket_pause_overrides_tokens():
+    bucket = TokenBucket(rate=10.0, capacity=5, now=0.0)
+    bucket.pause_until(3.0)
+
+    assert bucket.delay(1.0) == pytest.approx(2.0)
+    assert bucket.delay(3.0) == 0
+
+
+async def test_sends_in_priority_order():
+    queue = SendQueue(global_rate=1000, chat_rate=1000, chat_burst=1000)
+    sent = []
+
+    def sender(name):
+        async def send():
+            sent.append(name)
+            return name
+        return send
+
+    futures = [
+        queue.submit("chat", sender("digest"), priority=PRIORITY_DIGEST),
+        queue.submit("chat", sender("breaking-1"), priority=PRIORITY_BREAKING),
+        queue.submit("chat", sender("breaking-2"), priority=PRIORITY_BREAKING),
+    ]
+    assert await asyncio.gather(*futures) == ["digest", "breaking-1", "breaking-2"]
+
+    assert sent == ["breaking-1", "breaking-2", "digest"]
+    assert queue.stats["sent"] == 3 and queue.depth == 0
+    await queue.stop()
+
+
+async def test_chat_limit_does_not_block_other_chats():
+    queue = SendQueue(global_rate=1000, chat_rate=0.1, chat_burst=1)
+    sent = []
+
+    def sender(name):
+        async def send():
+            sent.append(name)
+        return send
+
+    queue.submit("slow", sender("slow-1"))
+    second = queue.submit("slow", sender("slow-2"))
+    await queue.send("other", sender("other-1"))
+
+    assert sent == ["slow-1", "other-1"]
+    assert not second.done() and queue.depth == 1
+    await queue.stop()
+
+
+async def test_sends_to_different_chats_overlap():
+    queue = SendQueue(global_rate=1000, chat_rate=1000, chat_burst=1000)
+    active = peak = 0
+
+    async def send():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+
+    await asyncio.gather(*(queue.send(f"chat-{n % 3}", send) for n in range(6)))
+
+    # Різні чати — паралельно, один чат — по черзі
+    assert peak == 3
+    assert queue.stats["sent"] == 6
+    await queue.stop()
+
+
+async def test_retry_after_requeues_with_server_delay():
+    queue = SendQueue(global_rate=1000, chat_rate=1000, chat_burst=1000)
+    attempts = 0
+
+    async def send():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise TelegramRetryAfter(method=MagicMock(), message="Too Many Requests", retry_after=0)
+        return "ok"
+
+    assert await queue.send("chat", send) == "ok"
+    assert attempts == 2
+    assert queue.stats["retry_after"] == 1
+    await queue.stop()
+
+
+async def test_error_propagates_after_retry_budget():
+    queue = SendQueue(global_rate=1000, chat_rate=1000, chat_burst=1000, max_retry_after=0)
+
+    async def send():
+        raise TelegramRetryAfter(method=MagicMock(), message="Too Many Requests", retry_after=30)
+
+    with pytest.raises(TelegramRetryAfter):
+        await queue.send("chat", send)
+    assert queue.stats["failed"] == 1
+    await queue.stop()
+
+
+async def test_stop_fails_pending_and_inflight_sends():
+    queue = SendQueue(global_rate=1000, chat_rate=0.1, chat_burst=1)
+    started = asyncio.Event()
+
+    async def hang():
+        started.set()
+        await asyncio.sleep(3600)
+
+    inflight = asyncio.ensure_future(queue.send("chat", hang))
+    pending = asyncio.ensure_future(queue.send("chat", hang))
+    await started.wait()
+    await queue.stop()
+
+    for waiter in (inflight, pending):
+        with pytest.raises(QueueStopped):
+            await asyncio.wait_for(waiter, timeout=1)
+    assert queue.depth == 0
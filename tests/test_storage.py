@@ -0,0 +1,201 @@
+"""Спільні тести сховищ: той самий набір для SQLite і PostgreSQL.
+
+PostgreSQL-варіант запускається, якщо задано TEST_POSTGRES_URL (база
+повністю очищується перед кожним тестом), наприклад:
+
+    TEST_POSTGRES_URL=postgresql://postgres@localhost/news_test pytest tests/test_storage.py
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+import pytest
+from app.async_db import AsyncDatabase, create_storage
+from tests.conftest import make_item
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+async def _reset_postgres(url: str):
+    import asyncpg
+    conn = await asyncpg.connect(url)
+    try:
+        await conn.execute("""
+            DROP TABLE IF EXISTS news_content, news_rollup_hourly, digest_candidates,
+                                 outbox, news_items, sources CASCADE
+        """)
+    finally:
+        await conn.close()
+
+
+@pytest.fixture(params=[
+    "sqlite",
+    pytest.param("postgres", marks=pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")),
+])
+async def storage(request, tmp_path):
+    if request.param == "postgres":
+        await _reset_postgres(POSTGRES_URL)
+        store = create_storage(POSTGRES_URL)
+    else:
+        store = create_storage(f"sqlite:///{tmp_path / 'storage.db'}")
+    yield store
+    await store.aclose()
+
+
+async def test_aclose_waits_for_deferred_writes(storage):
+    item = make_item(1)
+    await storage.add_news_items([item])
+    storage.deferred.replace_digest_candidate(
+        {"news_id": item.id, "source_id": "test", "title": "News 1", "rank_key": 1.0}
+    )
+    await storage.aclose()
+
+    reopened = create_storage(storage.db_url)
+    try:
+        assert len(await reopened.get_digest_candidates()) == 1
+    finally:
+        await reopened.aclose()
+
+
+def test_backend_chosen_by_url_scheme(tmp_path):
+    assert isinstance(create_storage(f"sqlite:///{tmp_path / 'a.db'}"), AsyncDatabase)
+    with pytest.raises(ValueError):
+        create_storage("mysql://localhost/news")
+
+
+async def test_bulk_insert_statuses(storage):
+    await storage.add_news_item(make_item(1))
+    variant = make_item(4)
+    variant.url = "http://www.example.com/news/2/?utm_source=rss"
+    items = [make_item(1), make_item(2), make_item(3), variant]
+
+    assert await storage.add_news_items(items) == [False, True, True, False]
+    assert items[1].id is not None and items[3].id is None
+    assert await storage.get_known_urls([variant.url, "https://example.com/news/9"]) == {variant.url}
+    assert sorted(await storage.get_recent_titles(minutes=60)) == ["News 1", "News 2", "News 3"]
+
+
+async def test_concurrent_inserts_of_same_url(storage):
+    results = await asyncio.gather(*(storage.add_news_items([make_item(1), make_item(n)]) for n in range(2, 12)))
+
+    assert sum(statuses[0] for statuses in results) == 1
+    assert all(statuses[1] for statuses in results)
+
+
+async def test_unsent_ranking_and_marking(storage):
+    items = [make_item(1, impact=3, hours_old=24), make_item(2, impact=3, hours_old=1), make_item(3, impact=1)]
+    await storage.add_news_items(items)
+
+    unsent = await storage.get_unsent_news(limit=2)
+    assert [item.id for item in unsent] == [items[1].id, items[2].id]
+    assert unsent[0].score > unsent[1].score > 0
+
+    assert await storage.mark_many_as_sent([items[1].id, items[2].id]) == 2
+    await storage.mark_as_sent(items[0].url)
+    assert await storage.get_unsent_news() == []
+
+
+async def test_reads_and_content(storage):
+    items = [make_item(1, hours_old=2), make_item(2)]
+    await storage.add_news_items(items)
+
+    news = await storage.get_news_by_ids([items[1].id, items[0].id])
+    assert [item.id for item in news] == [items[1].id, items[0].id]
+    assert news[0].content == "" and isinstance(news[0].published, datetime)
+    assert (await storage.load_content(news))[0].content == "Test content"
+    assert (await storage.get_last_news()).id == items[1].id
+    assert len(await storage.get_recent_news(minutes=60)) == 1
+
+
+async def test_search(storage):
+    await storage.add_news_items([
+        make_item(1, why_matters="Bitcoin price affects markets"),
+        make_item(2, summary="Nothing relevant here"),
+        make_item(3, summary="Bitcoin ETF approved"),
+    ])
+
+    results = await storage.search_news("bitcoin")
+
+    assert [item.url[-1] for item in results] == ["3", "1"]
+    assert [item.url[-1] for item in await storage.search_news("bitc*", limit=1, offset=1)] == ["1"]
+    assert await storage.search_news("***") == []
+
+
+async def test_stats_from_rollups(storage):
+    await storage.add_news_items([
+        make_item(1, impact=5, source_id="a", llm_model="gemini", cost_usd=0.001),
+        make_item(2, impact=1, source_id="a"),
+        make_item(3, impact=4, source_id="b", hours_old=48),
+    ])
+
+    stats = await storage.get_stats_since(datetime.now() - timedelta(days=1))
+
+    assert stats["total"] == 2
+    assert stats["breaking"] == 1
+    assert stats["avg_impact"] == 3
+    assert stats["by_source"]["a"]["cost_usd"] == pytest.approx(0.001)
+
+
+async def test_digest_candidates(storage):
+    first = {"news_id": 1, "source_id": "a", "title": "One", "rank_key": 1.0, "fragment": None}
+    second = {"news_id": 2, "source_id": "a", "title": "Two", "rank_key": 2.0, "fragment": "<b>• Two</b>\n"}
+    await storage.replace_digest_candidate(first)
+    await storage.replace_digest_candidate(second, evicted_id=1)
+
+    assert await storage.get_digest_candidates() == [second]
+    await storage.delete_digest_candidates([2])
+    assert await storage.get_digest_candidates() == []
+
+
+async def test_outbox_claim_ack_and_fail(storage):
+    items = [make_item(1, impact=5), make_item(2, impact=5), make_item(3, impact=1)]
+    await storage.add_news_items(items, breaking_impact=2)
+    now = datetime.now()
+    lease_until = now + timedelta(minutes=1)
+
+    claimed = await storage.claim_deliveries(10, lease_until=lease_until, now=now)
+    assert sorted(entry["news_id"] for entry in claimed) == [items[0].id, items[1].id]
+    assert await storage.claim_deliveries(10, lease_until=lease_until, now=now) == []
+
+    by_news = {entry["news_id"]: entry["id"] for entry in claimed}
+    assert await storage.ack_deliveries([by_news[items[0].id]]) == 1
+    await storage.fail_deliveries([(by_news[items[1].id], now, "boom")])
+
+    retried = await storage.claim_deliveries(10, lease_until=lease_until, now=now)
+    assert [(entry["news_id"], entry["attempts"]) for entry in retried] == [(items[1].id, 1)]
+    # Доставка не знімає новину з кандидатів у дайджест
+    assert sorted(item.id for item in await storage.get_unsent_news()) == [item.id for item in items]
+    stats = await storage.get_delivery_stats(now - timedelta(minutes=1))
+    assert stats["delivered"] == 1 and stats["pending"] == 1
+
+
+async def test_outbox_delay_and_kind_filter(storage):
+    item = make_item(1, impact=3)
+    await storage.add_news_items([item])
+    now = datetime.now()
+    lease_until = now + timedelta(minutes=5)
+    await storage.enqueue_deliveries([item.id], "breaking", now=now, delay=60)
+
+    assert await storage.claim_deliveries(10, lease_until=lease_until, now=now) == []
+    later = now + timedelta(seconds=60)
+    assert await storage.claim_deliveries(10, lease_until=lease_until, now=later, kind="digest") == []
+    claimed = await storage.claim_deliveries(10, lease_until=lease_until, now=later, kind="breaking")
+    assert [entry["news_id"] for entry in claimed] == [item.id]
+
+
+async def test_outbox_rows_per_channel(storage):
+    items = [make_item(1, impact=5), make_item(2, impact=5)]
+    await storage.add_news_items(items, breaking_impact=2, channels=[["main", "crypto"], []])
+    assert await storage.enqueue_deliveries([items[0].id], "urgent", channel="crypto") == 0
+    now = datetime.now()
+
+    claimed = await storage.claim_deliveries(10, lease_until=now + timedelta(minutes=1), now=now)
+    assert sorted((entry["news_id"], entry["channel"]) for entry in claimed) == [
+        (items[0].id, "crypto"), (items[0].id, "main")
+    ]
+    assert all(entry["created_at"] <= now for entry in claimed)
+
+
+async def test_source_headers(storage):
+    assert await storage.get_source_headers("missing") == (None, None)
+    assert await storage.toggle_source("missing") is False
+    await storage.ping()
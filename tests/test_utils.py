@@ -1,5 +1,5 @@
 import pytest
-from app.utils import clean_text, detect_language, url_hash
+from app.utils import canonicalize_url, clean_text, detect_language, url_hash, url_key
 
 
 def test_clean_text_removes_emoji():
@@ -29,4 +29,17 @@ def test_url_hash():
     h2 = url_hash("https://example.com")
     h3 = url_hash("https://other.com")
     assert h1 == h2
-    assert h1 != h3 
\ No newline at end of file
+    assert h1 != h3 
+
+def test_canonicalize_url():
+    assert canonicalize_url("http://www.Example.com/a/?utm_source=x&b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+    assert canonicalize_url("https://old.reddit.com/r/ml/comments/x/title/?share_id=1") == \
+        "https://reddit.com/r/ml/comments/x/title"
+    assert canonicalize_url("https://youtu.be/abc?si=xyz") == canonicalize_url("https://www.youtube.com/watch?v=abc&t=5")
+    assert canonicalize_url("https://arxiv.org/pdf/2401.00001v2.pdf") == "https://arxiv.org/abs/2401.00001v2"
+    assert canonicalize_url("https://example.com/?page=2") != canonicalize_url("https://example.com/?page=3")
+
+def test_url_key():
+    assert url_key("https://example.com/a") == url_key("http://www.example.com/a/")
+    assert url_key("https://example.com/a") != url_key("https://example.com/b")
+    assert -2**63 <= url_key("https://example.com/a") < 2**63
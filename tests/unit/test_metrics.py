@@ -1,5 +1,4 @@
 import pytest
-from unittest.mock import AsyncMock, patch
 from app.metrics import (
     NEWS_PROCESSED,
     NEWS_IMPACT,
@@ -8,54 +7,74 @@ from app.metrics import (
     LLM_COST,
     DUPLICATE_RATE,
     SCHEDULER_JOBS,
+    HTTP_REQUESTS,
+    HTTP_REQUEST_TIME,
+    OTHER,
     MetricsMiddleware
 )
 
 @pytest.fixture
 def metrics_middleware():
-    return MetricsMiddleware(AsyncMock())
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    return MetricsMiddleware(app)
 
 @pytest.mark.asyncio
 async def test_metrics_middleware(metrics_middleware):
     """Тест middleware для метрик"""
-    scope = {"type": "http"}
-    receive = AsyncMock()
-    send = AsyncMock()
-    
-    # Симулируем успешный ответ
-    async def mock_send(message):
-        if message["type"] == "http.response.start":
-            message["status"] = 200
-    
-    await metrics_middleware(scope, receive, mock_send)
-    
-    # Проверяем, что метрики были обновлены
-    assert NEWS_PROCESSED._value.get() > 0
-    assert NEWS_PROCESSING_TIME._sum.get() > 0
+    scope = {"type": "http", "method": "GET", "path": "/unknown"}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        sent.append(message)
+
+    requests = HTTP_REQUESTS.labels(method="GET", route=OTHER, status=200)
+    before = requests._value.get()
+    time_before = HTTP_REQUEST_TIME.labels(route=OTHER)._sum.get()
+
+    await metrics_middleware(scope, receive, send)
+
+    # Ответ проходит без изменений, метрики обновлены (без маршрута — OTHER)
+    assert [message["type"] for message in sent] == ["http.response.start", "http.response.body"]
+    assert requests._value.get() == before + 1
+    assert HTTP_REQUEST_TIME.labels(route=OTHER)._sum.get() >= time_before
 
 def test_news_metrics():
     """Тест метрик новостей"""
     # Тестируем счетчик обработанных новостей
-    NEWS_PROCESSED.labels(source="test", status="success").inc()
-    assert NEWS_PROCESSED._value.get() == 1
-    
+    processed = NEWS_PROCESSED.labels(source="test", status="stored")
+    before = processed._value.get()
+    processed.inc()
+    assert processed._value.get() == before + 1
+
     # Тестируем гистограмму impact
+    impact_before = NEWS_IMPACT._sum.get()
     NEWS_IMPACT.observe(3)
-    assert NEWS_IMPACT._sum.get() == 3
-    
+    assert NEWS_IMPACT._sum.get() == impact_before + 3
+
     # Тестируем гистограмму времени обработки
+    time_before = NEWS_PROCESSING_TIME._sum.get()
     NEWS_PROCESSING_TIME.observe(0.5)
-    assert NEWS_PROCESSING_TIME._sum.get() == 0.5
+    assert NEWS_PROCESSING_TIME._sum.get() == pytest.approx(time_before + 0.5)
 
 def test_llm_metrics():
     """Тест метрик LLM"""
     # Тестируем счетчик запросов
-    LLM_REQUESTS.labels(model="gemini", status="success").inc()
-    assert LLM_REQUESTS._value.get() == 1
-    
+    requests = LLM_REQUESTS.labels(model="gemini", status="success")
+    before = requests._value.get()
+    requests.inc()
+    assert requests._value.get() == before + 1
+
     # Тестируем счетчик стоимости
-    LLM_COST.labels(model="gemini").inc(0.001)
-    assert LLM_COST._value.get() == 0.001
+    cost = LLM_COST.labels(model="gemini")
+    cost_before = cost._value.get()
+    cost.inc(0.001)
+    assert cost._value.get() == pytest.approx(cost_before + 0.001)
 
 def test_duplicate_rate():
     """Тест метрики дубликатов"""
@@ -65,4 +84,4 @@ def test_duplicate_rate():
 def test_scheduler_jobs():
     """Тест метрики планировщика"""
     SCHEDULER_JOBS.set(5)
-    assert SCHEDULER_JOBS._value.get() == 5 
\ No newline at end of file
+    assert SCHEDULER_JOBS._value.get() == 5